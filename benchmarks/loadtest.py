@@ -0,0 +1,449 @@
+"""
+Load test — a mixed, concurrent workload against a real server process.
+
+Seeds a scratch database with synthetic history, starts the app under uvicorn
+on a free local port, then drives it with concurrent httpx.AsyncClient
+"devices" at each concurrency level in turn. Every device runs a closed loop
+picking operations from a weighted mix:
+
+  dashboard  GET overview / trends-bundle / calendar / heatmap / recent / batch overview
+  entries    GET /entries for a random day of history
+  goals      POST /goals (a writer-queue job + adherence recompute)
+  upload     POST a fresh weekly SnapCalorie export (the weekly import)
+
+  python -m benchmarks.loadtest --concurrency 1,2,4,8,16 --duration 20
+  python -m benchmarks.loadtest --mix dashboard=50,entries=20,goals=20,upload=10 --out load.json
+  python -m benchmarks.loadtest --url http://127.0.0.1:8000   # an already running server
+
+With --url the profiles are real ones, so the default mix is read-only
+(dashboard and entries); goals and upload change them and need an explicit
+--allow-writes.
+
+Reports, per concurrency level, throughput, p50/p95/p99 latency per route,
+the error rate and lock timeouts, then the saturation curve across levels.
+Lock and read-pool timeouts surface to clients as plain 500s, so they are
+counted from the server's log (only when this tool started the server).
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import count
+from pathlib import Path
+
+import httpx
+
+# The engines are created from SQLITE_DB_PATH at import time, so point them
+# (and the archive directory) at scratch paths before anything under src/ is
+# imported. The server process inherits the same environment.
+_TMP = tempfile.mkdtemp(prefix="digest-load-")
+os.environ["SQLITE_DB_PATH"] = os.path.join(_TMP, "load.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(_TMP, "archive")
+os.environ["BACKUP_DIR"] = os.path.join(_TMP, "backups")
+os.environ.setdefault("MAINTENANCE_ENABLED", "false")
+os.environ.setdefault("SLOW_QUERY_MS", "-1")
+
+from benchmarks import synthetic  # noqa: E402
+
+DEFAULT_MIX = "dashboard=60,entries=25,goals=10,upload=5"
+READ_ONLY_MIX = "dashboard=70,entries=30"        # the --url default
+WRITE_OPERATIONS = ("goals", "upload")
+SERVER_START_TIMEOUT = 30.0
+
+# Server log lines that mean a request failed waiting on SQLite or the read pool
+LOCK_TIMEOUT = re.compile(r"\(sqlite3\.OperationalError\) database is (locked|busy)")
+POOL_TIMEOUT = re.compile(r"QueuePool limit of size \d+ overflow \d+ reached")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+# ── Dataset and server ────────────────────────────────────────────────────────
+
+def seed_dataset(profiles: int, years: int, per_day: int, seed: int) -> list[int]:
+    from src.db.database import WriteSession, engine, init_db, read_engine
+    from src.ingestion.snapcalorie import ingest_csv
+    from src.models.consumption import Profile
+
+    init_db()
+    db = WriteSession()
+    ids = []
+    try:
+        for i in range(profiles):
+            p = Profile(name=f"Synthetic {i + 1}")
+            db.add(p)
+            db.commit()
+            ids.append(p.id)
+            t0 = time.perf_counter()
+            ingest_csv(io.StringIO(synthetic.generate_csv(i, years, per_day, seed=seed)), p.id, db)
+            db.commit()
+            print(f"  seeded profile {p.id} in {time.perf_counter() - t0:.1f} s", flush=True)
+    finally:
+        db.close()
+    # Hand the file to the server with no connection of ours still open
+    engine.dispose()
+    read_engine.dispose()
+    return ids
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """The app under uvicorn in a child process, logging to a file we can scan."""
+
+    def __init__(self, port: int, log_path: Path):
+        self.url = f"http://127.0.0.1:{port}"
+        self.port = port
+        self.log_path = log_path
+        self._process: subprocess.Popen | None = None
+        self._log = None
+
+    def start(self) -> None:
+        import importlib.util
+        if importlib.util.find_spec("uvicorn") is None:
+            raise SystemExit("uvicorn is not installed (pip install -r requirements.txt), or pass --url")
+        self._log = self.log_path.open("wb")
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.api.main:app",
+             "--host", "127.0.0.1", "--port", str(self.port), "--log-level", "warning", "--no-access-log"],
+            stdout=self._log, stderr=subprocess.STDOUT, env=os.environ.copy(),
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise SystemExit(f"server exited during startup:\n{self.log_path.read_text()[-2000:]}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise SystemExit(f"server not ready after {SERVER_START_TIMEOUT:.0f} s (log: {self.log_path})")
+
+    def log_offset(self) -> int:
+        return self.log_path.stat().st_size
+
+    def failures_since(self, offset: int) -> dict[str, int]:
+        """Lock and read-pool timeouts the server logged after `offset`."""
+        with self.log_path.open("rb") as f:
+            f.seek(offset)
+            text = f.read().decode("utf-8", "replace")
+        return {"lock_timeouts": len(LOCK_TIMEOUT.findall(text)), "pool_timeouts": len(POOL_TIMEOUT.findall(text))}
+
+    def stop(self) -> None:
+        if self._process and self._process.poll() is None:
+            self._process.send_signal(signal.SIGINT)
+            try:
+                self._process.wait(10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        if self._log:
+            self._log.close()
+
+
+# ── Workload ──────────────────────────────────────────────────────────────────
+
+@dataclass
+class Call:
+    route: str                 # label the results are grouped by
+    method: str
+    url: str
+    json: dict | None = None
+    files: dict | None = None
+
+
+@dataclass
+class Sample:
+    route: str
+    started: float
+    seconds: float
+    status: int | None         # None when the request never got a response
+    error: str | None          # "http" (status >= 400), "timeout", "transport"
+
+
+class Workload:
+    """Builds the next request for a device; shared by all devices of a run."""
+
+    def __init__(self, profile_ids: list[int], years: int, per_day: int, seed: int):
+        self.profile_ids = profile_ids
+        self.per_day = per_day
+        self.seed = seed
+        self.end = synthetic.DEFAULT_END
+        self.history_days = years * 365
+        # Each upload is the next unseen week, as the weekly import would be
+        self._weeks = {pid: count(1) for pid in profile_ids}
+
+    def dashboard(self, rng: random.Random, pid: int) -> Call:
+        base, end = f"/consumption/profiles/{pid}", self.end
+        month = end - timedelta(days=29)
+        return rng.choice([
+            Call("GET /overview", "GET", f"{base}/overview?today={end}"),
+            Call("GET /profiles/overview[batch]", "GET", f"/consumption/profiles/overview?today={end}"),
+            Call("GET /trends-bundle[30d]", "GET", f"{base}/trends-bundle?start={month}&end={end}"),
+            Call("GET /calendar[month]", "GET", f"{base}/calendar/{end:%Y-%m}"),
+            Call("GET /heatmap[90d]", "GET", f"{base}/heatmap?end={end}"),
+            Call("GET /recent", "GET", f"{base}/recent"),
+        ])
+
+    def entries(self, rng: random.Random, pid: int) -> Call:
+        day = self.end - timedelta(days=rng.randrange(self.history_days))
+        return Call("GET /entries[day]", "GET", f"/consumption/profiles/{pid}/entries?log_date={day}")
+
+    def goals(self, rng: random.Random, pid: int) -> Call:
+        body = {"calories": rng.randrange(1600, 2800, 50), "protein_g": rng.randrange(80, 180, 5)}
+        return Call("POST /goals", "POST", f"/consumption/profiles/{pid}/goals", json=body)
+
+    def upload(self, rng: random.Random, pid: int) -> Call:
+        week_end = self.end + timedelta(days=7 * next(self._weeks[pid]))
+        text = synthetic.weekly_export(self.profile_ids.index(pid), week_end, self.per_day, seed=self.seed)
+        return Call(
+            "POST /ingest[week]", "POST", f"/consumption/profiles/{pid}/ingest/snapcalorie",
+            files={"file": ("export.csv", text.encode(), "text/csv")},
+        )
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("dashboard", "entries", "goals", "upload"):
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs at least one positive weight")
+    return mix
+
+
+async def device(
+    base_url: str, workload: Workload, mix: dict[str, float], rng: random.Random, pid: int,
+    deadline: float, think: float, timeout: float, samples: list[Sample],
+) -> None:
+    """One household device: a closed loop of requests until the deadline."""
+    names, weights = list(mix), list(mix.values())
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        while time.monotonic() < deadline:
+            call = getattr(workload, rng.choices(names, weights)[0])(rng, pid)
+            started = time.monotonic()
+            status = error = None
+            try:
+                r = await client.request(call.method, call.url, json=call.json, files=call.files)
+                status = r.status_code
+                if status >= 400:
+                    error = "http"
+            except httpx.TimeoutException:
+                error = "timeout"
+            except httpx.TransportError:
+                error = "transport"
+            samples.append(Sample(call.route, started, time.monotonic() - started, status, error))
+            if think:
+                await asyncio.sleep(rng.expovariate(1 / think))
+
+
+async def run_level(
+    base_url: str, workload: Workload, mix: dict[str, float], concurrency: int,
+    duration: float, warmup: float, think: float, timeout: float, seed: int,
+) -> tuple[list[Sample], float]:
+    """Run `concurrency` devices; returns the samples started after the warmup and its start time."""
+    samples: list[Sample] = []
+    start = time.monotonic()
+    measured_from = start + warmup
+    await asyncio.gather(*(
+        device(
+            base_url, workload, mix, random.Random(seed * 1000 + i),
+            workload.profile_ids[i % len(workload.profile_ids)],
+            measured_from + duration, think, timeout, samples,
+        )
+        for i in range(concurrency)
+    ))
+    return [s for s in samples if s.started >= measured_from], measured_from
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+
+def _percentiles(seconds: list[float]) -> dict[str, float | None]:
+    if not seconds:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ms = sorted(s * 1000 for s in seconds)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else [ms[0]] * 99
+    return {
+        "p50_ms": round(cuts[49], 1),
+        "p95_ms": round(cuts[94], 1),
+        "p99_ms": round(cuts[98], 1),
+        "max_ms": round(ms[-1], 1),
+    }
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    """Throughput, latency percentiles and error counts for a set of samples."""
+    errors = [s for s in samples if s.error]
+    return {
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        **_percentiles([s.seconds for s in samples]),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "timeouts": sum(s.error == "timeout" for s in errors),
+        "status_5xx": sum(s.status is not None and s.status >= 500 for s in errors),
+    }
+
+
+def level_report(samples: list[Sample], elapsed: float, concurrency: int, failures: dict | None) -> dict:
+    by_route: dict[str, list[Sample]] = {}
+    for s in samples:
+        by_route.setdefault(s.route, []).append(s)
+    summary = summarize(samples, elapsed)
+    if failures is not None:
+        summary.update(failures)
+        summary["lock_timeout_rate"] = round(failures["lock_timeouts"] / len(samples), 4) if samples else 0.0
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "summary": summary,
+        "routes": {route: summarize(group, elapsed) for route, group in sorted(by_route.items())},
+    }
+
+
+def _ms(value: float | None) -> str:
+    return f"{value:>8.1f}" if value is not None else f"{'—':>8}"
+
+
+def print_level(level: dict) -> None:
+    print(f"  {'route':<32} {'req':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+    for route, r in level["routes"].items():
+        print(
+            f"  {route:<32} {r['requests']:>6} {r['rps']:>7.1f} {_ms(r['p50_ms'])} {_ms(r['p95_ms'])}"
+            f" {_ms(r['p99_ms'])} {r['error_rate'] * 100:>6.2f}"
+        )
+    s = level["summary"]
+    locks = f"  lock timeouts {s['lock_timeouts']}, pool timeouts {s['pool_timeouts']}" if "lock_timeouts" in s else ""
+    print(f"  {'all':<32} {s['requests']:>6} {s['rps']:>7.1f} {_ms(s['p50_ms'])} {_ms(s['p95_ms'])}"
+          f" {_ms(s['p99_ms'])} {s['error_rate'] * 100:>6.2f}{locks}", flush=True)
+
+
+def print_curve(levels: list[dict]) -> None:
+    print("saturation curve")
+    print(f"  {'conc':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'locks':>6}")
+    for level in levels:
+        s = level["summary"]
+        print(
+            f"  {level['concurrency']:>5} {s['rps']:>8.1f} {_ms(s['p50_ms'])} {_ms(s['p95_ms'])}"
+            f" {_ms(s['p99_ms'])} {s['error_rate'] * 100:>6.2f} {s.get('lock_timeouts', '—'):>6}"
+        )
+    peak = max(levels, key=lambda level: level["summary"]["rps"])
+    print(f"  throughput peaks at {peak['summary']['rps']} req/s with {peak['concurrency']} concurrent devices")
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+async def run(args, base_url: str, profile_ids: list[int], server: Server | None) -> list[dict]:
+    workload = Workload(profile_ids, args.years, args.per_day, args.seed)
+    levels = []
+    for concurrency in args.concurrency:
+        print(f"concurrency {concurrency}: {args.duration:g} s (+{args.warmup:g} s warmup)", flush=True)
+        offset = server.log_offset() if server else 0
+        samples, measured_from = await run_level(
+            base_url, workload, args.mix, concurrency, args.duration, args.warmup,
+            args.think_ms / 1000, args.timeout, args.seed,
+        )
+        # Devices finish their last request after the deadline, so measure to the actual end
+        elapsed = max([args.duration, *(s.started + s.seconds - measured_from for s in samples)])
+        level = level_report(samples, elapsed, concurrency, server.failures_since(offset) if server else None)
+        print_level(level)
+        levels.append(level)
+    return levels
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=2)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--per-day", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 2, 4, 8, 16],
+                        help="comma-separated device counts, one level each (default 1,2,4,8,16)")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds at the start of each level")
+    parser.add_argument("--mix", type=parse_mix,
+                        help=f"operation weights (default {DEFAULT_MIX}; {READ_ONLY_MIX} with --url)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between a device's requests (0 = closed loop)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout per request, seconds")
+    parser.add_argument("--url", help="load an already running server instead of seeding and starting one")
+    parser.add_argument("--allow-writes", action="store_true",
+                        help="with --url, allow the goals and upload operations to change the server's profiles")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    args = parser.parse_args()
+    if args.mix is None:
+        args.mix = parse_mix(READ_ONLY_MIX if args.url and not args.allow_writes else DEFAULT_MIX)
+    writes = [name for name in WRITE_OPERATIONS if args.mix.get(name)]
+    if args.url and writes and not args.allow_writes:
+        parser.error(f"{' and '.join(writes)} would change the profiles at {args.url}; pass --allow-writes")
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        profile_ids = [p["id"] for p in httpx.get(f"{base_url}/consumption/profiles").json()]
+        if not profile_ids:
+            print("the server has no profiles to load", file=sys.stderr)
+            return 1
+    else:
+        print(f"dataset: {args.profiles} profiles × {args.years} years × {args.per_day}/day  (db: {os.environ['SQLITE_DB_PATH']})")
+        profile_ids = seed_dataset(args.profiles, args.years, args.per_day, args.seed)
+        server = Server(_free_port(), Path(_TMP) / "server.log")
+        server.start()
+        base_url = server.url
+        print(f"server: {base_url}  (log: {server.log_path})")
+
+    try:
+        levels = asyncio.run(run(args, base_url, profile_ids, server))
+    finally:
+        if server:
+            server.stop()
+    print_curve(levels)
+
+    if args.out:
+        output = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "target": args.url or "local",
+                "dataset": None if args.url else {
+                    "profiles": args.profiles, "years": args.years, "per_day": args.per_day, "seed": args.seed,
+                },
+                "mix": args.mix,
+                "duration": args.duration,
+                "think_ms": args.think_ms,
+            },
+            "levels": levels,
+        }
+        args.out.write_text(json.dumps(output, indent=2) + "\n")
+        print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""
+Benchmark suite — ingestion, summary rollups, the analytics query layer and
+the HTTP routes, against a deterministic synthetic dataset.
+
+  python -m benchmarks.run --out bench.json
+  python -m benchmarks.run --out new.json --baseline bench.json --threshold 0.25
+
+Results are JSON keyed by benchmark name so runs from different commits can be
+compared. With --baseline, any benchmark whose median slows down by more than
+--threshold (fraction) and more than --min-delta-ms exits non-zero.
+"""
+import argparse
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+# The engines are created from SQLITE_DB_PATH at import time, so point them
+# (and the archive directory) at scratch paths before anything under src/ is imported.
+_TMP = tempfile.mkdtemp(prefix="digest-bench-")
+os.environ["SQLITE_DB_PATH"] = os.path.join(_TMP, "bench.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(_TMP, "archive")
+os.environ.setdefault("SLOW_QUERY_MS", "-1")
+
+from benchmarks import synthetic  # noqa: E402
+
+
+class Suite:
+    def __init__(self, repeat: int, warmup: int):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results: dict[str, dict] = {}
+
+    def bench(self, name: str, fn: Callable[[], object], repeat: int | None = None) -> None:
+        repeat = repeat or self.repeat
+        for _ in range(self.warmup):
+            fn()
+        timings = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - t0) * 1000)
+        self.results[name] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "runs": repeat,
+        }
+        print(f"  {name:<60} {self.results[name]['median_ms']:>10.3f} ms", flush=True)
+
+    def once(self, name: str, fn: Callable[[], object]) -> None:
+        t0 = time.perf_counter()
+        fn()
+        ms = round((time.perf_counter() - t0) * 1000, 3)
+        self.results[name] = {"median_ms": ms, "min_ms": ms, "max_ms": ms, "runs": 1}
+        print(f"  {name:<60} {ms:>10.3f} ms", flush=True)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def seed_dataset(suite: Suite, profiles: int, years: int, per_day: int, seed: int) -> list[int]:
+    from src.db.database import WriteSession, init_db
+    from src.ingestion.snapcalorie import ingest_csv
+    from src.models.consumption import Profile
+
+    init_db()
+    db = WriteSession()
+    ids = []
+    try:
+        for i in range(profiles):
+            p = Profile(name=f"Synthetic {i + 1}")
+            db.add(p)
+            db.commit()
+            ids.append(p.id)
+            text = synthetic.generate_csv(i, years, per_day, seed=seed)
+            suite.once(f"ingest_csv[history profile={i + 1}]", lambda: ingest_csv(io.StringIO(text), p.id, db))
+            db.commit()
+    finally:
+        db.close()
+    return ids
+
+
+def bench_ingestion(suite: Suite, profile_id: int, per_day: int, seed: int) -> None:
+    from src.db.database import WriteSession
+    from src.ingestion.snapcalorie import ingest_csv, _rebuild_daily_summary
+
+    db = WriteSession()
+    try:
+        week_end = [synthetic.DEFAULT_END + timedelta(days=7)]
+
+        def ingest_week():
+            text = synthetic.weekly_export(0, week_end[0], per_day, seed=seed)
+            week_end[0] += timedelta(days=7)
+            ingest_csv(io.StringIO(text), profile_id, db)
+            db.commit()
+
+        def rebuild_day():
+            _rebuild_daily_summary(profile_id, synthetic.DEFAULT_END, db)
+            db.commit()
+
+        suite.bench("ingest_csv[weekly export]", ingest_week)
+        suite.bench("_rebuild_daily_summary", rebuild_day)
+    finally:
+        db.close()
+
+
+def query_cases(profile_ids: list[int]) -> dict[str, Callable]:
+    """One or more cases per public function in src/analytics/queries.py."""
+    from src.analytics import queries as q
+
+    profile_id = profile_ids[0]
+    end = synthetic.DEFAULT_END
+    ranges = {"30d": end - timedelta(days=29), "1y": end - timedelta(days=364), "all": synthetic.history_start(10)}
+    metrics = list(q.SUMMARY_METRIC_MAP)
+    cases: dict[str, Callable] = {}
+    for label, start in ranges.items():
+        cases[f"get_trend_data[{label}]"] = lambda db, s=start: q.get_trend_data(db, profile_id, s, end, metrics)
+        cases[f"get_rolling_averages[{label}]"] = lambda db, s=start: q.get_rolling_averages(db, profile_id, s, end, metrics)
+        cases[f"get_favorite_foods[{label}]"] = lambda db, s=start: q.get_favorite_foods(db, profile_id, s, end)
+        cases[f"get_meal_pattern_breakdown[{label}]"] = lambda db, s=start: q.get_meal_pattern_breakdown(db, profile_id, s, end)
+        cases[f"get_trends_bundle[{label}]"] = lambda db, s=start: q.get_trends_bundle(db, profile_id, s, end, metrics)
+    cases["get_calendar_month"] = lambda db: q.get_calendar_month(db, profile_id, end.year, end.month, ["calories"])
+    cases["get_calendar_version"] = lambda db: q.get_calendar_version(db, profile_id, end.year, end.month)
+    cases["get_heatmap[90d]"] = lambda db: q.get_heatmap(db, profile_id, end - timedelta(days=89), end)
+    cases["get_recent_entries"] = lambda db: q.get_recent_entries(db, profile_id)
+    cases["get_overview_data"] = lambda db: q.get_overview_data(db, profile_id, end)
+    cases["get_overview_batch"] = lambda db: q.get_overview_batch(db, profile_ids, end)
+    return cases
+
+
+def bench_queries(suite: Suite, profile_ids: list[int]) -> None:
+    from src.analytics import queries as q
+    from src.db.database import SessionLocal
+
+    cases = query_cases(profile_ids)
+    covered = {name.split("[")[0] for name in cases}
+    public = {
+        name for name, fn in inspect.getmembers(q, inspect.isfunction)
+        if not name.startswith("_") and fn.__module__ == q.__name__
+    }
+    for name in sorted(public - covered):
+        print(f"  WARNING: no benchmark for queries.{name}", file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        for name, fn in cases.items():
+            suite.bench(f"queries.{name}", lambda: fn(db))
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def route_cases(profile_ids: list[int]) -> dict[str, str]:
+    profile_id = profile_ids[0]
+    end = synthetic.DEFAULT_END
+    month = str(end - timedelta(days=29))
+    year = str(end - timedelta(days=364))
+    base = f"/consumption/profiles/{profile_id}"
+    return {
+        "GET /profiles": "/consumption/profiles",
+        "GET /overview": f"{base}/overview?today={end}",
+        "GET /profiles/overview[batch]": f"/consumption/profiles/overview?today={end}",
+        "GET /trends[30d]": f"{base}/trends?start={month}&end={end}",
+        "GET /trends[1y all metrics]": f"{base}/trends?start={year}&end={end}&metrics="
+                                       "calories,protein_g,carbs_g,fat_g,fiber_g,sodium_mg,sugar_g",
+        "GET /calendar[month]": f"{base}/calendar/{end:%Y-%m}",
+        "GET /averages[1y]": f"{base}/averages?start={year}&end={end}",
+        "GET /favorites[1y]": f"{base}/favorites?start={year}&end={end}",
+        "GET /meal-patterns[1y]": f"{base}/meal-patterns?start={year}&end={end}",
+        "GET /trends-bundle[1y]": f"{base}/trends-bundle?start={year}&end={end}",
+        "GET /heatmap[90d]": f"{base}/heatmap?start={end - timedelta(days=89)}&end={end}",
+        "GET /recent": f"{base}/recent",
+        "GET /adherence[1y]": f"{base}/adherence?start={year}&end={end}",
+        "GET /correlations[all]": f"{base}/correlations?start={synthetic.history_start(10)}&end={end}&max_lag=14",
+        "GET /summaries[1y]": f"{base}/summaries?start={year}&end={end}",
+        "GET /entries[day]": f"{base}/entries?log_date={end}",
+        "GET /entries[all]": f"{base}/entries",
+    }
+
+
+def bench_routes(suite: Suite, profile_ids: list[int]) -> None:
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+
+    with TestClient(app) as client:
+        for name, url in route_cases(profile_ids).items():
+            def call(url=url):
+                r = client.get(url)
+                assert r.status_code == 200, (url, r.status_code, r.text[:200])
+            suite.bench(f"route.{name}", call)
+
+
+def bench_serialization(suite: Suite, profile_ids: list[int]) -> None:
+    """
+    Encoding cost of the largest payloads: FastAPI's default path
+    (jsonable_encoder + stdlib json, as JSONResponse renders) against orjson
+    on the same data, reported as a share of query + encode time.
+    """
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from src.analytics import queries as q
+    from src.api.routes.consumption import ENTRY_COLUMNS
+    from src.db.database import SessionLocal
+    from src.models.consumption import ConsumptionEntry
+
+    profile_id = profile_ids[0]
+    end = synthetic.DEFAULT_END
+    builders = {
+        "trends[all metrics, all]": lambda db: q.get_trend_data(
+            db, profile_id, synthetic.history_start(10), end, list(q.SUMMARY_METRIC_MAP)
+        ),
+        "entries[all]": lambda db: [
+            dict(zip(ENTRY_COLUMNS, row))
+            for row in db.query(*ENTRY_COLUMNS.values())
+            .filter(ConsumptionEntry.profile_id == profile_id)
+            .order_by(ConsumptionEntry.logged_at)
+        ],
+    }
+    encoders = {
+        "stdlib": lambda payload: json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8"),
+        "orjson": lambda payload: orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+    }
+
+    db = SessionLocal()
+    try:
+        for name, build in builders.items():
+            suite.bench(f"serialize.{name}[query]", lambda: build(db))
+            payload = build(db)
+            for encoder, encode in encoders.items():
+                suite.bench(f"serialize.{name}[{encoder}]", lambda: encode(payload))
+            query_ms = suite.results[f"serialize.{name}[query]"]["median_ms"]
+            for encoder in encoders:
+                encode_ms = suite.results[f"serialize.{name}[{encoder}]"]["median_ms"]
+                share = encode_ms / (query_ms + encode_ms) if query_ms + encode_ms else 0
+                print(f"    {name} {encoder}: encoding is {share:.0%} of query + encode")
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    regressions = []
+    for name, base in sorted(baseline.get("results", {}).items()):
+        cur = results.get(name)
+        if not cur:
+            continue
+        delta = cur["median_ms"] - base["median_ms"]
+        ratio = cur["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        marker = ""
+        if ratio > 1 + threshold and delta > min_delta_ms:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(f"  {name:<60} {base['median_ms']:>10.3f} → {cur['median_ms']:>10.3f} ms ({ratio:5.2f}x){marker}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=2)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--per-day", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="results JSON from another commit to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown fraction (default 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--skip-routes", action="store_true")
+    args = parser.parse_args()
+
+    suite = Suite(args.repeat, args.warmup)
+    print(f"dataset: {args.profiles} profiles × {args.years} years × {args.per_day}/day  (db: {os.environ['SQLITE_DB_PATH']})")
+    ids = seed_dataset(suite, args.profiles, args.years, args.per_day, args.seed)
+    bench_queries(suite, ids)
+    bench_serialization(suite, ids)
+    if not args.skip_routes:
+        bench_routes(suite, ids)
+    # Runs last: each weekly import appends data the read benchmarks shouldn't see
+    bench_ingestion(suite, ids[-1], args.per_day, args.seed)
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"profiles": args.profiles, "years": args.years, "per_day": args.per_day, "seed": args.seed},
+        },
+        "results": suite.results,
+    }
+    if args.out:
+        args.out.write_text(json.dumps(output, indent=2) + "\n")
+        print(f"wrote {args.out}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("meta", {}).get("dataset") != output["meta"]["dataset"]:
+            print("WARNING: baseline was recorded with a different dataset", file=sys.stderr)
+        print(f"compare against {args.baseline} (commit {baseline.get('meta', {}).get('commit')})")
+        regressions = compare(suite.results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Deterministic synthetic SnapCalorie exports.
+
+Same arguments → byte-identical CSV, so benchmark datasets are reproducible
+across machines and commits.
+
+  python -m benchmarks.synthetic --profiles 3 --years 2 --per-day 8 --out data/synthetic
+"""
+import argparse
+import csv
+import io
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import IO, Iterator
+
+from src.ingestion.snapcalorie import (
+    COL_DATE, COL_TIME, COL_FOOD, COL_QTY, COL_UNIT, COL_CALORIES, COL_PROTEIN,
+    COL_CARBS, COL_FAT, COL_SATURATES, COL_FIBER, COL_SUGAR, COL_CHOLESTEROL,
+    COL_SODIUM, COL_POTASSIUM,
+)
+
+HEADER = [
+    COL_DATE, COL_TIME, COL_FOOD, COL_QTY, COL_UNIT, COL_CALORIES, COL_PROTEIN,
+    COL_CARBS, COL_FAT, COL_SATURATES, COL_FIBER, COL_SUGAR, COL_CHOLESTEROL,
+    COL_SODIUM, COL_POTASSIUM,
+]
+
+DEFAULT_END = date(2026, 1, 31)
+
+# name, qty, unit, kcal, protein, carbs, fat, saturates, fiber, sugar, cholesterol, sodium, potassium
+FOODS = [
+    ("Scrambled Eggs",         2,   "large",   180, 14,  2,   12, 3.5, 0,   1,  420, 190, 140),
+    ("Oatmeal",                1,   "cup",     158, 6,   27,  3,  0.5, 4,   1,  0,   115, 143),
+    ("Greek Yogurt",           1,   "cup",     130, 23,  9,   0,  0,   0,   7,  10,  80,  240),
+    ("Banana",                 1,   "medium",  105, 1.3, 27,  0.4, 0.1, 3.1, 14, 0,  1,   422),
+    ("Coffee with Milk",       12,  "oz",      70,  4,   6,   3,  2,   0,   6,  10,  60,  300),
+    ("Avocado Toast",          1,   "slice",   260, 7,   24,  16, 2.3, 8,   2,  0,   310, 520),
+    ("Grilled Chicken Breast", 6,   "oz",      275, 52,  0,   6,  1.5, 0,   0,  166, 74,  440),
+    ("Turkey Sandwich",        1,   "sandwich", 420, 28, 44,  14, 4,   4,   6,  55,  1150, 390),
+    ("Caesar Salad",           1,   "bowl",    360, 10,  14,  30, 6,   3,   3,  30,  780, 330),
+    ("Pho",                    1,   "bowl",    450, 30,  55,  10, 3,   2,   4,  60,  1800, 600),
+    ("Burrito Bowl",           1,   "bowl",    650, 38,  70,  22, 8,   12,  5,  90,  1350, 900),
+    ("Brown Rice",             1,   "cup",     215, 5,   45,  2,  None, 3.5, 0, 0,   10,  84),
+    ("steak",                  10,  "oz",      652, 76,  0,   37, 15,  None, 0, 235, 1040, 910),
+    ("Salmon Fillet",          6,   "oz",      350, 39,  0,   21, 4,   0,   0,  107, 100, 700),
+    ("Spaghetti Bolognese",    1.5, "cup",     540, 27,  66,  18, 6,   5,   9,  60,  890, 720),
+    ("Margherita Pizza",       2,   "slice",   560, 24,  66,  22, 10,  4,   6,  50,  1280, 330),
+    ("Roasted Broccoli",       1,   "cup",     55,  4,   11,  0.6, 0.1, 5.1, 2.2, 0, 64,  457),
+    ("ranch dressing",         2,   "tbsp",    129, 0.4, 1.8, 13, 2,   0,   1.4, 8, 270, None),
+    ("Protein Shake",          1,   "scoop",   120, 24,  3,   1.5, 0.5, 1,  1,  30,  150, 180),
+    ("Almonds",                1,   "oz",      164, 6,   6,   14, 1.1, 3.5, 1.2, 0, 0,   208),
+    ("Apple",                  1,   "medium",  95,  0.5, 25,  0.3, 0.1, 4.4, 19, 0,  2,   195),
+    ("Dark Chocolate",         1,   "oz",      170, 2.2, 13,  12, 7,   3.1, 7,  2,   6,   203),
+    ("Ice Cream",              0.5, "cup",     137, 2.3, 16,  7,  4.5, 0.5, 14, 29,  53,  131),
+    ("Tortilla Chips",         1,   "oz",      140, 2,   18,  7,  1,   1,   0,  0,   120, 60),
+]
+
+# Meal windows (start hour, end hour exclusive) and how likely a slot lands in each
+MEAL_WINDOWS = [((6, 10), 0.3), ((11, 15), 0.3), ((17, 21), 0.3), ((21, 24), 0.07), ((0, 5), 0.03)]
+
+
+def _fmt(value: float | None) -> str:
+    if value is None:
+        return ""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def generate_rows(
+    profile_index: int,
+    start: date,
+    end: date,
+    per_day: int,
+    seed: int = 0,
+) -> Iterator[list[str]]:
+    """Rows (without header) for one profile, `per_day` entries on every day from start to end inclusive."""
+    rng = random.Random(f"{seed}:{profile_index}:{start}")
+    # Each profile has a stable set of favourite foods so favorites/meal patterns are skewed, not uniform
+    weights = [rng.uniform(0.2, 1.0) ** 3 for _ in FOODS]
+    windows, window_weights = zip(*MEAL_WINDOWS)
+
+    day = start
+    while day <= end:
+        minutes = sorted(
+            rng.randrange(lo * 60, hi * 60)
+            for lo, hi in rng.choices(windows, weights=window_weights, k=per_day)
+        )
+        for minute in minutes:
+            food = rng.choices(FOODS, weights=weights)[0]
+            name, qty, unit, *nutrients = food
+            scale = rng.uniform(0.7, 1.3)
+            logged_at = datetime.combine(day, datetime.min.time()) + timedelta(minutes=minute)
+            yield [
+                logged_at.strftime("%Y-%m-%d"),
+                logged_at.strftime("%H:%M"),
+                name,
+                _fmt(qty * scale),
+                unit,
+                *(_fmt(n * scale if n is not None else None) for n in nutrients),
+            ]
+        day += timedelta(days=1)
+
+
+def write_csv(file: IO[str], rows) -> None:
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(HEADER)
+    writer.writerows(rows)
+
+
+def history_start(years: int, end: date = DEFAULT_END) -> date:
+    return end - timedelta(days=years * 365 - 1)
+
+
+def generate_csv(profile_index: int, years: int, per_day: int, end: date = DEFAULT_END, seed: int = 0) -> str:
+    """Full multi-year history for one profile as a single CSV string."""
+    buf = io.StringIO()
+    write_csv(buf, generate_rows(profile_index, history_start(years, end), end, per_day, seed))
+    return buf.getvalue()
+
+
+def weekly_export(profile_index: int, week_end: date, per_day: int, seed: int = 0) -> str:
+    """A single 7-day export — the size the real weekly import workflow produces."""
+    buf = io.StringIO()
+    write_csv(buf, generate_rows(profile_index, week_end - timedelta(days=6), week_end, per_day, seed))
+    return buf.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=2)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--per-day", type=int, default=8)
+    parser.add_argument("--end", type=date.fromisoformat, default=DEFAULT_END)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=Path("data/synthetic"))
+    args = parser.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    for i in range(args.profiles):
+        path = args.out / f"profile_{i + 1}.csv"
+        with path.open("w", encoding="utf-8", newline="") as f:
+            write_csv(f, generate_rows(i, history_start(args.years, args.end), args.end, args.per_day, args.seed))
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
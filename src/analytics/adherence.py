@@ -0,0 +1,153 @@
+"""
+Goal adherence — per-day progress against ProfileGoals, precomputed.
+
+daily_adherence holds one row per (profile, metric, logged day) with the goal
+in force, the day's total, its percentage of the goal and a status:
+
+  miss  under 90% of the goal
+  hit   90–105% of the goal
+  over  above 105% of the goal
+
+(the same bands the Overview progress bars colour by). Rows are rebuilt with
+set-based INSERT … SELECT statements from daily_summaries whenever goals are
+saved or summaries are rebuilt, so reads are a single scan of the
+(profile_id, metric, log_date) index. recompute_adherence does not commit.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import case, func, insert, literal, union_all
+from sqlalchemy.orm import Session
+
+from src.analytics.queries import SUMMARY_METRIC_MAP
+from src.models.consumption import DailyAdherence, DailySummary, ProfileGoals
+
+GOAL_METRICS = ["calories", "protein_g", "carbs_g", "fat_g", "fiber_g", "water_ml", "caffeine_mg"]
+
+HIT_PCT  = 90.0
+OVER_PCT = 105.0
+
+
+def recompute_adherence(
+    db: Session,
+    profile_id: int,
+    start: date | None = None,
+    end: date | None = None,
+) -> None:
+    """Rebuild a profile's adherence rows between start and end (default: all days)."""
+    stale = db.query(DailyAdherence).filter(DailyAdherence.profile_id == profile_id)
+    if start:
+        stale = stale.filter(DailyAdherence.log_date >= start)
+    if end:
+        stale = stale.filter(DailyAdherence.log_date <= end)
+    stale.delete(synchronize_session=False)
+
+    goals = db.query(ProfileGoals).filter_by(profile_id=profile_id).first()
+    if not goals:
+        return
+
+    selects = []
+    for metric in GOAL_METRICS:
+        goal = getattr(goals, metric)
+        if not goal or goal <= 0:
+            continue
+        value = func.coalesce(getattr(DailySummary, SUMMARY_METRIC_MAP[metric]), 0)
+        pct = value * 100.0 / goal
+        query = (
+            db.query(
+                DailySummary.profile_id,
+                literal(metric),
+                DailySummary.log_date,
+                literal(goal),
+                value,
+                func.round(pct, 1),
+                case((pct > OVER_PCT, "over"), (pct >= HIT_PCT, "hit"), else_="miss"),
+            )
+            .filter(DailySummary.profile_id == profile_id, DailySummary.entry_count > 0)
+        )
+        if start:
+            query = query.filter(DailySummary.log_date >= start)
+        if end:
+            query = query.filter(DailySummary.log_date <= end)
+        selects.append(query.statement)
+    if not selects:
+        return
+
+    columns = ["profile_id", "metric", "log_date", "goal", "value", "pct", "status"]
+    source = selects[0] if len(selects) == 1 else union_all(*selects)
+    db.execute(insert(DailyAdherence).from_select(columns, source))
+
+
+def _streaks(days: list[tuple[date, str]], end: date) -> tuple[int, int]:
+    """(current, longest) runs of consecutive 'hit' days; current must end on `end`."""
+    longest = run = 0
+    previous = None
+    for d, status in days:
+        if status == "hit":
+            run = run + 1 if previous is not None and d - previous == timedelta(days=1) and run else 1
+            longest = max(longest, run)
+        else:
+            run = 0
+        previous = d
+    current = run if previous == end else 0
+    return current, longest
+
+
+def get_adherence(
+    db: Session,
+    profile_id: int,
+    start: date,
+    end: date,
+    metrics: list[str] | None = None,
+) -> dict:
+    """
+    Per goal metric over the range: hit/miss/over day counts, hit rate (of
+    logged days), average % of goal, and current/longest hit streaks.
+    Metrics without a goal are omitted.
+    """
+    wanted = [m for m in (metrics or GOAL_METRICS) if m in GOAL_METRICS]
+    rows = (
+        db.query(
+            DailyAdherence.metric,
+            DailyAdherence.log_date,
+            DailyAdherence.goal,
+            DailyAdherence.pct,
+            DailyAdherence.status,
+        )
+        .filter(
+            DailyAdherence.profile_id == profile_id,
+            DailyAdherence.metric.in_(wanted),
+            DailyAdherence.log_date >= start,
+            DailyAdherence.log_date <= end,
+        )
+        .order_by(DailyAdherence.metric, DailyAdherence.log_date)
+        .all()
+    )
+
+    by_metric: dict[str, list] = {}
+    for r in rows:
+        by_metric.setdefault(r.metric, []).append(r)
+
+    result = {}
+    for metric in wanted:
+        days = by_metric.get(metric)
+        if not days:
+            continue
+        counts = {"hit": 0, "miss": 0, "over": 0}
+        for r in days:
+            counts[r.status] += 1
+        current, longest = _streaks([(r.log_date, r.status) for r in days], end)
+        result[metric] = {
+            "goal": days[-1].goal,
+            "days": len(days),
+            **counts,
+            "hit_rate": round(counts["hit"] * 100 / len(days), 1),
+            "avg_pct": round(sum(r.pct for r in days) / len(days), 1),
+            "current_streak": current,
+            "longest_streak": longest,
+        }
+
+    return {
+        "start": str(start),
+        "end": str(end),
+        "metrics": result,
+    }
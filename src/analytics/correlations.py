@@ -0,0 +1,274 @@
+"""
+Correlation engine over a profile's daily totals — Session in → dicts out.
+
+The DailySummary rows for the range are loaded once into a dense
+(calendar days × metrics) NumPy matrix, with NaN for days nothing was
+logged, and every statistic is computed for all metric pairs at once with
+masked matrix products:
+
+  - same-day Pearson and Spearman correlations
+  - lagged Pearson correlations: metric A on day t vs metric B on day t+k
+  - threshold comparisons: mean of B on day t+lag when A was at or above a
+    threshold on day t, against days when it was below (thresholds default
+    to each metric's 75th percentile)
+
+Each pair only uses days where both sides were logged. Results are cached per
+(profile, parameters) and keyed on get_data_version, so a new import
+invalidates them without any explicit hook. numpy is imported on first use.
+"""
+import threading
+import warnings
+from collections import OrderedDict
+from datetime import date
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.analytics.queries import SUMMARY_METRIC_MAP
+from src.models.consumption import DailySummary
+
+MIN_DAYS         = 10   # pairs with fewer common days report None
+MAX_LAG          = 14
+DEFAULT_QUANTILE = 0.75
+CACHE_SIZE       = 64
+
+
+def get_data_version(db: Session, profile_id: int) -> tuple:
+    """Changes whenever a profile's summaries are inserted or rebuilt."""
+    count, updated = (
+        db.query(func.count(DailySummary.id), func.max(DailySummary.updated_at))
+        .filter(DailySummary.profile_id == profile_id)
+        .one()
+    )
+    return count, str(updated)
+
+
+def _load_matrix(db: Session, profile_id: int, start: date, end: date, metrics: list[str]):
+    """(n calendar days × len(metrics)) float matrix, NaN where nothing was logged."""
+    import numpy as np
+
+    columns = [getattr(DailySummary, SUMMARY_METRIC_MAP[m]) for m in metrics]
+    rows = (
+        db.query(DailySummary.log_date, *columns)
+        .filter(
+            DailySummary.profile_id == profile_id,
+            DailySummary.log_date >= start,
+            DailySummary.log_date <= end,
+            DailySummary.entry_count > 0,
+        )
+        .all()
+    )
+    matrix = np.full(((end - start).days + 1, len(metrics)), np.nan)
+    if rows:
+        offsets = np.fromiter(((r[0] - start).days for r in rows), dtype=np.intp, count=len(rows))
+        matrix[offsets] = np.array([r[1:] for r in rows], dtype=float)
+    return matrix
+
+
+def _masked_corr(a, b):
+    """
+    Pearson r between every column of `a` and every column of `b` (same row
+    count, NaN = missing), each pair over the rows where both are present.
+    Returns (r, n) as (a cols × b cols) arrays; r is NaN where undefined.
+    """
+    import numpy as np
+
+    ma, mb = np.isfinite(a), np.isfinite(b)
+    fa, fb = ma.astype(float), mb.astype(float)
+    a0, b0 = np.where(ma, a, 0.0), np.where(mb, b, 0.0)
+    # Centre first so the sums of squares below don't lose precision on large totals
+    a0 -= fa * (a0.sum(axis=0) / np.maximum(fa.sum(axis=0), 1))
+    b0 -= fb * (b0.sum(axis=0) / np.maximum(fb.sum(axis=0), 1))
+
+    n = fa.T @ fb
+    sa, sb = a0.T @ fb, fa.T @ b0
+    saa, sbb = (a0 ** 2).T @ fb, fa.T @ (b0 ** 2)
+    sab = a0.T @ b0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sab - sa * sb
+        var = (n * saa - sa ** 2) * (n * sbb - sb ** 2)
+        r = cov / np.sqrt(var)
+    r[(n < MIN_DAYS) | ~(var > 1e-12)] = np.nan
+    return np.clip(r, -1.0, 1.0), n.astype(int)
+
+
+def _ranks(matrix):
+    """Column-wise average ranks (ties share their mean rank), NaN stays NaN."""
+    import numpy as np
+
+    ranked = np.full_like(matrix, np.nan)
+    for j in range(matrix.shape[1]):
+        col = matrix[:, j]
+        present = np.isfinite(col)
+        if not present.any():
+            continue
+        _, inverse, counts = np.unique(col[present], return_inverse=True, return_counts=True)
+        upper = np.cumsum(counts)
+        ranked[present, j] = (upper - (counts - 1) / 2.0)[inverse]
+    return ranked
+
+
+def _threshold_means(x, y, thresholds):
+    """
+    For every (A, B): mean of y[:, B] on rows where x[:, A] >= thresholds[A],
+    and on rows where it is below. Returns (above, below, n_above, n_below).
+    """
+    import numpy as np
+
+    present_x = np.isfinite(x)
+    with np.errstate(invalid="ignore"):
+        high = (present_x & (x >= thresholds)).astype(float)
+    low = (present_x & ~(x >= thresholds)).astype(float)
+    present_y = np.isfinite(y)
+    y0 = np.where(present_y, y, 0.0)
+    fy = present_y.astype(float)
+
+    n_above, n_below = high.T @ fy, low.T @ fy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        above = (high.T @ y0) / n_above
+        below = (low.T @ y0) / n_below
+    return above, below, n_above.astype(int), n_below.astype(int)
+
+
+def _matrix(values, digits: int = 3) -> list[list]:
+    import numpy as np
+
+    return [[None if not np.isfinite(v) else round(float(v), digits) for v in row] for row in values]
+
+
+def _compute(
+    db: Session,
+    profile_id: int,
+    start: date,
+    end: date,
+    metrics: list[str],
+    max_lag: int,
+    thresholds: dict[str, float],
+    threshold_lag: int,
+    top: int,
+) -> dict:
+    import numpy as np
+
+    data = _load_matrix(db, profile_id, start, end, metrics)
+    days_logged = int(np.isfinite(data).any(axis=1).sum())
+
+    pearson, n = _masked_corr(data, data)
+    spearman, _ = _masked_corr(_ranks(data), _ranks(data))
+
+    lagged = []
+    for k in range(1, max_lag + 1):
+        if k >= len(data):
+            break
+        r, n_lag = _masked_corr(data[:-k], data[k:])
+        lagged.append({"lag": k, "pearson": _matrix(r), "n": n_lag.tolist()})
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns → NaN cutoff
+        default = np.nanquantile(data, DEFAULT_QUANTILE, axis=0)
+    cutoffs = np.array([thresholds.get(m, default[i]) for i, m in enumerate(metrics)], dtype=float)
+    if threshold_lag:
+        above, below, n_above, n_below = _threshold_means(data[:-threshold_lag], data[threshold_lag:], cutoffs)
+    else:
+        above, below, n_above, n_below = _threshold_means(data, data, cutoffs)
+
+    # Strongest relationships across same-day and lagged correlations
+    candidates = []
+    for i, a in enumerate(metrics):
+        for j in range(i + 1, len(metrics)):
+            if np.isfinite(pearson[i, j]):
+                candidates.append((abs(pearson[i, j]), a, metrics[j], 0, pearson[i, j], n[i, j]))
+    for entry in lagged:
+        for i, a in enumerate(metrics):
+            for j, b in enumerate(metrics):
+                r = entry["pearson"][i][j]
+                if r is not None:
+                    candidates.append((abs(r), a, b, entry["lag"], r, entry["n"][i][j]))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+
+    return {
+        "start": str(start),
+        "end": str(end),
+        "metrics": metrics,
+        "days_logged": days_logged,
+        "pearson": _matrix(pearson),
+        "spearman": _matrix(spearman),
+        "n": n.tolist(),
+        "lagged": lagged,
+        "threshold": {
+            "lag": threshold_lag,
+            "thresholds": {m: (round(float(c), 2) if np.isfinite(c) else None) for m, c in zip(metrics, cutoffs)},
+            "mean_above": _matrix(above, 1),
+            "mean_below": _matrix(below, 1),
+            "n_above": n_above.tolist(),
+            "n_below": n_below.tolist(),
+        },
+        "strongest": [
+            {"a": a, "b": b, "lag": lag, "r": round(float(r), 3), "n": int(count)}
+            for _, a, b, lag, r, count in candidates[:top]
+        ],
+    }
+
+
+class _ResultCache:
+    """Small LRU of computed results; stale versions simply stop being hit."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            return None
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+CACHE = _ResultCache(CACHE_SIZE)
+
+
+def get_correlations(
+    db: Session,
+    profile_id: int,
+    start: date,
+    end: date,
+    metrics: list[str] | None = None,
+    max_lag: int = 7,
+    thresholds: dict[str, float] | None = None,
+    threshold_lag: int = 1,
+    top: int = 10,
+) -> dict:
+    """
+    Same-day, lagged and threshold-conditional relationships between every
+    pair of daily metrics. Matrices are indexed [a][b] in `metrics` order;
+    lagged[k][a][b] relates a on day t to b on day t+k.
+    """
+    valid = [m for m in (metrics or SUMMARY_METRIC_MAP) if m in SUMMARY_METRIC_MAP]
+    max_lag = max(0, min(max_lag, MAX_LAG))
+    threshold_lag = max(0, min(threshold_lag, MAX_LAG))
+    thresholds = {m: v for m, v in (thresholds or {}).items() if m in valid}
+
+    key = (
+        profile_id, start, end, tuple(valid), max_lag,
+        tuple(sorted(thresholds.items())), threshold_lag, top,
+        get_data_version(db, profile_id),
+    )
+    cached = CACHE.get(key)
+    if cached is not None:
+        return cached
+    result = _compute(db, profile_id, start, end, valid, max_lag, thresholds, threshold_lag, top)
+    CACHE.put(key, result)
+    return result
@@ -0,0 +1,121 @@
+"""
+Food statistics — per-profile, per-food monthly buckets, maintained by delta.
+
+food_stats holds one row per (profile, food, month) with the entry count and
+the calorie/protein sums and non-NULL counts. ingest_csv adds each import's
+entries with one upsert (add_entries); archiving leaves the buckets alone, since
+they live in the main database like daily_summaries. A profile's rows are
+deleted with it.
+
+get_favorite_foods reads the buckets for the whole months inside a range and
+only scans entries for the partial months at either end (full_months), so an
+"All" range reads a few rows per food per month, not every entry. Averages are
+sum / count over non-NULL values — exactly what AVG() over the entries returns.
+None of these functions commit.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Iterable
+
+from sqlalchemy import Table, create_engine, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from src.db import archive
+from src.models.consumption import ConsumptionEntry, FoodStats
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def full_months(start: date, end: date) -> tuple[date, date] | None:
+    """First days of the first and last calendar months wholly inside [start, end], or None."""
+    first = start if start.day == 1 else _next_month(start)
+    last = month_start(end)
+    if end != _next_month(end) - timedelta(days=1):   # end isn't a month's last day
+        last = month_start(last - timedelta(days=1))
+    return (first, last) if first <= last else None
+
+
+# ── Maintenance ───────────────────────────────────────────────────────────────
+
+def _upsert():
+    """INSERT that adds to an existing bucket instead of replacing it."""
+    stmt = sqlite_insert(FoodStats)
+    return stmt.on_conflict_do_update(
+        index_elements=["profile_id", "month", "food_id"],
+        set_={
+            column: getattr(FoodStats, column) + getattr(stmt.excluded, column)
+            for column in ("entry_count", "calories_sum", "calories_n", "protein_sum", "protein_n")
+        },
+    )
+
+
+def add_entries(db: Session, profile_id: int, entries: Iterable[ConsumptionEntry]) -> None:
+    """Add newly inserted entries (food_id set) to their monthly buckets."""
+    buckets: dict[tuple[int, date], list] = defaultdict(lambda: [0, 0.0, 0, 0.0, 0])
+    for e in entries:
+        bucket = buckets[(e.food_id, month_start(e.log_date))]
+        bucket[0] += 1
+        if e.calories is not None:
+            bucket[1] += e.calories
+            bucket[2] += 1
+        if e.protein_g is not None:
+            bucket[3] += e.protein_g
+            bucket[4] += 1
+    if not buckets:
+        return
+    db.execute(_upsert(), [
+        {
+            "profile_id": profile_id, "food_id": food_id, "month": month,
+            "entry_count": n, "calories_sum": cal, "calories_n": cal_n,
+            "protein_sum": prot, "protein_n": prot_n,
+        }
+        for (food_id, month), (n, cal, cal_n, prot, prot_n) in buckets.items()
+    ])
+
+
+def _bucket_select(entries: Table):
+    """Monthly bucket rows aggregated straight from an entries table."""
+    month = func.date(entries.c.log_date, "start of month")
+    return (
+        select(
+            entries.c.profile_id, entries.c.food_id, month.label("month"),
+            func.count().label("entry_count"),
+            func.coalesce(func.sum(entries.c.calories), 0).label("calories_sum"),
+            func.count(entries.c.calories).label("calories_n"),
+            func.coalesce(func.sum(entries.c.protein_g), 0).label("protein_sum"),
+            func.count(entries.c.protein_g).label("protein_n"),
+        )
+        .where(entries.c.food_id.isnot(None))
+        .group_by(entries.c.profile_id, entries.c.food_id, month)
+    )
+
+
+def backfill(conn: Connection) -> None:
+    """Fill food_stats from every entry, main database and archives. For the schema migration."""
+    entries = ConsumptionEntry.__table__
+    select_all = _bucket_select(entries)
+    conn.execute(insert(FoodStats).from_select(list(select_all.selected_columns.keys()), select_all))
+
+    # Archives can't be ATTACHed inside the migration's transaction: read each
+    # file on its own connection and add its buckets (a month can straddle the
+    # archive cutoff, hence the upsert)
+    for year in archive.archive_years():
+        reader = create_engine(f"sqlite:///{archive.archive_path(year).resolve().as_uri()}?mode=ro&uri=true")
+        try:
+            with reader.connect() as archived:
+                rows = [
+                    {**r._asdict(), "month": date.fromisoformat(r.month)}
+                    for r in archived.execute(_bucket_select(entries))
+                ]
+        finally:
+            reader.dispose()
+        if rows:
+            conn.execute(_upsert(), rows)
@@ -1,14 +1,20 @@
 """
 Analytics query layer — pure functions, Session in → dicts out.
 No FastAPI dependency. All functions are independently testable.
+
+Entry-level queries read through src.db.archive.entry_source, which only
+brings the per-year archive databases in when the requested range reaches
+them; summary-level queries never need the archives.
 """
 from datetime import date, timedelta
 from typing import Optional
 
-from sqlalchemy import func
+from sqlalchemy import case, func, or_, select, union_all
 from sqlalchemy.orm import Session
 
-from src.models.consumption import ConsumptionEntry, DailySummary, ProfileGoals
+from src.analytics.food_stats import full_months
+from src.db.archive import archive_years, entry_source
+from src.models.consumption import ConsumptionEntry, DailySummary, Food, FoodStats, ProfileGoals
 
 METRIC_FIELDS = [
     "calories", "protein_g", "carbs_g", "fat_g", "saturates_g",
@@ -54,8 +60,11 @@ def get_trend_data(
     Missing dates get None. Used by the chart on the Trends page.
     """
     valid_metrics = [m for m in metrics if m in SUMMARY_METRIC_MAP]
-    summaries = (
-        db.query(DailySummary)
+    rows = (
+        db.query(
+            DailySummary.log_date,
+            *(getattr(DailySummary, SUMMARY_METRIC_MAP[m]) for m in valid_metrics),
+        )
         .filter(
             DailySummary.profile_id == profile_id,
             DailySummary.log_date >= start,
@@ -63,15 +72,14 @@ def get_trend_data(
         )
         .all()
     )
-    by_date = {s.log_date: s for s in summaries}
     all_dates = _date_range(start, end)
 
-    series = {m: [] for m in valid_metrics}
-    for d in all_dates:
-        s = by_date.get(d)
-        for m in valid_metrics:
-            db_field = SUMMARY_METRIC_MAP[m]
-            series[m].append(getattr(s, db_field, None) if s else None)
+    # Fill fixed-position arrays by day offset rather than per-day attribute lookups
+    series = {m: [None] * len(all_dates) for m in valid_metrics}
+    for log_date, *values in rows:
+        i = (log_date - start).days
+        for m, v in zip(valid_metrics, values):
+            series[m][i] = v
 
     return {
         "dates": [str(d) for d in all_dates],
@@ -79,6 +87,78 @@ def get_trend_data(
     }
 
 
+def _month_bounds(year: int, month: int) -> tuple[date, date]:
+    first = date(year, month, 1)
+    return first, (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def get_calendar_version(db: Session, profile_id: int, year: int, month: int) -> str:
+    """
+    Validator for a month's calendar: changes whenever one of its daily
+    summaries is rebuilt, added or removed (each rebuild stamps updated_at).
+    """
+    first, last = _month_bounds(year, month)
+    count, updated = (
+        db.query(func.count(DailySummary.id), func.max(DailySummary.updated_at))
+        .filter(
+            DailySummary.profile_id == profile_id,
+            DailySummary.log_date >= first,
+            DailySummary.log_date <= last,
+        )
+        .one()
+    )
+    return f"{count}-{updated:%Y%m%d%H%M%S%f}" if updated else "0"
+
+
+def get_calendar_month(
+    db: Session,
+    profile_id: int,
+    year: int,
+    month: int,
+    metrics: list[str],
+) -> dict:
+    """
+    One month as fixed-position arrays: index i is day i+1 of the month, None
+    where nothing was logged. With the default calories metric the read is
+    served entirely from the ix_summaries_calendar covering index.
+    """
+    valid_metrics = [m for m in metrics if m in SUMMARY_METRIC_MAP]
+    first, last = _month_bounds(year, month)
+    days = last.day
+
+    rows = (
+        db.query(
+            DailySummary.log_date,
+            DailySummary.entry_count,
+            *(getattr(DailySummary, SUMMARY_METRIC_MAP[m]) for m in valid_metrics),
+        )
+        .filter(
+            DailySummary.profile_id == profile_id,
+            DailySummary.log_date >= first,
+            DailySummary.log_date <= last,
+        )
+        .all()
+    )
+
+    series = {m: [None] * days for m in valid_metrics}
+    entry_count = [0] * days
+    for log_date, count, *values in rows:
+        if not count:
+            continue
+        i = log_date.day - 1
+        entry_count[i] = count
+        for m, v in zip(valid_metrics, values):
+            series[m][i] = v
+
+    return {
+        "month": f"{year:04d}-{month:02d}",
+        "start": str(first),
+        "days": days,
+        "series": series,
+        "entry_count": entry_count,
+    }
+
+
 def get_rolling_averages(
     db: Session,
     profile_id: int,
@@ -117,6 +197,47 @@ def get_rolling_averages(
     }
 
 
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def get_heatmap(
+    db: Session,
+    profile_id: int,
+    start: date,
+    end: date,
+    metric: str = "calories",
+) -> dict:
+    """
+    Eating by weekday × hour of day: 7×24 arrays (row 0 = Monday, column =
+    hour) of entry counts and `metric` sums, None where nothing was logged.
+    One GROUP BY over the stored weekday/hour columns, so no strftime() runs
+    per entry at read time.
+    """
+    E = entry_source(db, start, end)
+    value = getattr(E, metric)
+    rows = (
+        db.query(E.weekday, E.hour, func.count(E.id), func.sum(value))
+        .filter(
+            E.profile_id == profile_id,
+            E.log_date >= start,
+            E.log_date <= end,
+        )
+        .group_by(E.weekday, E.hour)
+        .all()
+    )
+    counts = [[0] * 24 for _ in WEEKDAYS]
+    sums = [[None] * 24 for _ in WEEKDAYS]
+    for weekday, hour, count, total in rows:
+        counts[weekday][hour] = count
+        sums[weekday][hour] = round(total, 1) if total is not None else None
+    return {
+        "metric": metric,
+        "weekdays": WEEKDAYS,
+        "count": counts,
+        "sum": sums,
+    }
+
+
 def get_favorite_foods(
     db: Session,
     profile_id: int,
@@ -124,22 +245,61 @@ def get_favorite_foods(
     end: date,
     limit: int = 20,
 ) -> list[dict]:
-    """Most frequently logged foods in the date range, with avg calories and protein."""
-    rows = (
-        db.query(
-            func.lower(ConsumptionEntry.item_name).label("food"),
-            func.count(ConsumptionEntry.id).label("count"),
-            func.avg(ConsumptionEntry.calories).label("avg_calories"),
-            func.avg(ConsumptionEntry.protein_g).label("avg_protein_g"),
+    """
+    Most frequently logged foods in the date range, with avg calories and protein.
+    Whole months come from the food_stats buckets; only the partial months at
+    either end of the range read entries (see src/analytics/food_stats.py).
+    """
+    parts = []
+    edges = [(start, end)]
+    months = full_months(start, end)
+    if months:
+        first, last = months
+        parts.append(
+            select(
+                FoodStats.food_id, FoodStats.entry_count, FoodStats.calories_sum,
+                FoodStats.calories_n, FoodStats.protein_sum, FoodStats.protein_n,
+            )
+            .where(FoodStats.profile_id == profile_id, FoodStats.month >= first, FoodStats.month <= last)
         )
-        .filter(
-            ConsumptionEntry.profile_id == profile_id,
-            ConsumptionEntry.log_date >= start,
-            ConsumptionEntry.log_date <= end,
+        after_last = (last + timedelta(days=32)).replace(day=1)
+        edges = [(start, first - timedelta(days=1)), (after_last, end)]
+    for lo, hi in edges:
+        if lo > hi:
+            continue
+        E = entry_source(db, lo, hi)
+        parts.append(
+            select(
+                E.food_id,
+                func.count(E.id).label("entry_count"),
+                func.sum(E.calories).label("calories_sum"),
+                func.count(E.calories).label("calories_n"),
+                func.sum(E.protein_g).label("protein_sum"),
+                func.count(E.protein_g).label("protein_n"),
+            )
+            .where(E.profile_id == profile_id, E.log_date >= lo, E.log_date <= hi)
+            .group_by(E.food_id)
+        )
+
+    # Aggregate on the integer food_id; only the top `limit` rows join to Food for names
+    u = union_all(*parts).subquery()
+    count = func.sum(u.c.entry_count)
+    top = (
+        select(
+            u.c.food_id,
+            count.label("count"),
+            (func.sum(u.c.calories_sum) / func.sum(u.c.calories_n)).label("avg_calories"),
+            (func.sum(u.c.protein_sum) / func.sum(u.c.protein_n)).label("avg_protein_g"),
         )
-        .group_by(func.lower(ConsumptionEntry.item_name))
-        .order_by(func.count(ConsumptionEntry.id).desc())
+        .group_by(u.c.food_id)
+        .order_by(count.desc(), u.c.food_id)
         .limit(limit)
+        .subquery()
+    )
+    rows = (
+        db.query(Food.name.label("food"), top.c.count, top.c.avg_calories, top.c.avg_protein_g)
+        .join(top, Food.id == top.c.food_id)
+        .order_by(top.c.count.desc(), Food.name)
         .all()
     )
     return [
@@ -160,58 +320,199 @@ def get_meal_pattern_breakdown(
     end: date,
 ) -> list[dict]:
     """Per meal_context: avg calories, entry count, top 3 foods."""
+    E = entry_source(db, start, end)
     meal_rows = (
         db.query(
-            ConsumptionEntry.meal_context,
-            func.count(ConsumptionEntry.id).label("entry_count"),
-            func.avg(ConsumptionEntry.calories).label("avg_calories"),
+            E.meal_context,
+            func.count(E.id).label("entry_count"),
+            func.avg(E.calories).label("avg_calories"),
         )
         .filter(
-            ConsumptionEntry.profile_id == profile_id,
-            ConsumptionEntry.log_date >= start,
-            ConsumptionEntry.log_date <= end,
+            E.profile_id == profile_id,
+            E.log_date >= start,
+            E.log_date <= end,
         )
-        .group_by(ConsumptionEntry.meal_context)
-        .order_by(func.avg(ConsumptionEntry.calories).desc())
+        .group_by(E.meal_context)
+        .order_by(func.avg(E.calories).desc())
         .all()
     )
 
-    result = []
-    for row in meal_rows:
-        top_foods_rows = (
-            db.query(
-                func.lower(ConsumptionEntry.item_name).label("food"),
-                func.count(ConsumptionEntry.id).label("cnt"),
-            )
-            .filter(
-                ConsumptionEntry.profile_id == profile_id,
-                ConsumptionEntry.log_date >= start,
-                ConsumptionEntry.log_date <= end,
-                ConsumptionEntry.meal_context == row.meal_context,
-            )
-            .group_by(func.lower(ConsumptionEntry.item_name))
-            .order_by(func.count(ConsumptionEntry.id).desc())
-            .limit(3)
-            .all()
+    # Top foods for every meal in one grouped pass instead of one query per meal
+    food_rows = (
+        db.query(
+            E.meal_context,
+            Food.name.label("food"),
+            func.count(E.id).label("cnt"),
         )
-        result.append({
+        .join(Food, Food.id == E.food_id)
+        .filter(
+            E.profile_id == profile_id,
+            E.log_date >= start,
+            E.log_date <= end,
+        )
+        .group_by(E.meal_context, E.food_id)
+        .order_by(func.count(E.id).desc(), Food.name)
+        .all()
+    )
+    top_foods: dict[str | None, list[str]] = {}
+    for r in food_rows:
+        foods = top_foods.setdefault(r.meal_context, [])
+        if len(foods) < 3:
+            foods.append(r.food)
+
+    return [
+        {
             "meal": row.meal_context,
             "entry_count": row.entry_count,
             "avg_calories": round(row.avg_calories, 1) if row.avg_calories else None,
-            "top_foods": [r.food for r in top_foods_rows],
-        })
-    return result
+            "top_foods": top_foods.get(row.meal_context, []),
+        }
+        for row in meal_rows
+    ]
 
 
-def get_recent_entries(db: Session, profile_id: int, limit: int = 20) -> list[dict]:
-    """Most recent N entries, descending."""
-    entries = (
-        db.query(ConsumptionEntry)
-        .filter(ConsumptionEntry.profile_id == profile_id)
-        .order_by(ConsumptionEntry.logged_at.desc())
-        .limit(limit)
+def get_trends_bundle(
+    db: Session,
+    profile_id: int,
+    start: date,
+    end: date,
+    metrics: list[str],
+    favorites_limit: int = 10,
+) -> dict:
+    """
+    Everything the Trends page shows for one range, from one read of
+    daily_summaries and one grouped pass over entries:
+
+      trends         as get_trend_data
+      averages       as get_rolling_averages (same metrics)
+      favorites      as get_favorite_foods(limit=favorites_limit)
+      meal_patterns  as get_meal_pattern_breakdown
+
+    The entry pass groups by (meal_context, food_id) with counts and sums;
+    meal patterns and favorites are both folded from those groups. Meal
+    patterns need the entry scan anyway, so favorites come free here rather
+    than from the food_stats buckets.
+    """
+    valid_metrics = [m for m in metrics if m in SUMMARY_METRIC_MAP]
+    rows = (
+        db.query(
+            DailySummary.log_date,
+            DailySummary.entry_count,
+            *(getattr(DailySummary, SUMMARY_METRIC_MAP[m]) for m in valid_metrics),
+        )
+        .filter(
+            DailySummary.profile_id == profile_id,
+            DailySummary.log_date >= start,
+            DailySummary.log_date <= end,
+        )
         .all()
     )
+    all_dates = _date_range(start, end)
+    series = {m: [None] * len(all_dates) for m in valid_metrics}
+    logged = {m: [] for m in valid_metrics}
+    days_logged = 0
+    for log_date, entry_count, *values in rows:
+        i = (log_date - start).days
+        for m, v in zip(valid_metrics, values):
+            series[m][i] = v
+        if entry_count and entry_count > 0:
+            days_logged += 1
+            for m, v in zip(valid_metrics, values):
+                if v is not None:
+                    logged[m].append(v)
+
+    E = entry_source(db, start, end)
+    groups = (
+        db.query(
+            E.meal_context,
+            E.food_id,
+            Food.name,
+            func.count(E.id),
+            func.sum(E.calories),
+            func.count(E.calories),
+            func.sum(E.protein_g),
+            func.count(E.protein_g),
+        )
+        .outerjoin(Food, Food.id == E.food_id)
+        .filter(
+            E.profile_id == profile_id,
+            E.log_date >= start,
+            E.log_date <= end,
+        )
+        .group_by(E.meal_context, E.food_id)
+        .all()
+    )
+
+    # [count, calories sum, calories n] per meal; [name, count, cal sum, cal n, protein sum, protein n] per food
+    meals: dict[str | None, list] = {}
+    meal_foods: dict[str | None, list[tuple[int, str]]] = {}
+    foods: dict[int, list] = {}
+    for meal, food_id, name, n, cal, cal_n, prot, prot_n in groups:
+        totals = meals.setdefault(meal, [0, 0.0, 0])
+        totals[0] += n
+        totals[1] += cal or 0
+        totals[2] += cal_n
+        if food_id is None or name is None:
+            continue
+        meal_foods.setdefault(meal, []).append((n, name))
+        food = foods.setdefault(food_id, [name, 0, 0.0, 0, 0.0, 0])
+        food[1] += n
+        food[2] += cal or 0
+        food[3] += cal_n
+        food[4] += prot or 0
+        food[5] += prot_n
+
+    def _avg(total: float, n: int) -> float | None:
+        value = total / n if n else None
+        return round(value, 1) if value else None
+
+    # Same ordering as the separate queries: meals by average calories (NULL
+    # last), favorites picked by (count, food_id) then listed by (count, name)
+    meal_avg = {meal: cal / cal_n if cal_n else None for meal, (_, cal, cal_n) in meals.items()}
+    meal_order = sorted(meals, key=lambda meal: (meal_avg[meal] is None, -(meal_avg[meal] or 0)))
+    top = [foods[food_id] for food_id in sorted(foods, key=lambda food_id: (-foods[food_id][1], food_id))]
+    top = sorted(top[:favorites_limit], key=lambda f: (-f[1], f[0]))
+
+    return {
+        "trends": {"dates": [str(d) for d in all_dates], "series": series},
+        "averages": {
+            "averages": {m: round(sum(v) / len(v), 1) if v else None for m, v in logged.items()},
+            "days_logged": days_logged,
+            "total_days": (end - start).days + 1,
+        },
+        "favorites": [
+            {
+                "food": name,
+                "count": n,
+                "avg_calories": _avg(cal, cal_n),
+                "avg_protein_g": _avg(prot, prot_n),
+            }
+            for name, n, cal, cal_n, prot, prot_n in top
+        ],
+        "meal_patterns": [
+            {
+                "meal": meal,
+                "entry_count": meals[meal][0],
+                "avg_calories": _avg(meals[meal][1], meals[meal][2]),
+                "top_foods": [name for _, name in sorted(meal_foods.get(meal, []), key=lambda f: (-f[0], f[1]))[:3]],
+            }
+            for meal in meal_order
+        ],
+    }
+
+
+def get_recent_entries(db: Session, profile_id: int, limit: int = 20) -> list[dict]:
+    """Most recent N entries, descending."""
+    def latest(E):
+        return db.query(E).filter(E.profile_id == profile_id).order_by(E.logged_at.desc()).limit(limit).all()
+
+    entries = latest(ConsumptionEntry)
+    # Only a profile with little recent logging reaches back into the archives,
+    # a year at a time until the page is full
+    for year in reversed(archive_years()):
+        if len(entries) >= limit:
+            break
+        entries = latest(entry_source(db, date(year, 1, 1)))
     return [
         {
             "id": e.id,
@@ -230,90 +531,177 @@ def get_recent_entries(db: Session, profile_id: int, limit: int = 20) -> list[di
     ]
 
 
+OVERVIEW_METRICS = ["calories", "protein_g", "carbs_g", "fat_g", "fiber_g",
+                    "sodium_mg", "water_ml", "caffeine_mg"]
+
+
+def _trend_direction(cur: float | None, prv: float | None) -> dict:
+    if cur is not None and prv is not None and prv > 0:
+        pct = round(((cur - prv) / prv) * 100, 1)
+        return {"direction": "up" if pct > 0 else ("down" if pct < 0 else "flat"), "pct": abs(pct)}
+    return {"direction": "flat", "pct": 0}
+
+
 def get_overview_data(db: Session, profile_id: int, today: date) -> dict:
     """
     30-day 'state of you' summary. Compares last 30 days to the prior 30.
     Returns averages, goals, streak, logging consistency, and highlight stats.
     """
+    return get_overview_batch(db, [profile_id], today)[profile_id]
+
+
+def get_overview_batch(db: Session, profile_ids: list[int], today: date) -> dict[int, dict]:
+    """
+    get_overview_data for many profiles at once, keyed by profile id.
+    Every statement is grouped or windowed by profile_id, so the cost is five
+    queries whatever the number of profiles.
+    """
+    ids = list(dict.fromkeys(profile_ids))
+    if not ids:
+        return {}
+
     end = today
     start = today - timedelta(days=29)
     prev_end = today - timedelta(days=30)
     prev_start = today - timedelta(days=59)
+    total_days = (end - start).days + 1
 
-    core_metrics = ["calories", "protein_g", "carbs_g", "fat_g", "fiber_g",
-                    "sodium_mg", "water_ml", "caffeine_mg"]
-
-    current = get_rolling_averages(db, profile_id, start, end, core_metrics)
-    previous = get_rolling_averages(db, profile_id, prev_start, prev_end, core_metrics)
-
-    goals = db.query(ProfileGoals).filter_by(profile_id=profile_id).first()
-    goals_dict = None
-    if goals:
-        goals_dict = {
-            "calories": goals.calories,
-            "protein_g": goals.protein_g,
-            "carbs_g": goals.carbs_g,
-            "fat_g": goals.fat_g,
-            "fiber_g": goals.fiber_g,
-            "water_ml": goals.water_ml,
-            "caffeine_mg": goals.caffeine_mg,
-        }
-
-    # Trend direction per metric vs prior period
-    trends = {}
-    for m in core_metrics:
-        cur = current["averages"].get(m)
-        prv = previous["averages"].get(m)
-        if cur is not None and prv is not None and prv > 0:
-            pct = round(((cur - prv) / prv) * 100, 1)
-            trends[m] = {"direction": "up" if pct > 0 else ("down" if pct < 0 else "flat"), "pct": abs(pct)}
-        else:
-            trends[m] = {"direction": "flat", "pct": 0}
-
-    # Logging streak — consecutive days ending today with entry_count > 0
-    streak = 0
-    check = today
-    while True:
-        s = db.query(DailySummary).filter_by(profile_id=profile_id, log_date=check).first()
-        if s and s.entry_count > 0:
-            streak += 1
-            check -= timedelta(days=1)
-        else:
-            break
-
-    # Highlight: highest sodium day and lowest calorie day in range
-    summaries_in_range = (
-        db.query(DailySummary)
+    # 1. Averages per logged day for the current and prior 30-day windows
+    period = case((DailySummary.log_date >= start, "current"), else_="previous").label("period")
+    avg_rows = (
+        db.query(
+            DailySummary.profile_id,
+            period,
+            func.count(DailySummary.id).label("days_logged"),
+            *(func.avg(getattr(DailySummary, SUMMARY_METRIC_MAP[m])).label(m) for m in OVERVIEW_METRICS),
+        )
         .filter(
-            DailySummary.profile_id == profile_id,
-            DailySummary.log_date >= start,
+            DailySummary.profile_id.in_(ids),
+            DailySummary.log_date >= prev_start,
             DailySummary.log_date <= end,
             DailySummary.entry_count > 0,
         )
+        .group_by(DailySummary.profile_id, period)
+        .all()
+    )
+    averages = {(r.profile_id, r.period): r for r in avg_rows}
+
+    # 2. Goals
+    goals = {g.profile_id: g for g in db.query(ProfileGoals).filter(ProfileGoals.profile_id.in_(ids))}
+
+    # 3. Logging streak — consecutive logged days ending today. Numbering logged days
+    #    newest-first, day k of an unbroken streak is exactly k-1 days before today.
+    logged = (
+        select(
+            DailySummary.profile_id,
+            DailySummary.log_date,
+            func.row_number().over(
+                partition_by=DailySummary.profile_id, order_by=DailySummary.log_date.desc()
+            ).label("rn"),
+        )
+        .where(
+            DailySummary.profile_id.in_(ids),
+            DailySummary.log_date <= today,
+            DailySummary.entry_count > 0,
+        )
+        .subquery()
+    )
+    streaks = dict(
+        db.query(logged.c.profile_id, func.count())
+        .filter(func.julianday(str(today)) - func.julianday(logged.c.log_date) == logged.c.rn - 1)
+        .group_by(logged.c.profile_id)
         .all()
     )
 
-    highest_sodium = max(summaries_in_range, key=lambda s: s.total_sodium_mg or 0, default=None)
-    lowest_cal = min(summaries_in_range, key=lambda s: s.total_calories or float("inf"), default=None)
-
-    # Most logged food in range
-    top_food = get_favorite_foods(db, profile_id, start, end, limit=1)
+    # 4. Highlights: highest sodium day and lowest calorie day in range
+    #    (a day without calories never counts as the lowest)
+    ranked = (
+        select(
+            DailySummary.profile_id,
+            DailySummary.log_date,
+            DailySummary.total_sodium_mg,
+            DailySummary.total_calories,
+            func.row_number().over(
+                partition_by=DailySummary.profile_id,
+                order_by=(func.coalesce(DailySummary.total_sodium_mg, 0).desc(), DailySummary.log_date),
+            ).label("sodium_rank"),
+            func.row_number().over(
+                partition_by=DailySummary.profile_id,
+                order_by=(
+                    or_(DailySummary.total_calories.is_(None), DailySummary.total_calories == 0),
+                    DailySummary.total_calories,
+                    DailySummary.log_date,
+                ),
+            ).label("calorie_rank"),
+        )
+        .where(
+            DailySummary.profile_id.in_(ids),
+            DailySummary.log_date >= start,
+            DailySummary.log_date <= end,
+            DailySummary.entry_count > 0,
+        )
+        .subquery()
+    )
+    highest_sodium, lowest_cal = {}, {}
+    for r in db.query(ranked).filter(or_(ranked.c.sodium_rank == 1, ranked.c.calorie_rank == 1)):
+        if r.sodium_rank == 1:
+            highest_sodium[r.profile_id] = {"date": str(r.log_date), "sodium_mg": r.total_sodium_mg}
+        if r.calorie_rank == 1:
+            lowest_cal[r.profile_id] = {"date": str(r.log_date), "calories": r.total_calories}
+
+    # 5. Most logged food in range
+    E = entry_source(db, start, end)
+    food_counts = (
+        select(
+            E.profile_id,
+            E.food_id,
+            func.row_number().over(
+                partition_by=E.profile_id,
+                order_by=(func.count(E.id).desc(), E.food_id),
+            ).label("rn"),
+        )
+        .where(
+            E.profile_id.in_(ids),
+            E.log_date >= start,
+            E.log_date <= end,
+        )
+        .group_by(E.profile_id, E.food_id)
+        .subquery()
+    )
+    top_foods = dict(
+        db.query(food_counts.c.profile_id, Food.name)
+        .join(Food, Food.id == food_counts.c.food_id)
+        .filter(food_counts.c.rn == 1)
+        .all()
+    )
 
-    return {
-        "period": {"start": str(start), "end": str(end)},
-        "averages": current["averages"],
-        "trends": trends,
-        "goals": goals_dict,
-        "days_logged": current["days_logged"],
-        "total_days": current["total_days"],
-        "streak": streak,
-        "most_logged_food": top_food[0]["food"] if top_food else None,
-        "highest_sodium_day": {
-            "date": str(highest_sodium.log_date),
-            "sodium_mg": highest_sodium.total_sodium_mg,
-        } if highest_sodium else None,
-        "lowest_calorie_day": {
-            "date": str(lowest_cal.log_date),
-            "calories": lowest_cal.total_calories,
-        } if lowest_cal else None,
-    }
+    result = {}
+    for pid in ids:
+        cur = averages.get((pid, "current"))
+        prv = averages.get((pid, "previous"))
+        cur_avgs = {m: (round(getattr(cur, m), 1) if cur and getattr(cur, m) is not None else None)
+                    for m in OVERVIEW_METRICS}
+        prv_avgs = {m: (round(getattr(prv, m), 1) if prv and getattr(prv, m) is not None else None)
+                    for m in OVERVIEW_METRICS}
+        g = goals.get(pid)
+        result[pid] = {
+            "period": {"start": str(start), "end": str(end)},
+            "averages": cur_avgs,
+            "trends": {m: _trend_direction(cur_avgs[m], prv_avgs[m]) for m in OVERVIEW_METRICS},
+            "goals": {
+                "calories": g.calories,
+                "protein_g": g.protein_g,
+                "carbs_g": g.carbs_g,
+                "fat_g": g.fat_g,
+                "fiber_g": g.fiber_g,
+                "water_ml": g.water_ml,
+                "caffeine_mg": g.caffeine_mg,
+            } if g else None,
+            "days_logged": cur.days_logged if cur else 0,
+            "total_days": total_days,
+            "streak": streaks.get(pid, 0),
+            "most_logged_food": top_foods.get(pid),
+            "highest_sodium_day": highest_sodium.get(pid),
+            "lowest_calorie_day": lowest_cal.get(pid),
+        }
+    return result
@@ -0,0 +1,199 @@
+"""
+Full-text search over a profile's history — Session in → dicts out.
+
+Backed by the FTS5 index in src/db/fts.py. Every query term is matched as a
+prefix ("pho" finds "pho", "phở", "photo"), results are ranked by bm25 with
+item_name weighted above brand and notes, and pages are addressed by an
+opaque keyset cursor so deep pages cost the same as the first one.
+If a query finds nothing, each term is swapped for its closest indexed
+terms (difflib over the FTS vocabulary) and the search runs once more.
+Only vocabulary terms of a length that could reach difflib's cutoff are
+read out of the index, so a typo doesn't ship every indexed term to Python.
+"""
+import base64
+import difflib
+import json
+import math
+import re
+from datetime import date
+
+from sqlalchemy import Date, DateTime, text
+from sqlalchemy.orm import Session
+
+from src.db.fts import FTS_TABLE, VOCAB_TABLE
+
+ORDERS = ("rank", "recent")
+
+# bm25 column weights: item_name, brand, notes
+_RANK = f"bm25({FTS_TABLE}, 10.0, 3.0, 1.0)"
+_TERM = re.compile(r"\w+", re.UNICODE)
+FUZZY_CUTOFF = 0.7
+FUZZY_MATCHES = 3
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _terms(query: str) -> list[str]:
+    return [t.lower() for t in _TERM.findall(query)]
+
+
+def _match_expression(groups: list[list[str]]) -> str:
+    """[[a], [b, c]] → '"a"* AND ("b"* OR "c"*)' — terms are quoted, so no FTS syntax leaks through."""
+    parts = []
+    for group in groups:
+        alternatives = [f'"{t}"*' for t in group]
+        parts.append(alternatives[0] if len(alternatives) == 1 else "(" + " OR ".join(alternatives) + ")")
+    return " AND ".join(parts)
+
+
+def _length_window(length: int, cutoff: float = FUZZY_CUTOFF) -> tuple[int, int]:
+    """
+    Lengths a term can have and still score `cutoff` against one of `length`:
+    difflib's ratio is 2·matches / (len a + len b) and matches ≤ the shorter
+    length, so the lengths may differ by at most that factor either way.
+    """
+    factor = (2 - cutoff) / cutoff
+    return math.ceil(length / factor - 1e-9), math.floor(length * factor + 1e-9)
+
+
+def _fuzzy_groups(db: Session, terms: list[str]) -> list[list[str]] | None:
+    groups = []
+    for term in terms:
+        shortest, longest = _length_window(len(term))
+        candidates = [row[0] for row in db.execute(
+            text(f"SELECT term FROM {VOCAB_TABLE} WHERE length(term) BETWEEN :shortest AND :longest"),
+            {"shortest": shortest, "longest": longest},
+        )]
+        close = difflib.get_close_matches(term, candidates, n=FUZZY_MATCHES, cutoff=FUZZY_CUTOFF)
+        if not close:
+            return None
+        groups.append(close)
+    return groups
+
+
+def _encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(key, list) or len(key) != 3:
+        raise InvalidCursor("Malformed cursor")
+    # [sort key (bm25 score or logged_at text), entry id, fuzzy] — bool is an int, so rule it out
+    sort_key, entry_id, fuzzy = key
+    if (
+        isinstance(sort_key, bool) or not isinstance(sort_key, (int, float, str))
+        or isinstance(entry_id, bool) or not isinstance(entry_id, int)
+        or not isinstance(fuzzy, bool)
+    ):
+        raise InvalidCursor("Malformed cursor")
+    return key
+
+
+def _run(
+    db: Session,
+    profile_id: int,
+    match: str,
+    start: date | None,
+    end: date | None,
+    order: str,
+    after: list | None,
+    limit: int,
+) -> list:
+    filters = [f"{FTS_TABLE} MATCH :match", "e.profile_id = :profile_id"]
+    params: dict = {"match": match, "profile_id": profile_id, "limit": limit + 1}
+    if start:
+        filters.append("e.log_date >= :start")
+        params["start"] = str(start)
+    if end:
+        filters.append("e.log_date <= :end")
+        params["end"] = str(end)
+
+    if order == "recent":
+        sort_key, order_by = "e.logged_at", "e.logged_at DESC, e.id DESC"
+        if after:
+            filters.append("(e.logged_at < :after_key OR (e.logged_at = :after_key AND e.id < :after_id))")
+    else:
+        sort_key, order_by = _RANK, "score, e.id"
+        if after:
+            filters.append(f"({_RANK} > :after_key OR ({_RANK} = :after_key AND e.id > :after_id))")
+    if after:
+        params["after_key"], params["after_id"] = after
+
+    sql = f"""
+        SELECT e.id, e.logged_at, e.log_date, e.meal_context, e.item_name, e.brand, e.notes,
+               e.calories, e.protein_g, {sort_key} AS score
+        FROM {FTS_TABLE}
+        JOIN consumption_entries e ON e.id = {FTS_TABLE}.rowid
+        WHERE {" AND ".join(filters)}
+        ORDER BY {order_by}
+        LIMIT :limit
+    """
+    return db.execute(text(sql).columns(logged_at=DateTime, log_date=Date), params).all()
+
+
+def search_entries(
+    db: Session,
+    profile_id: int,
+    query: str,
+    start: date | None = None,
+    end: date | None = None,
+    order: str = "rank",
+    limit: int = 20,
+    cursor: str | None = None,
+    fuzzy: bool = True,
+) -> dict:
+    """
+    Ranked (or most-recent-first) entries whose item_name, brand or notes match
+    every term of `query` as a prefix. Raises InvalidCursor for a bad cursor.
+    """
+    terms = _terms(query)
+    if not terms:
+        return {"query": query, "match": None, "fuzzy": False, "results": [], "next_cursor": None}
+
+    # Cursor = [sort key, id, fuzzy] — later pages of a fuzzy search stay fuzzy
+    after, use_fuzzy = None, False
+    if cursor:
+        *after, use_fuzzy = _decode_cursor(cursor)
+
+    rows, match = [], None
+    if not use_fuzzy:
+        match = _match_expression([[t] for t in terms])
+        rows = _run(db, profile_id, match, start, end, order, after, limit)
+        use_fuzzy = not rows and fuzzy and after is None
+    if use_fuzzy:
+        groups = _fuzzy_groups(db, terms)
+        if groups:
+            match = _match_expression(groups)
+            rows = _run(db, profile_id, match, start, end, order, after, limit)
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = _encode_cursor([page[-1].score, page[-1].id, use_fuzzy])
+
+    return {
+        "query": query,
+        "match": match,
+        "fuzzy": use_fuzzy and bool(rows),
+        "results": [
+            {
+                "id": r.id,
+                "logged_at": r.logged_at.isoformat(),
+                "log_date": str(r.log_date),
+                "meal_context": r.meal_context,
+                "item_name": r.item_name,
+                "brand": r.brand,
+                "notes": r.notes,
+                "calories": r.calories,
+                "protein_g": r.protein_g,
+            }
+            for r in page
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,192 @@
+"""
+Static asset serving — content-hashed, pre-compressed, cache-friendly.
+
+At startup every file under src/static (except user uploads) is read once
+and hashed; then — when compressible and at least COMPRESS_MIN_SIZE bytes —
+each is compressed ahead of time with gzip and brotli at maximum level, in a
+background thread so startup doesn't wait on it (brotli 11 over the vendored
+scripts takes about a second). Until a variant is ready the asset goes out
+uncompressed and CompressionMiddleware compresses it on the fly. Requests are
+answered from memory:
+
+  /static/...?v=<hash>   Cache-Control: immutable for a year
+  /static/...            Cache-Control: no-cache, revalidated by ETag (304)
+
+index.html is rewritten so every /static/ reference carries its ?v=<hash>,
+and window.ASSET_VERSIONS lets app.js do the same for pages it loads on
+demand. A changed file gets a new hash, so clients never see stale assets.
+Paths not in the manifest (uploads) fall through to the StaticFiles mounts;
+uploaded photos have content-hashed names and are served by
+ImmutableStaticFiles.
+"""
+import hashlib
+import json
+import mimetypes
+import re
+import threading
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+from src.api.compression import COMPRESS_MIN_SIZE, available_encodings, compress, is_compressible, negotiate
+
+STATIC_DIR = Path("src/static")
+URL_PREFIX = "/static/"
+SKIP_DIRS  = {"uploads"}
+
+IMMUTABLE   = "public, max-age=31536000, immutable"
+REVALIDATE  = "no-cache"
+
+_STATIC_REF = re.compile(r'(?P<attr>href|src)="(?P<path>/static/[^"?#]+)"')
+
+
+class Asset:
+    def __init__(self, body: bytes, media_type: str, version: str):
+        self.media_type = media_type
+        self.version = version
+        self.etag = f'"{version}"'
+        self.variants: dict[str | None, bytes] = {None: body}
+
+    def precompress(self, min_size: int) -> None:
+        body = self.variants[None]
+        if len(body) < min_size or not is_compressible(self.media_type):
+            return
+        variants = dict(self.variants)
+        for encoding in available_encodings():
+            data = compress(body, encoding, level=11 if encoding == "br" else 9)
+            if len(data) < len(body):
+                variants[encoding] = data
+        # Swapped in whole: responses may be reading the old dict from another thread
+        self.variants = variants
+
+    def response(self, headers: Headers, cache_control: str, head: bool = False) -> Response:
+        common = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if self.etag in (headers.get("if-none-match") or ""):
+            return Response(status_code=304, headers=common)
+        offered = tuple(e for e in self.variants if e)
+        encoding = negotiate(headers.get("accept-encoding"), offered) if offered else None
+        body = self.variants[encoding]
+        if encoding:
+            common["Content-Encoding"] = encoding
+        response = Response(b"" if head else body, media_type=self.media_type, headers=common)
+        response.headers["Content-Length"] = str(len(body))
+        return response
+
+
+def _version(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:12]
+
+
+def _media_type(path: Path) -> str:
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+class AssetStore:
+    def __init__(self, directory: Path = STATIC_DIR, min_size: int = COMPRESS_MIN_SIZE):
+        self.directory = directory
+        self.min_size = min_size
+        self.assets: dict[str, Asset] = {}
+        self.index: Asset | None = None
+        self.loaded = False
+        self._precompressing: threading.Thread | None = None
+
+    def load(self, background: bool = False) -> None:
+        """
+        Read and hash every asset and build the rewritten index.html, then
+        pre-compress them — in a daemon thread when background=True.
+        """
+        assets = {}
+        for path in sorted(self.directory.rglob("*")):
+            relative = path.relative_to(self.directory)
+            if not path.is_file() or relative.parts[0] in SKIP_DIRS or relative.name == "index.html":
+                continue
+            body = path.read_bytes()
+            assets[URL_PREFIX + relative.as_posix()] = Asset(body, _media_type(path), _version(body))
+        self.assets = assets
+        self.index = self._build_index()
+        self.loaded = True
+
+        if background:
+            self._precompressing = threading.Thread(target=self._precompress, name="asset-precompress", daemon=True)
+            self._precompressing.start()
+        else:
+            self._precompress()
+
+    def _precompress(self) -> None:
+        for asset in [self.index, *self.assets.values()]:
+            asset.precompress(self.min_size)
+
+    def wait_idle(self) -> None:
+        """Block until background pre-compression has finished."""
+        if self._precompressing is not None:
+            self._precompressing.join()
+
+    def _build_index(self) -> Asset:
+        html = (self.directory / "index.html").read_text(encoding="utf-8")
+
+        def versioned(match: re.Match) -> str:
+            asset = self.assets.get(match["path"])
+            url = f'{match["path"]}?v={asset.version}' if asset else match["path"]
+            return f'{match["attr"]}="{url}"'
+
+        html = _STATIC_REF.sub(versioned, html)
+        versions = {url: asset.version for url, asset in self.assets.items()
+                    if url.startswith((URL_PREFIX + "pages/", URL_PREFIX + "js/"))}
+        script = f"<script>window.ASSET_VERSIONS = {json.dumps(versions, separators=(',', ':'))};</script>\n"
+        html = html.replace("</head>", script + "</head>", 1)
+
+        body = html.encode("utf-8")
+        return Asset(body, "text/html; charset=utf-8", _version(body))
+
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
+
+    def index_response(self, headers: Headers) -> Response:
+        self.ensure_loaded()
+        return self.index.response(headers, REVALIDATE)
+
+
+ASSETS = AssetStore()
+
+
+class StaticAssetsMiddleware:
+    """Answers GET/HEAD for known /static/ paths from ASSETS; everything else passes through."""
+
+    def __init__(self, app, store: AssetStore = ASSETS):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(URL_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+        self.store.ensure_loaded()
+        asset = self.store.assets.get(scope["path"])
+        if asset is None:
+            await self.app(scope, receive, send)
+            return
+
+        query = scope.get("query_string", b"").decode("latin-1")
+        requested = dict(p.partition("=")[::2] for p in query.split("&") if p).get("v")
+        cache_control = IMMUTABLE if requested == asset.version else REVALIDATE
+        response = asset.response(Headers(scope=scope), cache_control, head=scope["method"] == "HEAD")
+        await response(scope, receive, send)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed files whose URL changes with their content."""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE
+        return response
@@ -0,0 +1,152 @@
+"""
+Response compression — gzip, plus brotli when the `brotli` package is installed.
+
+CompressionMiddleware negotiates an encoding from Accept-Encoding and
+compresses compressible responses (JSON, text, JS, CSS, SVG) of at least
+COMPRESS_MIN_SIZE bytes. Single-chunk bodies are compressed in one pass with
+an exact Content-Length; streamed bodies are compressed chunk by chunk.
+Responses that already carry a Content-Encoding (the pre-compressed static
+assets in src/api/assets.py) and event streams pass through untouched.
+"""
+import gzip
+import importlib.util
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL        = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY    = int(os.getenv("BROTLI_QUALITY", "4"))   # dynamic responses; static assets use 11
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/javascript", "text/", "image/svg+xml",
+)
+NEVER_COMPRESS = ("text/event-stream",)
+
+
+def available_encodings() -> tuple[str, ...]:
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate(accept_encoding: str | None, offered: tuple[str, ...] | None = None) -> str | None:
+    """Best of `offered` (server preference order) that the client accepts with q > 0."""
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in offered or available_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: str | None) -> bool:
+    if not content_type or content_type.startswith(NEVER_COMPRESS):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, level: int | None = None) -> bytes:
+    if encoding == "br":
+        import brotli
+        return brotli.compress(data, quality=BROTLI_QUALITY if level is None else level)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            import brotli
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._gz = None
+        else:
+            self._br = None
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 → gzip container
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self._br:
+            return self._br.process(chunk) + self._br.flush()
+        return self._gz.compress(chunk) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._br.finish() if self._br else self._gz.flush()
+
+
+class CompressionMiddleware:
+    """Pure ASGI, like InstrumentationMiddleware, so streaming responses stay streamed."""
+
+    def __init__(self, app, min_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: _StreamCompressor | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or not is_compressible(headers.get("content-type")):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message   # held until the first body chunk decides
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if start_message is not None:
+                headers = MutableHeaders(scope=start_message)
+                if not more:
+                    # Whole body in one message: compress once, or leave small bodies alone
+                    if len(body) >= self.min_size:
+                        body = compress(body, encoding)
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(body))
+                        headers.add_vary_header("Accept-Encoding")
+                    await send(start_message)
+                    start_message = None
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = _StreamCompressor(encoding)
+                del headers["Content-Length"]
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                await send(start_message)
+                start_message = None
+
+            if compressor is None:
+                await send(message)
+                return
+            data = compressor.feed(body)
+            if not more:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
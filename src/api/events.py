@@ -0,0 +1,114 @@
+"""
+Server-sent events — per-profile ingestion progress and data-changed notices.
+
+GET /consumption/profiles/{id}/events is a text/event-stream. It starts with a
+`version` event carrying the profile's current data version, then relays:
+
+  progress   {"stage": "parsed" | "inserted" | "rolled_up", "done": n, "total": n | null}
+             while a CSV import runs (ingest_csv's progress callback)
+  changed    {"version": ..., "reason": ..., ...} once a write that affects
+             analytics (import, goals) has committed
+
+Clients keep the last version they rendered and refetch only when a `changed`
+(or, after a reconnect, the opening `version`) differs — no polling. Versions
+are "<boot>-<counter>" and live in memory, so a restart changes every version
+and reconnecting clients refetch once.
+
+Publishing is thread-safe: the writer thread and request threads call
+EVENTS.publish, which hands the message to each subscriber's event loop.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable
+
+import orjson
+
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+EVENTS_QUEUE_SIZE        = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))   # per subscriber; oldest dropped
+
+_BOOT = format(int(time.time()), "x")
+
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._versions: dict[int, int] = {}
+
+    def version(self, profile_id: int) -> str:
+        with self._lock:
+            return f"{_BOOT}-{self._versions.get(profile_id, 0)}"
+
+    def subscribe(self, profile_id: int) -> asyncio.Queue:
+        """Register a queue on the running loop; pair with unsubscribe()."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(profile_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, profile_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(profile_id, set())
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(profile_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, profile_id: int, event: str, data: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(profile_id, ()))
+        if not subscribers:
+            return
+        message = format_event(event, data)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:   # subscriber's loop already closed
+                self.unsubscribe(profile_id, queue)
+
+    def data_changed(self, profile_id: int, reason: str, **detail) -> str:
+        """Bump the profile's data version and tell subscribers. Call after commit."""
+        with self._lock:
+            self._versions[profile_id] = self._versions.get(profile_id, 0) + 1
+            version = f"{_BOOT}-{self._versions[profile_id]}"
+        self.publish(profile_id, "changed", {"version": version, "reason": reason, **detail})
+        return version
+
+    def progress(self, profile_id: int) -> Callable[[str, int, int | None], None]:
+        """A progress callback for ingest_csv that publishes to the profile's stream."""
+        def report(stage: str, done: int, total: int | None) -> None:
+            self.publish(profile_id, "progress", {"stage": stage, "done": done, "total": total})
+        return report
+
+
+def _offer(queue: asyncio.Queue, message: str) -> None:
+    # A stalled client loses its oldest messages rather than blocking publishers
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+EVENTS = EventBus()
+
+
+async def stream(profile_id: int, bus: EventBus = EVENTS) -> AsyncIterator[str]:
+    """The event-stream body: opening version, then published events, with keep-alive comments."""
+    queue = bus.subscribe(profile_id)
+    try:
+        yield format_event("version", {"version": bus.version(profile_id)})
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        bus.unsubscribe(profile_id, queue)
@@ -1,21 +1,39 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse
 
 from src.db.database import init_db
-from src.api.routes import consumption, analytics
+from src.db.maintenance import SCHEDULER
+from src.api.routes import consumption, analytics, admin
+from src.api import assets, compression, metrics, profiling
+from src.media import photos
 
-app = FastAPI(title="Digest Library", version="0.2.0")
+app = FastAPI(title="Digest Library", version="0.2.0", default_response_class=ORJSONResponse)
+# Last added runs first: compression wraps everything, static assets are answered innermost
+app.add_middleware(assets.StaticAssetsMiddleware)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(metrics.InstrumentationMiddleware)
+app.add_middleware(compression.CompressionMiddleware)
 
 
 @app.on_event("startup")
 def startup():
     init_db()
+    assets.ASSETS.load(background=True)
+    SCHEDULER.start(idle_seconds=metrics.REGISTRY.idle_seconds)
 
 
-app.include_router(consumption.router, prefix="/consumption", tags=["consumption"])
+# analytics first: its literal /profiles/overview must win over /profiles/{profile_id}
 app.include_router(analytics.router, prefix="/consumption", tags=["analytics"])
-
+app.include_router(consumption.router, prefix="/consumption", tags=["consumption"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(metrics.router)
+
+app.mount(
+    photos.PHOTO_URL_PREFIX.rstrip("/"),
+    assets.ImmutableStaticFiles(directory=photos.PHOTO_DIR, check_dir=False),
+    name="photos",
+)
 app.mount("/static", StaticFiles(directory="src/static"), name="static")
 
 
@@ -25,5 +43,5 @@ def health():
 
 
 @app.get("/{full_path:path}")
-def serve_ui(full_path: str):
-    return FileResponse("src/static/index.html")
+def serve_ui(full_path: str, request: Request):
+    return assets.ASSETS.index_response(request.headers)
@@ -0,0 +1,247 @@
+"""
+Request instrumentation — per-route latency and SQL statement histograms.
+
+InstrumentationMiddleware times every HTTP request, binds a RequestStats to the
+context so the engine hooks in src/db/instrumentation.py can count statements,
+adds a Server-Timing header, and records everything into REGISTRY.
+GET /metrics renders REGISTRY in Prometheus text format.
+"""
+import threading
+import time
+from typing import Callable
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import MutableHeaders
+
+from src.db.instrumentation import RequestStats, add_statement_listener, current_request
+
+LATENCY_BUCKETS   = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SQL_BUCKETS       = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels → [bucket counts..., sum, count]
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                le = _labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+            inf = _labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_fmt(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_fmt(value)}")
+        return lines
+
+
+# A collector returns extra exposition lines (gauges etc.) at render time.
+Collector = Callable[[], list[str]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors: list[Collector] = []
+        self.in_flight = 0
+        self._last_request = time.monotonic()
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests by route and status.",
+            ("method", "route", "status"),
+        )
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency by route.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+        self.statements = Histogram(
+            "db_statements_per_request", "SQL statements executed per request.",
+            ("method", "route"), STATEMENT_BUCKETS,
+        )
+        self.sql_time = Histogram(
+            "db_time_per_request_seconds", "Time spent in SQL per request.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+        self.statement_duration = Histogram(
+            "db_statement_duration_seconds", "Duration of individual SQL statements.",
+            (), SQL_BUCKETS,
+        )
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._last_request = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        """Seconds since the last request finished; 0 while one is in flight."""
+        with self._lock:
+            return 0.0 if self.in_flight else time.monotonic() - self._last_request
+
+    def observe_request(self, stats: RequestStats, status: int, seconds: float) -> None:
+        labels = (stats.method, stats.route)
+        with self._lock:
+            self.requests.inc((stats.method, stats.route, str(status)))
+            self.latency.observe(labels, seconds)
+            self.statements.observe(labels, stats.statements)
+            self.sql_time.observe(labels, stats.sql_seconds)
+
+    def observe_statement(self, seconds: float) -> None:
+        with self._lock:
+            self.statement_duration.observe((), seconds)
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.statements,
+                           self.sql_time, self.statement_duration):
+                lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+add_statement_listener(lambda statement, params, seconds, cursor, stats: REGISTRY.observe_statement(seconds))
+
+
+def db_pool_metrics() -> list[str]:
+    """Read/write connection pool occupancy and writer-queue throughput."""
+    from src.db.database import pool_stats
+    from src.db.writer import WRITER
+
+    lines = []
+    for name, help_text in (
+        ("size", "Connections the pool holds."),
+        ("checked_out", "Connections currently in use."),
+        ("idle", "Open connections waiting in the pool."),
+    ):
+        metric = f"db_pool_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for pool, stats in pool_stats().items():
+            lines.append(f'{metric}{{pool="{pool}"}} {stats[name]}')
+
+    lines += [
+        "# HELP db_write_queue_depth Write jobs waiting for the writer thread.",
+        "# TYPE db_write_queue_depth gauge",
+        f"db_write_queue_depth {WRITER.depth()}",
+    ]
+    for key, metric, help_text in (
+        ("jobs", "db_write_jobs_total", "Write jobs committed."),
+        ("failed", "db_write_jobs_failed_total", "Write jobs rolled back to their savepoint."),
+        ("batches", "db_write_batches_total", "Group commits."),
+        ("commit_seconds", "db_write_commit_seconds_total", "Time spent in COMMIT."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter", f"{metric} {_fmt(WRITER.stats[key])}"]
+    return lines
+
+
+REGISTRY.add_collector(db_pool_metrics)
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware so it wraps streaming responses without buffering them."""
+
+    def __init__(self, app, registry: MetricsRegistry = REGISTRY):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(method=scope["method"], scope=scope)
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        self.registry.request_started()
+        busy = True
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status, busy
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = MutableHeaders(scope=message)
+                # An open event stream isn't load: don't let it hold off idle-time maintenance
+                if headers.get("content-type", "").startswith("text/event-stream"):
+                    self.registry.request_finished()
+                    busy = False
+                headers.append(
+                    "Server-Timing",
+                    f"app;dur={elapsed_ms:.1f}, "
+                    f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.statements} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            if busy:
+                self.registry.request_finished()
+            self.registry.observe_request(stats, status, time.perf_counter() - start)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
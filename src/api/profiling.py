@@ -0,0 +1,235 @@
+"""
+Opt-in request profiling — cProfile around route handlers.
+
+A request is profiled when PROFILING_ENABLED=true and it carries `?_profile=1`
+or an `X-Profile: 1` header, or when it is picked by PROFILE_SAMPLE_RATE
+(0.0–1.0, default 0). The handler itself runs under cProfile — including the
+analytics functions and ORM hydration — via ProfiledRoute, which both API
+routers use as their route_class. Sync handlers run in the threadpool, so the
+profiler has to be enabled inside the handler call, not in the middleware.
+
+One request is profiled at a time: from Python 3.12 cProfile sits on the
+process-wide sys.monitoring, so a second enable() raises and an enabled
+profiler records every thread. A request that would overlap a running
+profile (or any other profiling tool) just runs unprofiled. Even so, on 3.12
+a profile also picks up whatever unprofiled requests ran alongside it.
+
+Profiles are written to PROFILE_DIR (default ./data/profiles), capped at
+PROFILE_MAX_FILES (default 50, oldest deleted first), and served by
+/admin/profiler in pstats or collapsed-stack (flamegraph.pl / speedscope) form.
+"""
+import asyncio
+import cProfile
+import functools
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+PROFILING_ENABLED   = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR         = Path(os.getenv("PROFILE_DIR", "./data/profiles"))
+PROFILE_MAX_FILES   = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+PROFILE_NAME = re.compile(r"^[\w.-]+\.prof$")
+
+_active: ContextVar["_Session | None"] = ContextVar("active_profile", default=None)
+_running = threading.Lock()   # held while a profiler is enabled
+
+
+class _Session:
+    def __init__(self):
+        self.profiler: cProfile.Profile | None = None
+
+    def start(self) -> bool:
+        """Enable a profiler unless one is already running; False means run unprofiled."""
+        if not _running.acquire(blocking=False):
+            return False
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:   # another profiling tool owns sys.monitoring (3.12+)
+            _running.release()
+            return False
+        self.profiler = profiler
+        return True
+
+    def stop(self) -> None:
+        self.profiler.disable()
+        _running.release()
+
+
+def _profiled(endpoint):
+    """Wrap a route endpoint so it runs under cProfile when the request asked for it."""
+    if getattr(endpoint, "_profiled", False):
+        return endpoint  # include_router re-creates routes from already wrapped endpoints
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            session = _active.get()
+            if session is None or not session.start():
+                return await endpoint(*args, **kwargs)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                session.stop()
+        async_wrapper._profiled = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _active.get()
+        if session is None or not session.start():
+            return endpoint(*args, **kwargs)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            session.stop()
+    wrapper._profiled = True
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+
+def _wants_profile(scope) -> bool:
+    if PROFILING_ENABLED:
+        if b"_profile=1" in scope.get("query_string", b"").split(b"&"):
+            return True
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile" and value.strip() in (b"1", b"true"):
+                return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _slug(route_path: str) -> str:
+    return re.sub(r"[^\w]+", "-", route_path).strip("-") or "root"
+
+
+def _save(profiler: cProfile.Profile, method: str, route_path: str, elapsed_ms: float) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S_%f")
+    name = f"{stamp}_{method}_{_slug(route_path)}_{int(elapsed_ms)}ms.prof"
+    pstats.Stats(profiler).dump_stats(PROFILE_DIR / name)
+
+    existing = sorted(PROFILE_DIR.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for old in existing[:max(len(existing) - PROFILE_MAX_FILES, 0)]:
+        old.unlink(missing_ok=True)
+    return name
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        session = _Session()
+        token = _active.set(session)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and session.profiler is not None:
+                route = scope.get("route")
+                # Disk I/O (dump, pruning PROFILE_DIR) stays off the event loop
+                name = await run_in_threadpool(
+                    _save,
+                    session.profiler,
+                    scope["method"],
+                    getattr(route, "path", scope["path"]),
+                    (time.perf_counter() - start) * 1000,
+                )
+                MutableHeaders(scope=message).append("X-Profile-Id", name)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active.reset(token)
+
+
+# ── Stored profiles ───────────────────────────────────────────────────────────
+
+def list_profiles() -> list[dict]:
+    if not PROFILE_DIR.exists():
+        return []
+    files = sorted(PROFILE_DIR.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [
+        {
+            "id": f.name,
+            "size_bytes": f.stat().st_size,
+            "created_at": datetime.utcfromtimestamp(f.stat().st_mtime).isoformat(),
+        }
+        for f in files
+    ]
+
+
+def profile_path(profile_id: str) -> Path | None:
+    if not PROFILE_NAME.match(profile_id):
+        return None
+    path = PROFILE_DIR / profile_id
+    return path if path.is_file() else None
+
+
+def _frame_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ",")  # builtins, e.g. <method 'execute' of 'sqlite3.Cursor' objects>
+    return f"{name} ({Path(filename).name}:{line})".replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats, max_depth: int = 64, min_seconds: float = 1e-5) -> str:
+    """
+    Approximate collapsed stacks (`a;b;c <microseconds>`) from a cProfile call graph.
+    cProfile keeps caller→callee edges, not full stacks, so each callee's time is
+    split across its callers in proportion to the cumulative time of each edge.
+    Subtrees under min_seconds are dropped — otherwise path enumeration over the
+    call graph grows exponentially.
+    """
+    raw = stats.stats
+    callees: dict[tuple, dict[tuple, float]] = defaultdict(dict)
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    totals: dict[str, float] = defaultdict(float)
+
+    def walk(func: tuple, path: tuple, on_path: frozenset, budget: float) -> None:
+        _cc, _nc, tt, ct, _callers = raw[func]
+        if ct <= 0 or budget < min_seconds:
+            return
+        scale = min(budget / ct, 1.0)
+        path = path + (_frame_label(func),)
+        if tt > 0:
+            totals[";".join(path)] += tt * scale
+        if len(path) >= max_depth:
+            return
+        for child, edge_ct in callees.get(func, {}).items():
+            if child not in on_path:
+                walk(child, path, on_path | {child}, edge_ct * scale)
+
+    for func, (_cc, _nc, _tt, ct, callers) in raw.items():
+        if not callers:
+            walk(func, (), frozenset({func}), ct)
+
+    return "".join(
+        f"{stack} {int(seconds * 1_000_000)}\n"
+        for stack, seconds in sorted(totals.items())
+        if int(seconds * 1_000_000) > 0
+    )
@@ -0,0 +1,98 @@
+"""
+Admin API routes — operational introspection. Not used by the web UI.
+"""
+import pstats
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from src.api import profiling
+from src.db import archive, maintenance
+from src.db.database import engine
+from src.db.slow_queries import SLOW_QUERY_LOG
+from src.db.writer import WRITER
+from src.semantic.index import INDEX as SEMANTIC_INDEX
+
+router = APIRouter()
+
+
+# ── Slow queries ──────────────────────────────────────────────────────────────
+
+@router.get("/slow-queries")
+def list_slow_queries(limit: int = Query(default=50, ge=1, le=1000)):
+    entries = SLOW_QUERY_LOG.entries()
+    return {
+        "threshold_ms": SLOW_QUERY_LOG.threshold_ms,
+        "capacity": SLOW_QUERY_LOG.size,
+        "count": len(entries),
+        "entries": entries[:limit],
+    }
+
+
+@router.delete("/slow-queries", status_code=204)
+def clear_slow_queries():
+    SLOW_QUERY_LOG.clear()
+
+
+# ── Profiler ──────────────────────────────────────────────────────────────────
+
+@router.get("/profiler")
+def list_profiles():
+    return {
+        "enabled": profiling.PROFILING_ENABLED,
+        "sample_rate": profiling.PROFILE_SAMPLE_RATE,
+        "max_files": profiling.PROFILE_MAX_FILES,
+        "profiles": profiling.list_profiles(),
+    }
+
+
+@router.get("/profiler/{profile_id}")
+def download_profile(profile_id: str, format: str = Query(default="pstats", pattern="^(pstats|collapsed)$")):
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profiling.collapsed_stacks(pstats.Stats(str(path))))
+    return FileResponse(path, media_type="application/octet-stream", filename=profile_id)
+
+
+# ── Archives ──────────────────────────────────────────────────────────────────
+
+@router.get("/archive")
+def list_archives():
+    return {
+        "directory": str(archive.ARCHIVE_DIR),
+        "after_days": archive.ARCHIVE_AFTER_DAYS,
+        "archives": archive.archive_stats(),
+    }
+
+
+@router.post("/archive")
+def run_archive(before: date | None = None):
+    """Move entries logged before `before` (default: ARCHIVE_AFTER_DAYS ago) into per-year archives."""
+    if before and before > date.today():
+        raise HTTPException(status_code=422, detail="before must not be in the future")
+    result = WRITER.run_exclusive(archive.archive_entries, engine, before)
+    SEMANTIC_INDEX.enqueue_archived(date.fromisoformat(result["cutoff"]))
+    return result
+
+
+# ── Maintenance ───────────────────────────────────────────────────────────────
+
+@router.get("/maintenance")
+def maintenance_status():
+    return {
+        "backup_dir": str(maintenance.BACKUP_DIR),
+        "backup_keep": maintenance.BACKUP_KEEP,
+        "backups": sorted(p.name for p in maintenance.BACKUP_DIR.glob(f"{maintenance.BACKUP_PREFIX}*.db")),
+        **maintenance.SCHEDULER.status(),
+    }
+
+
+@router.post("/maintenance/{task}")
+def run_maintenance(task: str):
+    """Run a maintenance task now; returns its timing record."""
+    if task not in maintenance.SCHEDULER.tasks:
+        raise HTTPException(status_code=404, detail="Unknown maintenance task")
+    return maintenance.SCHEDULER.run(task)
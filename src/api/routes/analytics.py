@@ -3,24 +3,56 @@ Analytics API routes — wraps queries.py functions with HTTP endpoints.
 """
 from datetime import date, timedelta
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 
 from src.db.database import get_db
+from src.models.consumption import Profile
+from src.api.profiling import ProfiledRoute
 from src.analytics.queries import (
     get_trend_data,
+    get_trends_bundle,
     get_rolling_averages,
     get_favorite_foods,
     get_meal_pattern_breakdown,
     get_recent_entries,
     get_overview_data,
+    get_overview_batch,
+    get_calendar_month,
+    get_calendar_version,
+    get_heatmap,
+    METRIC_FIELDS,
 )
+from src.analytics.adherence import GOAL_METRICS, get_adherence
+from src.analytics.correlations import MAX_LAG, get_correlations
+from src.analytics.search import ORDERS, InvalidCursor, search_entries
+from src.semantic.index import INDEX as SEMANTIC_INDEX, SemanticUnavailable
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 DEFAULT_METRICS = ["calories", "protein_g", "carbs_g", "fat_g"]
 
 
+@router.get("/profiles/overview")
+def overview_batch(
+    ids: str = Query(default=None, description="Comma-separated profile ids; all profiles when omitted"),
+    today: date = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    if today is None:
+        today = date.today()
+    if ids:
+        try:
+            profile_ids = [int(i) for i in ids.split(",") if i.strip()]
+        except ValueError:
+            raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    else:
+        profile_ids = [pid for (pid,) in db.query(Profile.id).order_by(Profile.name)]
+    overviews = get_overview_batch(db, profile_ids, today)
+    return [{"profile_id": pid, **overviews[pid]} for pid in dict.fromkeys(profile_ids)]
+
+
 @router.get("/profiles/{profile_id}/overview")
 def overview(
     profile_id: int,
@@ -45,7 +77,69 @@ def trends(
     if start is None:
         start = end - timedelta(days=29)
     metric_list = [m.strip() for m in metrics.split(",") if m.strip()]
-    return get_trend_data(db, profile_id, start, end, metric_list)
+    return ORJSONResponse(get_trend_data(db, profile_id, start, end, metric_list))
+
+
+@router.get("/profiles/{profile_id}/trends-bundle")
+def trends_bundle(
+    profile_id: int,
+    start: date = Query(default=None),
+    end: date = Query(default=None),
+    metrics: str = Query(default="calories,protein_g,carbs_g,fat_g"),
+    favorites_limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """The Trends page in one request: trends, averages, favorites and meal patterns."""
+    if end is None:
+        end = date.today()
+    if start is None:
+        start = end - timedelta(days=29)
+    metric_list = [m.strip() for m in metrics.split(",") if m.strip()]
+    return ORJSONResponse(get_trends_bundle(db, profile_id, start, end, metric_list, favorites_limit))
+
+
+@router.get("/profiles/{profile_id}/calendar/{month}")
+def calendar_month(
+    request: Request,
+    response: Response,
+    profile_id: int,
+    month: str = Path(pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="yyyy-mm"),
+    metrics: str = Query(default="calories"),
+    db: Session = Depends(get_db),
+):
+    """
+    Revalidated on every view: weekly imports keep filling a month after it
+    ends, so even past months are only cached until their summaries change.
+    """
+    year, mon = int(month[:4]), int(month[5:])
+    # Weak: the compression middleware may re-encode the body
+    headers = {
+        "ETag": f'W/"{get_calendar_version(db, profile_id, year, mon)}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if headers["ETag"] in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    metric_list = [m.strip() for m in metrics.split(",") if m.strip()]
+    return get_calendar_month(db, profile_id, year, mon, metric_list)
+
+
+@router.get("/profiles/{profile_id}/heatmap")
+def heatmap(
+    profile_id: int,
+    start: date = Query(default=None),
+    end: date = Query(default=None),
+    metric: str = Query(default="calories"),
+    db: Session = Depends(get_db),
+):
+    """Weekday × hour-of-day entry counts and metric sums."""
+    if metric not in METRIC_FIELDS:
+        raise HTTPException(status_code=422, detail=f"metric must be one of {', '.join(METRIC_FIELDS)}")
+    if end is None:
+        end = date.today()
+    if start is None:
+        start = end - timedelta(days=89)
+    return get_heatmap(db, profile_id, start, end, metric)
 
 
 @router.get("/profiles/{profile_id}/averages")
@@ -100,3 +194,88 @@ def recent(
     db: Session = Depends(get_db),
 ):
     return get_recent_entries(db, profile_id, limit)
+
+
+@router.get("/profiles/{profile_id}/adherence")
+def adherence(
+    profile_id: int,
+    start: date = Query(default=None),
+    end: date = Query(default=None),
+    metrics: str = Query(default=",".join(GOAL_METRICS)),
+    db: Session = Depends(get_db),
+):
+    if end is None:
+        end = date.today()
+    if start is None:
+        start = end - timedelta(days=29)
+    metric_list = [m.strip() for m in metrics.split(",") if m.strip()]
+    return get_adherence(db, profile_id, start, end, metric_list)
+
+
+@router.get("/profiles/{profile_id}/correlations")
+def correlations(
+    profile_id: int,
+    start: date = Query(default=None),
+    end: date = Query(default=None),
+    metrics: str = Query(default=None, description="Comma-separated; all summary metrics when omitted"),
+    max_lag: int = Query(default=7, ge=0, le=MAX_LAG),
+    thresholds: str = Query(default=None, description="e.g. caffeine_mg:400,sodium_mg:2300"),
+    threshold_lag: int = Query(default=1, ge=0, le=MAX_LAG),
+    top: int = Query(default=10, ge=0, le=100),
+    db: Session = Depends(get_db),
+):
+    if end is None:
+        end = date.today()
+    if start is None:
+        start = end - timedelta(days=364)
+    metric_list = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else None
+    cutoffs = {}
+    if thresholds:
+        try:
+            for part in thresholds.split(","):
+                metric, value = part.split(":")
+                cutoffs[metric.strip()] = float(value)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="thresholds must look like metric:value,metric:value")
+    return get_correlations(db, profile_id, start, end, metric_list, max_lag, cutoffs, threshold_lag, top)
+
+
+@router.get("/profiles/{profile_id}/search")
+def search(
+    profile_id: int,
+    q: str = Query(min_length=2, max_length=200),
+    start: date = Query(default=None),
+    end: date = Query(default=None),
+    order: str = Query(default="rank", pattern=f"^({'|'.join(ORDERS)})$"),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str = Query(default=None),
+    fuzzy: bool = Query(default=True),
+    db: Session = Depends(get_db),
+):
+    try:
+        return search_entries(db, profile_id, q, start, end, order, limit, cursor, fuzzy)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/profiles/{profile_id}/semantic-search")
+def semantic_search(
+    profile_id: int,
+    q: str = Query(min_length=1, max_length=500),
+    start: date = Query(default=None),
+    end: date = Query(default=None),
+    limit: int = Query(default=10, ge=1, le=50),
+):
+    try:
+        return SEMANTIC_INDEX.search(profile_id, q, limit, start, end)
+    except SemanticUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post("/profiles/{profile_id}/semantic-index", status_code=202)
+def rebuild_semantic_index(profile_id: int):
+    """Queue a full (incremental) re-index — only entries whose text changed are re-embedded."""
+    if not SEMANTIC_INDEX.available:
+        raise HTTPException(status_code=503, detail="Semantic search is not available")
+    SEMANTIC_INDEX.enqueue(profile_id)
+    return {"queued": True}
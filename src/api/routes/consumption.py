@@ -1,25 +1,39 @@
 """
 Consumption Library API routes.
 Profiles, photo upload, ingestion, daily summaries, entries, goals.
+
+Handlers read through get_db (a read-only session); every write is a job on
+the single writer queue (src/db/writer.py), built as a nested function that
+returns the response data.
 """
 import io
 import os
-import shutil
 from datetime import date, datetime
-from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Body
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Body
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile as StarletteUploadFile
 from sqlalchemy.orm import Session
 
-from src.db.database import get_db
-from src.models.consumption import Profile, ConsumptionEntry, DailySummary, ProfileGoals
+from src.db.archive import entry_source, purge_profile
+from src.db.database import engine, get_db
+from src.db.writer import WRITER
+from src.api import events
+from src.api.events import EVENTS
+from src.api.profiling import ProfiledRoute
+from src.models.consumption import Profile, ConsumptionEntry, DailySummary, ProfileGoals, DailyAdherence, FoodStats
 from src.ingestion.snapcalorie import ingest_csv
+from src.ingestion.foods import release_food_usage
+from src.analytics.adherence import recompute_adherence
+from src.semantic.index import INDEX as SEMANTIC_INDEX
+from src.media import photos
+from src.api.responses import rows_response
 from src.api.schemas import ProfileIn, GoalsIn
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
-UPLOAD_DIR = Path("src/static/uploads/profiles")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
 
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
@@ -43,6 +57,7 @@ def _profile_dict(p: Profile) -> dict:
         "height_inches": p.height_inches,
         "biological_sex": p.biological_sex,
         "photo_path": p.photo_path,
+        "photo_variants": photos.photo_variants(p.photo_path),
         "bmi": bmi,
         "created_at": p.created_at.isoformat() if p.created_at else None,
     }
@@ -63,18 +78,20 @@ def list_profiles(db: Session = Depends(get_db)):
 
 
 @router.post("/profiles", status_code=201)
-def create_profile(data: ProfileIn, db: Session = Depends(get_db)):
-    p = Profile(
-        name=data.name,
-        date_of_birth=data.date_of_birth,
-        weight_lbs=data.weight_lbs,
-        height_inches=data.height_inches,
-        biological_sex=data.biological_sex,
-    )
-    db.add(p)
-    db.commit()
-    db.refresh(p)
-    return _profile_dict(p)
+def create_profile(data: ProfileIn):
+    def create(db: Session) -> dict:
+        p = Profile(
+            name=data.name,
+            date_of_birth=data.date_of_birth,
+            weight_lbs=data.weight_lbs,
+            height_inches=data.height_inches,
+            biological_sex=data.biological_sex,
+        )
+        db.add(p)
+        db.flush()
+        return _profile_dict(p)
+
+    return WRITER.run(create)
 
 
 @router.get("/profiles/{profile_id}")
@@ -83,47 +100,91 @@ def get_profile(profile_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/profiles/{profile_id}")
-def update_profile(profile_id: int, data: ProfileIn, db: Session = Depends(get_db)):
-    p = _get_profile_or_404(profile_id, db)
-    p.name           = data.name
-    p.date_of_birth  = data.date_of_birth
-    p.weight_lbs     = data.weight_lbs
-    p.height_inches  = data.height_inches
-    p.biological_sex = data.biological_sex
-    db.commit()
-    db.refresh(p)
-    return _profile_dict(p)
+def update_profile(profile_id: int, data: ProfileIn):
+    def update(db: Session) -> dict:
+        p = _get_profile_or_404(profile_id, db)
+        p.name           = data.name
+        p.date_of_birth  = data.date_of_birth
+        p.weight_lbs     = data.weight_lbs
+        p.height_inches  = data.height_inches
+        p.biological_sex = data.biological_sex
+        db.flush()
+        return _profile_dict(p)
+
+    return WRITER.run(update)
 
 
 @router.delete("/profiles/{profile_id}", status_code=204)
-def delete_profile(profile_id: int, db: Session = Depends(get_db)):
-    p = _get_profile_or_404(profile_id, db)
-    # Remove photo file if exists
-    if p.photo_path:
-        try:
-            photo_file = Path("src/static") / p.photo_path.lstrip("/static/")
-            if photo_file.exists():
-                photo_file.unlink()
-        except Exception:
-            pass
-    db.delete(p)
-    db.commit()
+def delete_profile(profile_id: int):
+    def delete(db: Session) -> None:
+        p = _get_profile_or_404(profile_id, db)
+        release_food_usage(db, profile_id)
+        db.query(DailyAdherence).filter_by(profile_id=profile_id).delete(synchronize_session=False)
+        db.query(FoodStats).filter_by(profile_id=profile_id).delete(synchronize_session=False)
+        db.delete(p)
+
+    # One job across the main database and the archive files
+    WRITER.run_exclusive(purge_profile, engine, profile_id, delete)
+    photos.delete_photos(profile_id)
+    SEMANTIC_INDEX.enqueue_delete(profile_id)
+
+
+def _body_limited(request: Request, max_bytes: int) -> Request:
+    """
+    The request with its body counted as it is received: chunked or
+    understated uploads stop at max_bytes instead of being spooled whole.
+    """
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        received += len(message.get("body", b""))
+        if received > max_bytes:
+            raise photos.PhotoTooLarge("Request body too large")
+        return message
+
+    return Request(request.scope, receive)
 
 
 @router.post("/profiles/{profile_id}/photo")
 async def upload_photo(
     profile_id: int,
-    file: UploadFile = File(...),
+    request: Request,
     db: Session = Depends(get_db),
 ):
-    p = _get_profile_or_404(profile_id, db)
-    suffix = Path(file.filename).suffix.lower() or ".jpg"
-    dest = UPLOAD_DIR / f"{profile_id}{suffix}"
-    with dest.open("wb") as f:
-        shutil.copyfileobj(file.file, f)
-    p.photo_path = f"/static/uploads/profiles/{profile_id}{suffix}"
-    db.commit()
-    return {"photo_path": p.photo_path}
+    _get_profile_or_404(profile_id, db)
+    # Refuse a declared oversize body before any of it is read
+    limit = photos.PHOTO_MAX_BYTES + MULTIPART_OVERHEAD
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(status_code=413, detail="Photo is too large")
+    try:
+        form = await _body_limited(request, limit).form(max_files=1, max_fields=0)
+    except photos.PhotoTooLarge:
+        raise HTTPException(status_code=413, detail="Photo is too large")
+    file = form.get("file")
+    if not isinstance(file, StarletteUploadFile):
+        raise HTTPException(status_code=422, detail="Expected a 'file' upload")
+    try:
+        dest = await photos.save_upload(profile_id, file)
+    except photos.PhotoTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except photos.UnsupportedPhoto as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    finally:
+        await form.close()
+
+    def set_photo(db: Session) -> tuple[str | None, str]:
+        p = _get_profile_or_404(profile_id, db)
+        replaced, p.photo_path = p.photo_path, photos.photo_url(dest)
+        return replaced, p.photo_path
+
+    replaced, photo_path = await WRITER.run_async(set_photo)
+    # Only the file this upload replaced: an overlapping upload's photo may be newer
+    photos.delete_replaced(replaced, keep=dest)
+    photos.PROCESSOR.enqueue(dest)
+    return {"photo_path": photo_path}
 
 
 # ── Goals ─────────────────────────────────────────────────────────────────────
@@ -147,31 +208,36 @@ def get_goals(profile_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/profiles/{profile_id}/goals")
-def upsert_goals(profile_id: int, data: GoalsIn, db: Session = Depends(get_db)):
-    _get_profile_or_404(profile_id, db)
-    goals = db.query(ProfileGoals).filter_by(profile_id=profile_id).first()
-    if not goals:
-        goals = ProfileGoals(profile_id=profile_id)
-        db.add(goals)
-    goals.calories    = data.calories
-    goals.protein_g   = data.protein_g
-    goals.carbs_g     = data.carbs_g
-    goals.fat_g       = data.fat_g
-    goals.fiber_g     = data.fiber_g
-    goals.water_ml    = data.water_ml
-    goals.caffeine_mg = data.caffeine_mg
-    db.commit()
-    db.refresh(goals)
-    return {
-        "set": True,
-        "calories": goals.calories,
-        "protein_g": goals.protein_g,
-        "carbs_g": goals.carbs_g,
-        "fat_g": goals.fat_g,
-        "fiber_g": goals.fiber_g,
-        "water_ml": goals.water_ml,
-        "caffeine_mg": goals.caffeine_mg,
-    }
+def upsert_goals(profile_id: int, data: GoalsIn):
+    def upsert(db: Session) -> dict:
+        _get_profile_or_404(profile_id, db)
+        goals = db.query(ProfileGoals).filter_by(profile_id=profile_id).first()
+        if not goals:
+            goals = ProfileGoals(profile_id=profile_id)
+            db.add(goals)
+        goals.calories    = data.calories
+        goals.protein_g   = data.protein_g
+        goals.carbs_g     = data.carbs_g
+        goals.fat_g       = data.fat_g
+        goals.fiber_g     = data.fiber_g
+        goals.water_ml    = data.water_ml
+        goals.caffeine_mg = data.caffeine_mg
+        db.flush()
+        recompute_adherence(db, profile_id)
+        return {
+            "set": True,
+            "calories": goals.calories,
+            "protein_g": goals.protein_g,
+            "carbs_g": goals.carbs_g,
+            "fat_g": goals.fat_g,
+            "fiber_g": goals.fiber_g,
+            "water_ml": goals.water_ml,
+            "caffeine_mg": goals.caffeine_mg,
+        }
+
+    result = WRITER.run(upsert)
+    EVENTS.data_changed(profile_id, "goals")
+    return result
 
 
 # ── Ingestion ─────────────────────────────────────────────────────────────────
@@ -185,41 +251,63 @@ async def ingest_snapcalorie(
     _get_profile_or_404(profile_id, db)
     content = await file.read()
     text = io.StringIO(content.decode("utf-8"))
-    return ingest_csv(text, profile_id, db)
+
+    def ingest(db: Session) -> dict:
+        _get_profile_or_404(profile_id, db)
+        return ingest_csv(text, profile_id, db, progress=EVENTS.progress(profile_id))
+
+    result = await WRITER.run_async(ingest)
+    SEMANTIC_INDEX.enqueue(profile_id, result["dates"])
+    if result["inserted"]:
+        EVENTS.data_changed(profile_id, "ingest", start=result["dates"][0], end=result["dates"][-1])
+    return result
+
+
+# ── Events ────────────────────────────────────────────────────────────────────
+
+@router.get("/profiles/{profile_id}/events")
+def profile_events(profile_id: int, db: Session = Depends(get_db)):
+    """Server-sent events: ingestion progress and data-changed notices (src/api/events.py)."""
+    _get_profile_or_404(profile_id, db)
+    return StreamingResponse(
+        events.stream(profile_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ── Summaries ─────────────────────────────────────────────────────────────────
 
-def _summary_dict(s: DailySummary) -> dict:
-    return {
-        "date": str(s.log_date),
-        "calories": s.total_calories,
-        "protein_g": s.total_protein_g,
-        "carbs_g": s.total_carbs_g,
-        "fat_g": s.total_fat_g,
-        "saturates_g": s.total_saturates_g,
-        "fiber_g": s.total_fiber_g,
-        "sugar_g": s.total_sugar_g,
-        "cholesterol_mg": s.total_cholesterol_mg,
-        "sodium_mg": s.total_sodium_mg,
-        "potassium_mg": s.total_potassium_mg,
-        "water_ml": s.total_water_ml,
-        "caffeine_mg": s.total_caffeine_mg,
-        "entry_count": s.entry_count,
-    }
+# Response key → column; rows are selected as plain tuples and zipped onto the keys
+SUMMARY_COLUMNS = {
+    "date":           DailySummary.log_date,
+    "calories":       DailySummary.total_calories,
+    "protein_g":      DailySummary.total_protein_g,
+    "carbs_g":        DailySummary.total_carbs_g,
+    "fat_g":          DailySummary.total_fat_g,
+    "saturates_g":    DailySummary.total_saturates_g,
+    "fiber_g":        DailySummary.total_fiber_g,
+    "sugar_g":        DailySummary.total_sugar_g,
+    "cholesterol_mg": DailySummary.total_cholesterol_mg,
+    "sodium_mg":      DailySummary.total_sodium_mg,
+    "potassium_mg":   DailySummary.total_potassium_mg,
+    "water_ml":       DailySummary.total_water_ml,
+    "caffeine_mg":    DailySummary.total_caffeine_mg,
+    "entry_count":    DailySummary.entry_count,
+}
 
 
 @router.get("/profiles/{profile_id}/summary/{log_date}")
 def get_daily_summary(profile_id: int, log_date: date, db: Session = Depends(get_db)):
     _get_profile_or_404(profile_id, db)
-    s = (
-        db.query(DailySummary)
-        .filter_by(profile_id=profile_id, log_date=log_date)
+    row = (
+        db.query(*SUMMARY_COLUMNS.values())
+        .filter(DailySummary.profile_id == profile_id, DailySummary.log_date == log_date)
         .first()
     )
-    if not s:
+    if not row:
         raise HTTPException(status_code=404, detail="No data for this date")
-    return _summary_dict(s)
+    return dict(zip(SUMMARY_COLUMNS, row))
 
 
 @router.get("/profiles/{profile_id}/summaries")
@@ -230,16 +318,41 @@ def get_summaries(
     db: Session = Depends(get_db),
 ):
     _get_profile_or_404(profile_id, db)
-    q = db.query(DailySummary).filter(DailySummary.profile_id == profile_id)
+    q = db.query(*SUMMARY_COLUMNS.values()).filter(DailySummary.profile_id == profile_id)
     if start:
         q = q.filter(DailySummary.log_date >= start)
     if end:
         q = q.filter(DailySummary.log_date <= end)
-    return [_summary_dict(s) for s in q.order_by(DailySummary.log_date).all()]
+    return rows_response(SUMMARY_COLUMNS, q.order_by(DailySummary.log_date).all())
 
 
 # ── Entries ───────────────────────────────────────────────────────────────────
 
+ENTRY_COLUMNS = {
+    "id":             ConsumptionEntry.id,
+    "logged_at":      ConsumptionEntry.logged_at,
+    "log_date":       ConsumptionEntry.log_date,
+    "meal_context":   ConsumptionEntry.meal_context,
+    "item_name":      ConsumptionEntry.item_name,
+    "brand":          ConsumptionEntry.brand,
+    "category":       ConsumptionEntry.category,
+    "calories":       ConsumptionEntry.calories,
+    "protein_g":      ConsumptionEntry.protein_g,
+    "carbs_g":        ConsumptionEntry.carbs_g,
+    "fat_g":          ConsumptionEntry.fat_g,
+    "saturates_g":    ConsumptionEntry.saturates_g,
+    "fiber_g":        ConsumptionEntry.fiber_g,
+    "sugar_g":        ConsumptionEntry.sugar_g,
+    "cholesterol_mg": ConsumptionEntry.cholesterol_mg,
+    "sodium_mg":      ConsumptionEntry.sodium_mg,
+    "potassium_mg":   ConsumptionEntry.potassium_mg,
+    "water_ml":       ConsumptionEntry.water_ml,
+    "caffeine_mg":    ConsumptionEntry.caffeine_mg,
+    "serving_qty":    ConsumptionEntry.serving_qty,
+    "serving_size":   ConsumptionEntry.serving_size,
+}
+
+
 @router.get("/profiles/{profile_id}/entries")
 def get_entries(
     profile_id: int,
@@ -248,35 +361,11 @@ def get_entries(
     db: Session = Depends(get_db),
 ):
     _get_profile_or_404(profile_id, db)
-    q = db.query(ConsumptionEntry).filter(ConsumptionEntry.profile_id == profile_id)
+    E = entry_source(db, log_date, log_date)
+    columns = ENTRY_COLUMNS if E is ConsumptionEntry else {k: getattr(E, k) for k in ENTRY_COLUMNS}
+    q = db.query(*columns.values()).filter(E.profile_id == profile_id)
     if log_date:
-        q = q.filter(ConsumptionEntry.log_date == log_date)
+        q = q.filter(E.log_date == log_date)
     if category:
-        q = q.filter(ConsumptionEntry.category == category)
-    entries = q.order_by(ConsumptionEntry.logged_at).all()
-    return [
-        {
-            "id": e.id,
-            "logged_at": e.logged_at.isoformat(),
-            "log_date": str(e.log_date),
-            "meal_context": e.meal_context,
-            "item_name": e.item_name,
-            "brand": e.brand,
-            "category": e.category,
-            "calories": e.calories,
-            "protein_g": e.protein_g,
-            "carbs_g": e.carbs_g,
-            "fat_g": e.fat_g,
-            "saturates_g": e.saturates_g,
-            "fiber_g": e.fiber_g,
-            "sugar_g": e.sugar_g,
-            "cholesterol_mg": e.cholesterol_mg,
-            "sodium_mg": e.sodium_mg,
-            "potassium_mg": e.potassium_mg,
-            "water_ml": e.water_ml,
-            "caffeine_mg": e.caffeine_mg,
-            "serving_qty": e.serving_qty,
-            "serving_size": e.serving_size,
-        }
-        for e in entries
-    ]
+        q = q.filter(E.category == category)
+    return rows_response(columns, q.order_by(E.logged_at).all())
@@ -0,0 +1,284 @@
+"""
+Cold history — per-year archive databases for old consumption entries.
+
+archive_entries() moves entries logged before a cutoff (default: older than
+ARCHIVE_AFTER_DAYS) out of consumption_entries into ARCHIVE_DIR/entries-{year}.db,
+one SQLite file per calendar year with the same columns. The main table and
+its indexes then only hold recent data. DailySummary, DailyAdherence and the
+Food dictionary stay in the main database, so trends, calendar, adherence and
+correlations never touch the archives.
+
+Entry-level reads go through entry_source(db, start, end): it returns
+ConsumptionEntry itself when no archive year overlaps the range, otherwise an
+alias of it over main ∪ the overlapping archives, which are ATTACHed
+read-only (mode=ro) to the session's connection the first time they're
+needed and stay attached for the pooled connection's lifetime. SQLite allows
+only 10 attached databases, so when more than MAX_ATTACHED years overlap the
+older ones are read from TEMP copies on that connection (snapshots), made one
+year at a time and redone once the archive file changes.
+
+Archived entries drop out of the full-text index (its delete trigger fires
+when they leave the main table), so search covers the main database only.
+"""
+import os
+import re
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import Column, Index, MetaData, Table, create_engine, literal_column, select, union_all
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, aliased
+
+from src.db.database import DB_BUSY_TIMEOUT_MS
+from src.models.consumption import ConsumptionEntry
+
+ARCHIVE_DIR        = Path(os.getenv("ARCHIVE_DIR", "./data/archive"))
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "730"))
+MAX_ATTACHED       = 8   # SQLite allows 10 attached databases per connection by default
+
+_ARCHIVE_FILE = re.compile(r"^entries-(\d{4})\.db$")
+_WRITE_SCHEMA = "archive_write"
+_SNAPSHOT_SOURCE = "archive_snapshot"
+_tables: dict[str, Table] = {}
+
+
+def archive_path(year: int) -> Path:
+    return ARCHIVE_DIR / f"entries-{year}.db"
+
+
+def archive_years() -> list[int]:
+    """Years that have an archive file, ascending."""
+    if not ARCHIVE_DIR.is_dir():
+        return []
+    return sorted(int(m[1]) for m in map(_ARCHIVE_FILE.match, os.listdir(ARCHIVE_DIR)) if m)
+
+
+def _schema(year: int) -> str:
+    return f"archive_{year}"
+
+
+def _stored_columns() -> list[Column]:
+    """Entry columns that hold data — generated columns (hour, weekday, …) are left out."""
+    return [c for c in ConsumptionEntry.__table__.columns if c.computed is None]
+
+
+def archive_table(schema: str, name: str = "consumption_entries") -> Table:
+    """
+    consumption_entries as it exists in an attached archive: no foreign keys
+    across files and no generated columns — reads compute those (entry_source).
+    """
+    if (schema, name) not in _tables:
+        columns = [Column(c.name, c.type, primary_key=c.primary_key) for c in _stored_columns()]
+        table = Table(name, MetaData(), *columns, schema=schema)
+        if name == "consumption_entries":
+            Index("ix_archive_profile_date", table.c.profile_id, table.c.log_date)
+            Index("ix_archive_food_id", table.c.food_id)
+        else:
+            Index(f"ix_{name}_profile_date", table.c.profile_id, table.c.log_date)
+        _tables[(schema, name)] = table
+    return _tables[(schema, name)]
+
+
+def snapshot_table(year: int) -> Table:
+    return archive_table("temp", f"archived_{year}")
+
+
+def archived_max_id() -> int:
+    """Highest entry id in any archive (0 without archives). Each file is opened on its own, read-only."""
+    top = 0
+    for year in archive_years():
+        reader = create_engine(f"sqlite:///{archive_path(year).resolve().as_uri()}?mode=ro&uri=true")
+        try:
+            with reader.connect() as conn:
+                top = max(top, conn.exec_driver_sql("SELECT max(id) FROM consumption_entries").scalar() or 0)
+        finally:
+            reader.dispose()
+    return top
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def attach(db: Session, years: list[int]) -> None:
+    """ATTACH the archives for `years` read-only to the session's connection, if not already."""
+    conn = db.connection()
+    attached: set[int] = conn.connection.info.setdefault("archives", set())
+    missing = [y for y in years if y not in attached]
+    if not missing:
+        return
+    if len(attached) + len(missing) > MAX_ATTACHED:
+        for year in attached - set(years):
+            conn.exec_driver_sql(f"DETACH DATABASE {_schema(year)}")
+        attached &= set(years)
+    for year in missing:
+        uri = archive_path(year).resolve().as_uri() + "?mode=ro"
+        conn.exec_driver_sql(f"ATTACH DATABASE ? AS {_schema(year)}", (uri,))
+        attached.add(year)
+
+
+def _signature(year: int) -> tuple[int, int]:
+    stat = archive_path(year).stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _snapshot(db: Session, year: int) -> None:
+    """Copy one archive year into a TEMP table of the session's connection."""
+    conn = db.connection()
+    signature = _signature(year)
+    table = snapshot_table(year)
+    conn.exec_driver_sql(f"ATTACH DATABASE ? AS {_SNAPSHOT_SOURCE}", (archive_path(year).resolve().as_uri() + "?mode=ro",))
+    try:
+        # DDL only: pysqlite opens no transaction, so the DETACH below is allowed
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS temp.{table.name}")
+        conn.exec_driver_sql(
+            f"CREATE TEMP TABLE {table.name} AS SELECT {_copy_columns()} FROM {_SNAPSHOT_SOURCE}.consumption_entries"
+        )
+        for index in table.indexes:
+            index.create(conn)
+    finally:
+        conn.exec_driver_sql(f"DETACH DATABASE {_SNAPSHOT_SOURCE}")
+    conn.connection.info.setdefault("snapshots", {})[year] = signature
+
+
+def _sources(db: Session, years: list[int]) -> list[Table]:
+    """
+    A readable table per archive year: attached when it fits, else a snapshot.
+    Years already served either way need no ATTACH, so this is safe inside a
+    transaction once prepare() has run.
+    """
+    info = db.connection().connection.info
+    attached, snapshots = info.setdefault("archives", set()), info.setdefault("snapshots", {})
+    copied = {y for y in years if y not in attached and snapshots.get(y) == _signature(y)}
+    live = [y for y in years if y not in copied]
+    attach(db, live[-MAX_ATTACHED:])
+    for year in live[:-MAX_ATTACHED]:
+        _snapshot(db, year)
+        copied.add(year)
+    return [snapshot_table(y) if y in copied else archive_table(_schema(y)) for y in years]
+
+
+def prepare(db: Session) -> None:
+    """Make every archive year readable on the session's connection (before a transaction starts)."""
+    _sources(db, archive_years())
+
+
+def entry_source(db: Session, start: date | None = None, end: date | None = None):
+    """
+    The entity to query entries between start and end (None = unbounded)
+    with: ConsumptionEntry, or an alias of it that also reads the archives.
+    """
+    years = [y for y in archive_years()
+             if (start is None or y >= start.year) and (end is None or y <= end.year)]
+    if not years:
+        return ConsumptionEntry
+
+    main = ConsumptionEntry.__table__
+    parts = []
+    for table in [main, *_sources(db, years)]:
+        part = select(*(
+            table.c[c.name] if c.name in table.c else literal_column(f"({c.computed.sqltext})").label(c.name)
+            for c in main.columns
+        ))
+        if start is not None:
+            part = part.where(table.c.log_date >= start)
+        if end is not None:
+            part = part.where(table.c.log_date <= end)
+        parts.append(part)
+    return aliased(ConsumptionEntry, union_all(*parts).subquery("consumption_entries"))
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+def _copy_columns() -> str:
+    return ", ".join(c.name for c in _stored_columns())
+
+
+def _open_for_write(conn: Connection, year: int) -> None:
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    conn.exec_driver_sql(f"ATTACH DATABASE ? AS {_WRITE_SCHEMA}", (str(archive_path(year)),))
+    table = archive_table(_WRITE_SCHEMA)
+    table.create(conn, checkfirst=True)
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def archive_entries(engine: Engine, before: date | None = None) -> dict:
+    """
+    Move entries logged before `before` (default: ARCHIVE_AFTER_DAYS ago)
+    into their year's archive. Each year is copied and deleted in one
+    transaction, and re-running is harmless. Ids are never reused
+    (AUTOINCREMENT), so the copy is a plain INSERT: an id already in the
+    archive is an error that rolls the year back, never an overwrite.
+    """
+    cutoff = before or date.today() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    moved: dict[int, int] = {}
+    with engine.connect() as conn:
+        years = [int(y) for (y,) in conn.exec_driver_sql(
+            "SELECT DISTINCT substr(log_date, 1, 4) FROM consumption_entries WHERE log_date < ?",
+            (cutoff.isoformat(),),
+        )]
+        conn.rollback()   # ATTACH can't run inside a transaction
+        columns = _copy_columns()
+        for year in years:
+            upper = min(cutoff, date(year + 1, 1, 1)).isoformat()
+            bounds = (date(year, 1, 1).isoformat(), upper)
+            _open_for_write(conn, year)
+            try:
+                conn.exec_driver_sql(
+                    f"INSERT INTO {_WRITE_SCHEMA}.consumption_entries ({columns}) "
+                    f"SELECT {columns} FROM main.consumption_entries WHERE log_date >= ? AND log_date < ?",
+                    bounds,
+                )
+                moved[year] = conn.exec_driver_sql(
+                    "DELETE FROM main.consumption_entries WHERE log_date >= ? AND log_date < ?", bounds,
+                ).rowcount
+                conn.commit()
+            finally:
+                conn.rollback()
+                conn.exec_driver_sql(f"DETACH DATABASE {_WRITE_SCHEMA}")
+    return {"cutoff": str(cutoff), "archived": moved}
+
+
+def purge_profile(engine: Engine, profile_id: int, delete_main: Callable[[Session], Any]) -> Any:
+    """
+    Delete a profile everywhere: delete_main(session) removes it from the main
+    database (its entries go with it) while the profile's archived entries are
+    deleted from every archive file. All the transactions are opened first and
+    committed back to back once everything succeeded, so an error anywhere
+    leaves every file as it was. Holds the write connection: run it through
+    WRITER.run_exclusive.
+    """
+    archives: list[sqlite3.Connection] = []
+    db = Session(bind=engine)
+    try:
+        prepare(db)   # delete_main reads archived entries (food usage release)
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        for year in archive_years():
+            conn = sqlite3.connect(archive_path(year), timeout=DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            archives.append(conn)
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM consumption_entries WHERE profile_id = ?", (profile_id,))
+        result = delete_main(db)
+        db.commit()
+        # The archives commit once the main delete has; SQLite can't make the
+        # set atomic across files against a crash in between (WAL)
+        for conn in archives:
+            conn.commit()
+        return result
+    except BaseException:
+        db.rollback()
+        for conn in archives:
+            conn.rollback()
+        raise
+    finally:
+        db.close()
+        for conn in archives:
+            conn.close()
+
+
+def archive_stats() -> list[dict]:
+    return [
+        {"year": year, "path": str(archive_path(year)), "bytes": archive_path(year).stat().st_size}
+        for year in archive_years()
+    ]
@@ -1,15 +1,71 @@
+"""
+SQLite engines and sessions — one writer, many read-only readers.
+
+  engine        the single write connection (pool of one), WAL journal.
+                Request handlers don't write through it directly: writes are
+                queued to src/db/writer.py, whose thread owns the connection
+                and group-commits them. Startup migrations, archive moves and
+                offline tools (benchmarks) use it or WriteSession directly —
+                the pool of one serialises them with the writer thread.
+  read_engine   a pool of DB_READ_POOL_SIZE read-only (mode=ro) connections
+                behind SessionLocal / get_db. WAL lets them read while the
+                writer commits, so dashboards never see "database is locked".
+
+Config:
+  SQLITE_DB_PATH       database file (default ./data/digest.db)
+  DB_READ_POOL_SIZE    read connections (default 40 — the request threadpool size)
+  DB_BUSY_TIMEOUT_MS   how long a connection waits on a lock (default 5000)
+"""
 import os
-from sqlalchemy import create_engine
+from pathlib import Path
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from dotenv import load_dotenv
 
+from src.db import instrumentation, slow_queries  # noqa: F401 — registers the slow-query listener
+
 load_dotenv()
 
-DB_PATH = os.getenv("SQLITE_DB_PATH", "./data/digest.db")
-os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
+DB_PATH            = os.getenv("SQLITE_DB_PATH", "./data/digest.db")
+DB_READ_POOL_SIZE  = int(os.getenv("DB_READ_POOL_SIZE", "40"))   # anyio's default thread limit
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# create_engine doesn't connect; the first connection happens in init_db().
+# uri=True lets src/db/archive.py ATTACH archives as file:...?mode=ro
+engine = create_engine(
+    f"sqlite:///{DB_PATH}",
+    connect_args={"check_same_thread": False, "uri": True},
+    pool_size=1,
+    max_overflow=0,
+)
+read_engine = create_engine(
+    f"sqlite:///{Path(DB_PATH).resolve().as_uri()}?mode=ro&uri=true",
+    connect_args={"check_same_thread": False},
+    pool_size=DB_READ_POOL_SIZE,
+    max_overflow=0,
+)
+
 
-engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@event.listens_for(engine, "connect")
+def _configure_writer(dbapi_connection, connection_record):
+    # Only takes effect on a new database (before the first table); existing
+    # ones are converted by the maintenance vacuum task (src/db/maintenance.py)
+    dbapi_connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+    dbapi_connection.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoints; safe with WAL
+    dbapi_connection.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+
+
+@event.listens_for(read_engine, "connect")
+def _configure_reader(dbapi_connection, connection_record):
+    dbapi_connection.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+
+
+instrumentation.install(engine)
+instrumentation.install(read_engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 class Base(DeclarativeBase):
@@ -24,9 +80,28 @@ def get_db():
         db.close()
 
 
+def pool_stats() -> dict[str, dict]:
+    return {
+        name: {
+            "size": e.pool.size(),
+            "checked_out": e.pool.checkedout(),
+            "idle": e.pool.checkedin(),
+        }
+        for name, e in (("read", read_engine), ("write", engine))
+    }
+
+
 def init_db():
+    """
+    Make sure the database exists and is at the current schema version. On an
+    up-to-date database this is a single PRAGMA read (see migrations.migrate).
+    """
     from src.models import consumption  # noqa: F401
+    from src.db.migrations import migrate
+    os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
     reset = os.getenv("RESET_DB", "false").lower() == "true"
     if reset:
         Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA user_version = 0")
+    migrate(engine, Base.metadata)
@@ -0,0 +1,61 @@
+"""
+FTS5 full-text index over consumption_entries (item_name, brand, notes).
+
+External-content table: the text lives only in consumption_entries, the FTS
+table holds the inverted index, and triggers keep the two in sync on every
+insert/update/delete — including bulk inserts during ingestion. Created with
+the entries table (see the DDL events in src/models/consumption.py) and
+added to existing databases by a migration.
+"""
+from sqlalchemy.engine import Connection
+
+FTS_TABLE = "consumption_entries_fts"
+VOCAB_TABLE = "consumption_entries_fts_vocab"
+
+CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        item_name, brand, notes,
+        content='consumption_entries', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    # Term list for fuzzy matching of misspelled queries
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON consumption_entries BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, item_name, brand, notes)
+        VALUES (new.id, new.item_name, new.brand, new.notes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON consumption_entries BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, item_name, brand, notes)
+        VALUES ('delete', old.id, old.item_name, old.brand, old.notes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF item_name, brand, notes ON consumption_entries BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, item_name, brand, notes)
+        VALUES ('delete', old.id, old.item_name, old.brand, old.notes);
+        INSERT INTO {FTS_TABLE}(rowid, item_name, brand, notes)
+        VALUES (new.id, new.item_name, new.brand, new.notes);
+    END
+    """,
+]
+
+DROP_STATEMENTS = [
+    f"DROP TABLE IF EXISTS {VOCAB_TABLE}",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install(conn: Connection) -> None:
+    for statement in CREATE_STATEMENTS:
+        conn.exec_driver_sql(statement)
+
+
+def rebuild(conn: Connection) -> None:
+    """Re-index every existing entry in one pass."""
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
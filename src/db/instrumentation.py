@@ -0,0 +1,69 @@
+"""
+SQLAlchemy engine instrumentation — statement counts and timings.
+
+install(engine) attaches cursor-execute hooks. Each statement is timed and
+added to the RequestStats bound to the current context (set by the API
+middleware), then handed to any registered statement listeners.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class RequestStats:
+    """Per-request SQL totals. Mutated from whichever thread runs the handler."""
+    method: str
+    scope: dict = field(repr=False, default_factory=dict)
+    statements: int = 0
+    sql_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        """Route template (e.g. /consumption/profiles/{profile_id}) — bounded label cardinality."""
+        route = self.scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return route.path
+        return self.scope.get("root_path") or "unmatched"
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+# (statement, parameters, duration_seconds, dbapi_cursor, request_stats_or_None)
+StatementListener = Callable[[str, object, float, object, RequestStats | None], None]
+_listeners: list[StatementListener] = []
+
+
+def add_statement_listener(listener: StatementListener) -> None:
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += duration
+
+    for listener in _listeners:
+        listener(statement, parameters, duration, cursor, stats)
+
+
+def install(engine: Engine) -> None:
+    """Attach timing hooks to an engine. Safe to call more than once."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
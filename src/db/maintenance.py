@@ -0,0 +1,252 @@
+"""
+Database maintenance — online backups, incremental vacuum, ANALYZE.
+
+A daemon thread wakes every MAINTENANCE_TICK_SECONDS and runs whichever task
+is due:
+
+  backup   every BACKUP_INTERVAL_HOURS. SQLite's online backup API copies
+           BACKUP_PAGES_PER_STEP pages at a time from a dedicated read-only
+           connection holding one read transaction, so the snapshot is
+           consistent and neither readers nor the writer wait on it (WAL).
+           Written as BACKUP_DIR/digest-<UTC timestamp>.db; the newest
+           BACKUP_KEEP are kept.
+  vacuum   every VACUUM_INTERVAL_HOURS, idle windows only. Returns free pages
+           to the filesystem with PRAGMA incremental_vacuum, VACUUM_PAGES_PER_STEP
+           at a time, each step a writer-queue job so writes interleave.
+           A database created before auto_vacuum=INCREMENTAL (see
+           src/db/database.py) is converted once with a full VACUUM.
+  analyze  every ANALYZE_INTERVAL_HOURS, idle windows only. ANALYZE with
+           analysis_limit, then PRAGMA optimize, as a writer-queue job.
+
+"Idle" means no request in the last MAINTENANCE_IDLE_SECONDS — the app
+passes in a callable reporting that (see src/api/main.py). Every run is
+recorded with its timing; GET /admin/maintenance shows them and
+POST /admin/maintenance/{task} runs one immediately.
+
+Archive files (src/db/archive.py) only change when entries are archived and
+are not part of the rotating backups.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import Engine
+
+from src.db.database import DB_PATH, engine
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_ENABLED      = os.getenv("MAINTENANCE_ENABLED", "true").lower() == "true"
+MAINTENANCE_TICK_SECONDS = float(os.getenv("MAINTENANCE_TICK_SECONDS", "60"))
+MAINTENANCE_IDLE_SECONDS = float(os.getenv("MAINTENANCE_IDLE_SECONDS", "120"))
+
+BACKUP_DIR             = Path(os.getenv("BACKUP_DIR", "./data/backups"))
+BACKUP_INTERVAL_HOURS  = float(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
+BACKUP_KEEP            = int(os.getenv("BACKUP_KEEP", "7"))
+BACKUP_PAGES_PER_STEP  = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP_MS   = float(os.getenv("BACKUP_STEP_SLEEP_MS", "5"))
+
+VACUUM_INTERVAL_HOURS  = float(os.getenv("VACUUM_INTERVAL_HOURS", "6"))
+VACUUM_PAGES_PER_STEP  = int(os.getenv("VACUUM_PAGES_PER_STEP", "500"))
+ANALYZE_INTERVAL_HOURS = float(os.getenv("ANALYZE_INTERVAL_HOURS", "24"))
+ANALYSIS_LIMIT         = int(os.getenv("ANALYSIS_LIMIT", "1000"))   # rows sampled per index
+
+HISTORY_SIZE = 50
+AUTO_VACUUM_INCREMENTAL = 2
+
+BACKUP_PREFIX = "digest-"
+
+
+# ── Tasks ─────────────────────────────────────────────────────────────────────
+
+def backup(
+    db_path: str = DB_PATH,
+    directory: Path | None = None,
+    keep: int | None = None,
+    pages_per_step: int | None = None,
+) -> dict:
+    """Online snapshot of the database into the backup directory, then prune old ones."""
+    directory = directory or BACKUP_DIR
+    keep = BACKUP_KEEP if keep is None else keep
+    pages_per_step = pages_per_step or BACKUP_PAGES_PER_STEP
+    directory.mkdir(parents=True, exist_ok=True)
+
+    name = f"{BACKUP_PREFIX}{datetime.utcnow():%Y%m%d-%H%M%S-%f}.db"
+    partial = directory / f".{name}.partial"
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+
+    source = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True, isolation_level=None)
+    target = sqlite3.connect(partial)
+    try:
+        # One read transaction for the whole copy: a consistent snapshot that
+        # concurrent commits don't restart
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+        source.backup(target, pages=pages_per_step, progress=progress, sleep=BACKUP_STEP_SLEEP_MS / 1000)
+        source.execute("COMMIT")
+    except BaseException:
+        target.close()
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    target.close()
+    partial.replace(directory / name)
+
+    snapshots = sorted(directory.glob(f"{BACKUP_PREFIX}*.db"), reverse=True)
+    for old in snapshots[keep:]:
+        old.unlink(missing_ok=True)
+    return {
+        "file": name,
+        "bytes": (directory / name).stat().st_size,
+        "steps": steps,
+        "kept": min(len(snapshots), keep),
+    }
+
+
+def _pragma(db, name: str):
+    return db.connection().exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def vacuum(is_idle: Callable[[], bool] = lambda: True, bind: Engine = engine, writer=None) -> dict:
+    """
+    Give free pages back to the filesystem, a step at a time while the app
+    stays idle. Converts a database without incremental auto_vacuum first.
+    """
+    from src.db.writer import WRITER
+    writer = writer or WRITER
+
+    mode = writer.run(lambda db: _pragma(db, "auto_vacuum"))
+    if mode != AUTO_VACUUM_INCREMENTAL:
+        # auto_vacuum only changes with a full VACUUM, which can't run inside
+        # the writer's transaction: run it on the writer's exclusive channel
+        def convert() -> int:
+            with bind.connect() as conn:
+                before = conn.exec_driver_sql("PRAGMA page_count").scalar()
+                conn.exec_driver_sql(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+                conn.exec_driver_sql("VACUUM")
+                return before - conn.exec_driver_sql("PRAGMA page_count").scalar()
+
+        return {"converted": True, "pages_freed": writer.run_exclusive(convert)}
+
+    freed = steps = 0
+    while is_idle():
+        def step(db) -> int:
+            free = _pragma(db, "freelist_count")
+            if free:
+                db.connection().exec_driver_sql(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP})")
+            return free - _pragma(db, "freelist_count")
+
+        released = writer.run(step)
+        if not released:
+            break
+        freed += released
+        steps += 1
+    return {"converted": False, "pages_freed": freed, "steps": steps}
+
+
+def analyze() -> dict:
+    """Refresh the planner statistics (sqlite_stat1)."""
+    from src.db.writer import WRITER
+
+    def run(db) -> int:
+        conn = db.connection()
+        conn.exec_driver_sql(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+        conn.exec_driver_sql("ANALYZE")
+        conn.exec_driver_sql("PRAGMA optimize")
+        return conn.exec_driver_sql("SELECT count(*) FROM sqlite_stat1").scalar()
+
+    return {"stat_rows": WRITER.run(run)}
+
+
+# ── Scheduler ─────────────────────────────────────────────────────────────────
+
+class MaintenanceScheduler:
+    def __init__(self):
+        self.tasks: dict[str, tuple[Callable[[], dict], float, bool]] = {
+            # name → (run, interval seconds, idle windows only)
+            "backup":  (lambda: backup(), BACKUP_INTERVAL_HOURS * 3600, False),
+            "vacuum":  (lambda: vacuum(self.is_idle), VACUUM_INTERVAL_HOURS * 3600, True),
+            "analyze": (lambda: analyze(), ANALYZE_INTERVAL_HOURS * 3600, True),
+        }
+        self.history: deque = deque(maxlen=HISTORY_SIZE)
+        self._last_run: dict[str, float] = {}
+        self._idle_seconds: Callable[[], float] = lambda: float("inf")
+        self._run_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._worker: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self, idle_seconds: Callable[[], float] | None = None) -> None:
+        """Start the background thread; idle_seconds reports time since the last request."""
+        if idle_seconds is not None:
+            self._idle_seconds = idle_seconds
+        if not MAINTENANCE_ENABLED or (self._worker and self._worker.is_alive()):
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._loop, name="db-maintenance", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def is_idle(self) -> bool:
+        return self._idle_seconds() >= MAINTENANCE_IDLE_SECONDS
+
+    def next_due(self, name: str) -> float:
+        """Seconds until `name` is due (intervals count from startup for the first run)."""
+        _, interval, _ = self.tasks[name]
+        last = self._last_run.get(name, self._started_at)
+        return max(0.0, last + interval - time.monotonic())
+
+    def run(self, name: str) -> dict:
+        """Run one task now and record it."""
+        task, _, _ = self.tasks[name]
+        with self._run_lock:
+            started = time.perf_counter()
+            record = {"task": name, "started_at": datetime.utcnow().isoformat(timespec="seconds")}
+            try:
+                record["result"] = task()
+                record["status"] = "ok"
+            except Exception as e:
+                logger.exception("Maintenance task %s failed", name)
+                record["status"] = "error"
+                record["error"] = str(e)
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self._last_run[name] = time.monotonic()
+            self.history.appendleft(record)
+            return record
+
+    def _loop(self) -> None:
+        while not self._stop.wait(MAINTENANCE_TICK_SECONDS):
+            for name, (_, _, idle_only) in self.tasks.items():
+                if self.next_due(name) == 0 and (not idle_only or self.is_idle()):
+                    self.run(name)
+
+    def status(self) -> dict:
+        return {
+            "enabled": MAINTENANCE_ENABLED,
+            "idle": self.is_idle(),
+            "tasks": {
+                name: {
+                    "interval_hours": round(interval / 3600, 2),
+                    "idle_only": idle_only,
+                    "due_in_seconds": round(self.next_due(name)),
+                }
+                for name, (_, interval, idle_only) in self.tasks.items()
+            },
+            "history": list(self.history),
+        }
+
+
+SCHEDULER = MaintenanceScheduler()
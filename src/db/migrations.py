@@ -0,0 +1,212 @@
+"""
+Schema migrations for databases created before a model change.
+
+create_all() only creates missing tables, so column additions and backfills on
+existing tables live here. The applied version is stored in SQLite's
+PRAGMA user_version. A brand-new database gets the current schema from
+create_all() and is stamped with the latest version without running anything.
+
+A database already at SCHEMA_VERSION is left alone — no inspection, no
+create_all() — so a restart costs one PRAGMA read. That makes create_all()
+a fresh-database tool only: a new table for an existing database needs a
+migration entry (even an empty one) to bump the version.
+"""
+from typing import Callable
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.db import fts
+
+
+def _columns(conn: Connection, table: str, generated: bool = False) -> set[str]:
+    """Column names; generated columns only with generated=True (table_info leaves them out)."""
+    pragma = "table_xinfo" if generated else "table_info"
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA {pragma}({table})")}
+
+
+def _add_food_dictionary(conn: Connection) -> None:
+    """v1: foods dictionary + consumption_entries.food_id, backfilled from item_name."""
+    from src.ingestion.foods import normalize_food_name
+
+    if "food_id" not in _columns(conn, "consumption_entries"):
+        conn.exec_driver_sql("ALTER TABLE consumption_entries ADD COLUMN food_id INTEGER REFERENCES foods(id)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_consumption_entries_food_id ON consumption_entries (food_id)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_entries_profile_date ON consumption_entries (profile_id, log_date)"
+    )
+
+    # Distinct names are few even when entries are many — normalize them in Python
+    # (str.lower is Unicode-aware, SQLite's lower() is ASCII-only), then map back
+    # with one UPDATE through a keyed temp table instead of one scan per name.
+    names = conn.exec_driver_sql(
+        "SELECT item_name, min(logged_at), count(*) FROM consumption_entries "
+        "WHERE food_id IS NULL GROUP BY item_name"
+    ).fetchall()
+    if not names:
+        return
+
+    foods: dict[str, list] = {}
+    for item_name, first_seen, count in names:
+        canonical = normalize_food_name(item_name)
+        food = foods.setdefault(canonical, [first_seen, 0])
+        food[0] = min(food[0], first_seen)
+        food[1] += count
+
+    existing = dict(conn.exec_driver_sql("SELECT name, id FROM foods").fetchall())
+    for canonical, (first_seen, count) in foods.items():
+        if canonical in existing:
+            conn.execute(
+                text("UPDATE foods SET usage_count = usage_count + :n WHERE id = :id"),
+                {"n": count, "id": existing[canonical]},
+            )
+        else:
+            conn.execute(
+                text("INSERT INTO foods (name, first_seen_at, usage_count) VALUES (:name, :first, :n)"),
+                {"name": canonical, "first": first_seen, "n": count},
+            )
+
+    conn.exec_driver_sql("CREATE TEMP TABLE food_backfill (item_name TEXT PRIMARY KEY, food_id INTEGER)")
+    conn.execute(
+        text(
+            "INSERT INTO food_backfill (item_name, food_id) "
+            "SELECT :item_name, id FROM foods WHERE name = :canonical"
+        ),
+        [{"item_name": n, "canonical": normalize_food_name(n)} for n, _, _ in names],
+    )
+    conn.exec_driver_sql(
+        "UPDATE consumption_entries SET food_id = "
+        "(SELECT food_id FROM food_backfill WHERE food_backfill.item_name = consumption_entries.item_name) "
+        "WHERE food_id IS NULL"
+    )
+    conn.exec_driver_sql("DROP TABLE food_backfill")
+
+
+def _add_entry_search(conn: Connection) -> None:
+    """v2: FTS5 index over item_name/brand/notes, filled from existing entries."""
+    fts.install(conn)
+    fts.rebuild(conn)
+
+
+def _add_goal_adherence(conn: Connection) -> None:
+    """v3: daily_adherence (created by create_all), filled for every profile with goals."""
+    from sqlalchemy.orm import Session
+
+    from src.analytics.adherence import recompute_adherence
+
+    db = Session(bind=conn)
+    for (profile_id,) in conn.exec_driver_sql("SELECT profile_id FROM profile_goals"):
+        recompute_adherence(db, profile_id)
+    db.flush()
+
+
+def _add_calendar_index(conn: Connection) -> None:
+    """v4: covering index for the calendar month grid."""
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_summaries_calendar "
+        "ON daily_summaries (profile_id, log_date, entry_count, total_calories)"
+    )
+
+
+def _add_food_stats(conn: Connection) -> None:
+    """v5: food_stats (created by create_all), filled from main and archived entries."""
+    from src.analytics import food_stats
+
+    food_stats.backfill(conn)
+
+
+def _rebuild_entries(conn: Connection) -> None:
+    """
+    Recreate consumption_entries from the current model definition. The old
+    table is renamed aside (its indexes and search triggers dropped), the new
+    one is created — which recreates indexes and triggers — and rows are
+    copied across with their ids, so the external-content search index is
+    refilled by the insert trigger as they land.
+    """
+    from src.models.consumption import ConsumptionEntry
+
+    table = ConsumptionEntry.__table__
+    existing = _columns(conn, table.name)
+    conn.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {table.name}_old")
+    attached = conn.exec_driver_sql(
+        "SELECT type, name FROM sqlite_master "
+        f"WHERE tbl_name = '{table.name}_old' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ).fetchall()
+    for kind, name in attached:
+        conn.exec_driver_sql(f"DROP {kind.upper()} {name}")
+
+    table.create(conn)
+    conn.exec_driver_sql(f"INSERT INTO {fts.FTS_TABLE}({fts.FTS_TABLE}) VALUES ('delete-all')")
+    columns = ", ".join(c.name for c in table.columns if c.computed is None and c.name in existing)
+    conn.exec_driver_sql(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {table.name}_old")
+    conn.exec_driver_sql(f"DROP TABLE {table.name}_old")
+
+
+def _add_entry_time_columns(conn: Connection) -> None:
+    """
+    v6: stored generated hour / weekday / iso_week on consumption_entries.
+    SQLite can't ADD a STORED generated column, so the table is rebuilt.
+    """
+    from src.models.consumption import ConsumptionEntry
+
+    if {c.name for c in ConsumptionEntry.__table__.columns} - _columns(conn, "consumption_entries", generated=True):
+        _rebuild_entries(conn)
+
+
+def _autoincrement_entry_ids(conn: Connection) -> None:
+    """
+    v7: AUTOINCREMENT ids on consumption_entries. Without it SQLite hands out
+    max(id) + 1 again once the newest rows were archived, and the archive
+    copy collides with (or overwrote) entries that kept the old id. The
+    sequence starts above the highest archived id too.
+    """
+    from src.db import archive
+
+    sql = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'consumption_entries'"
+    ).scalar()
+    if "AUTOINCREMENT" not in sql.upper():
+        _rebuild_entries(conn)
+
+    top = max(conn.exec_driver_sql("SELECT max(id) FROM consumption_entries").scalar() or 0, archive.archived_max_id())
+    seq = conn.exec_driver_sql("SELECT seq FROM sqlite_sequence WHERE name = 'consumption_entries'").first()
+    if seq is None:
+        conn.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('consumption_entries', ?)", (top,))
+    elif seq[0] < top:
+        conn.exec_driver_sql("UPDATE sqlite_sequence SET seq = ? WHERE name = 'consumption_entries'", (top,))
+
+
+# Append only — position in this list is the schema version it produces.
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _add_food_dictionary,
+    _add_entry_search,
+    _add_goal_adherence,
+    _add_calendar_index,
+    _add_food_stats,
+    _add_entry_time_columns,
+    _autoincrement_entry_ids,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine: Engine, metadata) -> None:
+    """Create missing tables, then bring an existing database up to SCHEMA_VERSION."""
+    with engine.connect() as conn:
+        if get_version(conn) == SCHEMA_VERSION:
+            return
+
+    fresh = not inspect(engine).has_table("consumption_entries")
+    metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        if fresh:
+            conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            return
+        version = get_version(conn)
+        for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {target}")
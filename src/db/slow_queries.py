@@ -0,0 +1,111 @@
+"""
+Slow-query log — statements over a threshold, with their SQLite query plan.
+
+Registered as a statement listener on the engine hooks in
+src/db/instrumentation.py. Entries are kept in a bounded ring buffer and
+served by GET /admin/slow-queries.
+
+Config:
+  SLOW_QUERY_MS        threshold in milliseconds (default 100, negative disables)
+  SLOW_QUERY_LOG_SIZE  ring buffer capacity (default 200)
+"""
+import os
+import re
+import threading
+from collections import deque
+from datetime import datetime
+
+from src.db.instrumentation import RequestStats, add_statement_listener
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and literals so equivalent statements group together."""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def parameter_shape(parameters) -> object:
+    """Types of the bound parameters, never their values (they may be personal data)."""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return {"executemany": len(parameters), "row": parameter_shape(parameters[0])}
+        return [type(v).__name__ for v in parameters]
+    return type(parameters).__name__
+
+
+def _explain(cursor, statement: str, parameters) -> list[str]:
+    """EXPLAIN QUERY PLAN on the same DBAPI connection, rendered as an indented tree."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+    if parameters and isinstance(parameters, (list, tuple)) and isinstance(parameters[0], (list, tuple, dict)):
+        return []
+    try:
+        rows = cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+    except Exception as e:
+        return [f"<plan unavailable: {e}>"]
+
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _notused, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, size: int):
+        self.threshold_ms = threshold_ms
+        self._entries: deque[dict] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._entries.maxlen
+
+    def record(self, statement: str, parameters, seconds: float, cursor, stats: RequestStats | None) -> None:
+        duration_ms = seconds * 1000
+        if self.threshold_ms < 0 or duration_ms < self.threshold_ms:
+            return
+        plan = _explain(cursor, statement, parameters)
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "sql": normalize_sql(statement),
+            "params": parameter_shape(parameters),
+            "method": stats.method if stats else None,
+            "route": stats.route if stats else None,
+            "plan": plan,
+            "full_scans": [
+                line.strip().split()[1] for line in plan
+                if line.strip().startswith("SCAN ") and "USING COVERING INDEX" not in line
+            ],
+        }
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self) -> list[dict]:
+        """Most recent first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+SLOW_QUERY_LOG = SlowQueryLog(
+    threshold_ms=float(os.getenv("SLOW_QUERY_MS", "100")),
+    size=int(os.getenv("SLOW_QUERY_LOG_SIZE", "200")),
+)
+add_statement_listener(SLOW_QUERY_LOG.record)
@@ -0,0 +1,153 @@
+"""
+Single-writer queue — every request-path write goes through one thread.
+
+SQLite allows one writer at a time; letting every request thread write
+through a shared engine turns concurrent ingestion plus dashboard traffic
+into "database is locked" errors and lock convoys. Instead, handlers submit
+jobs — fn(session, *args) — to WRITER and wait for the result. The worker
+thread (same queue shape as the semantic indexer) takes whatever is queued,
+up to WRITE_BATCH_MAX jobs, and runs them in one transaction on the write
+connection, each inside its own SAVEPOINT: a failing job is rolled back and
+gets its exception, the rest of the batch still commits. Results are handed
+back only after the group COMMIT, so a caller's next read sees its write.
+
+Jobs must not commit (ingest_csv, recompute_adherence and friends only
+flush) and should return plain data, not ORM objects — the session is
+closed by the time the caller gets the result.
+
+run_exclusive() is the channel for work that manages its own connection and
+transactions on the write engine — archiving, profile purges across archive
+files, the auto_vacuum conversion. It runs on the writer thread between
+batches, so it never competes with the writer for the pool of one.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from src.db import archive
+from src.db.database import WriteSession
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "64"))
+
+Job = Callable[..., Any]
+
+
+class WriteQueue:
+    def __init__(self, session_factory=WriteSession, batch_max: int = WRITE_BATCH_MAX):
+        self.session_factory = session_factory
+        self.batch_max = batch_max
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self.stats = {"jobs": 0, "failed": 0, "batches": 0, "commit_seconds": 0.0}
+
+    def submit(self, fn: Job, *args, exclusive: bool = False) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._worker.start()
+        self._queue.put((fn, args, future, exclusive))
+        return future
+
+    def run(self, fn: Job, *args) -> Any:
+        """Submit and block until the job's batch has committed."""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Job, *args) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def run_exclusive(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) alone on the writer thread, outside any batch or transaction; block for the result."""
+        return self.submit(fn, *args, exclusive=True).result()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def wait_idle(self) -> None:
+        """Block until every queued job has been committed or failed."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        held = None   # an exclusive job that ended the previous batch
+        while True:
+            job, held = held or self._queue.get(), None
+            if job[3]:
+                self._run_exclusive(job)
+                continue
+            batch = [job]
+            while len(batch) < self.batch_max:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job[3]:
+                    held = job
+                    break
+                batch.append(job)
+            try:
+                self._process(batch)
+            except Exception:
+                logger.exception("Write batch of %d job(s) failed", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _run_exclusive(self, job: tuple) -> None:
+        fn, args, future, _ = job
+        try:
+            if future.set_running_or_notify_cancel():
+                future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._queue.task_done()
+
+    def _process(self, batch: list[tuple]) -> None:
+        results: list[tuple[Future, Any]] = []
+        db: Session = self.session_factory()
+        try:
+            conn = db.connection()
+            # ATTACH is refused inside a transaction, so archives a job might
+            # read (summary rebuilds, usage release) are made readable up front
+            archive.prepare(db)
+            # pysqlite doesn't BEGIN before a SAVEPOINT (and releasing that one
+            # would commit), so open the batch transaction explicitly — IMMEDIATE
+            # takes the write lock once instead of upgrading mid-batch.
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            for fn, args, future, _ in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with db.begin_nested():
+                        results.append((future, fn(db, *args)))
+                except BaseException as e:
+                    self.stats["failed"] += 1
+                    future.set_exception(e)
+            started = time.perf_counter()
+            db.commit()
+            self.stats["commit_seconds"] += time.perf_counter() - started
+        except BaseException as e:
+            db.rollback()
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            db.close()
+        self.stats["batches"] += 1
+        self.stats["jobs"] += len(results)
+        for future, result in results:
+            future.set_result(result)
+
+
+WRITER = WriteQueue()
@@ -0,0 +1,60 @@
+"""
+Food dictionary — one row per canonical (lowercased) food name.
+
+Entries reference it by integer food_id, so grouping and counting run on a
+small integer column instead of lower(item_name) over every row.
+"""
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.db.archive import entry_source
+from src.models.consumption import Food
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+_CHUNK = 500
+
+
+def normalize_food_name(name: str) -> str:
+    """Canonical dictionary key: whitespace-collapsed, Unicode-lowercased."""
+    return " ".join(name.split()).lower()
+
+
+def resolve_food_ids(db: Session, first_seen: dict[str, datetime], counts: dict[str, int]) -> dict[str, int]:
+    """
+    Map canonical names → food ids, creating missing Food rows and adding
+    `counts` to usage_count. Does not commit.
+    """
+    names = list(first_seen)
+    foods: dict[str, Food] = {}
+    for i in range(0, len(names), _CHUNK):
+        chunk = names[i:i + _CHUNK]
+        foods.update({f.name: f for f in db.query(Food).filter(Food.name.in_(chunk))})
+
+    for name in names:
+        food = foods.get(name)
+        if food is None:
+            food = foods[name] = Food(name=name, first_seen_at=first_seen[name], usage_count=0)
+            db.add(food)
+        elif first_seen[name] < food.first_seen_at:
+            food.first_seen_at = first_seen[name]
+        food.usage_count += counts.get(name, 0)
+
+    db.flush()
+    return {name: food.id for name, food in foods.items()}
+
+
+def release_food_usage(db: Session, profile_id: int) -> None:
+    """Subtract a profile's entries from usage_count before its entries are deleted. Does not commit."""
+    E = entry_source(db)
+    rows = (
+        db.query(E.food_id, func.count(E.id))
+        .filter(E.profile_id == profile_id, E.food_id.isnot(None))
+        .group_by(E.food_id)
+        .all()
+    )
+    for food_id, count in rows:
+        db.query(Food).filter(Food.id == food_id).update(
+            {Food.usage_count: Food.usage_count - count}, synchronize_session=False
+        )
@@ -14,10 +14,14 @@ Real export format (confirmed):
 import csv
 import io
 from datetime import datetime, date
-from typing import IO
+from typing import IO, Callable
 
 from sqlalchemy.orm import Session
+from src.db.archive import entry_source
 from src.models.consumption import ConsumptionEntry, DailySummary
+from src.ingestion.foods import normalize_food_name, resolve_food_ids
+from src.analytics.adherence import recompute_adherence
+from src.analytics import food_stats
 
 COL_DATE        = "Date"
 COL_TIME        = "Time"
@@ -35,6 +39,11 @@ COL_CHOLESTEROL = "Cholesterol (mg)"
 COL_SODIUM      = "Sodium (mg)"
 COL_POTASSIUM   = "Potassium (mg)"
 
+PROGRESS_EVERY = 500   # rows parsed / dates rolled up between progress reports
+
+# progress(stage, done, total) — stage is "parsed", "inserted" or "rolled_up"
+Progress = Callable[[str, int, int | None], None]
+
 
 def _parse_float(value: str | None) -> float | None:
     if not value or str(value).strip() == "":
@@ -69,9 +78,11 @@ def _infer_meal_context(logged_at: datetime) -> str:
         return "other"
 
 
-def ingest_csv(file: IO[str], profile_id: int, db: Session) -> dict:
+def ingest_csv(file: IO[str], profile_id: int, db: Session, progress: Progress | None = None) -> dict:
     """
-    Parse a SnapCalorie CSV export and write entries to the DB.
+    Parse a SnapCalorie CSV export and write entries to the DB. Does not
+    commit — callers run it as a writer job (src/db/writer.py) or commit.
+    `progress` is called every PROGRESS_EVERY rows/dates (see src/api/events.py).
 
     Returns: {"inserted": int, "skipped": int, "dates": list[str], "errors": list[str]}
     """
@@ -80,8 +91,13 @@ def ingest_csv(file: IO[str], profile_id: int, db: Session) -> dict:
     skipped = 0
     errors: list[str] = []
     affected_dates: set[date] = set()
+    new_entries: list[tuple[str, ConsumptionEntry]] = []
+    first_seen: dict[str, datetime] = {}
+    food_counts: dict[str, int] = {}
 
     for row_num, row in enumerate(reader, start=2):
+        if progress and (row_num - 1) % PROGRESS_EVERY == 0:
+            progress("parsed", row_num - 1, None)
         item_name = row.get(COL_FOOD, "").strip()
         if not item_name:
             skipped += 1
@@ -123,7 +139,10 @@ def ingest_csv(file: IO[str], profile_id: int, db: Session) -> dict:
                 caffeine_mg  = None,
                 source       = "snapcalorie",
             )
-            db.add(entry)
+            canonical = normalize_food_name(item_name)
+            new_entries.append((canonical, entry))
+            first_seen[canonical] = min(first_seen.get(canonical, logged_at), logged_at)
+            food_counts[canonical] = food_counts.get(canonical, 0) + 1
             affected_dates.add(log_date)
             inserted += 1
         except Exception as e:
@@ -131,10 +150,25 @@ def ingest_csv(file: IO[str], profile_id: int, db: Session) -> dict:
             errors.append(f"Row {row_num} ({item_name!r}): unexpected error — {e}")
             continue
 
-    db.commit()
-
-    for d in affected_dates:
+    # Entries are added only once their food_id is known, so the flush inside
+    # resolve_food_ids doesn't write them and then UPDATE each one again.
+    food_ids = resolve_food_ids(db, first_seen, food_counts)
+    for canonical, entry in new_entries:
+        entry.food_id = food_ids[canonical]
+    db.add_all(entry for _, entry in new_entries)
+    db.flush()
+    food_stats.add_entries(db, profile_id, (entry for _, entry in new_entries))
+    if progress:
+        progress("parsed", inserted + skipped, inserted + skipped)
+        progress("inserted", inserted, inserted)
+
+    for i, d in enumerate(sorted(affected_dates), start=1):
         _rebuild_daily_summary(profile_id, d, db)
+        if progress and (i % PROGRESS_EVERY == 0 or i == len(affected_dates)):
+            progress("rolled_up", i, len(affected_dates))
+    db.flush()
+    if affected_dates:
+        recompute_adherence(db, profile_id, min(affected_dates), max(affected_dates))
 
     return {
         "inserted": inserted,
@@ -145,12 +179,11 @@ def ingest_csv(file: IO[str], profile_id: int, db: Session) -> dict:
 
 
 def _rebuild_daily_summary(profile_id: int, log_date: date, db: Session) -> None:
+    # An import can add to an already-archived day, so read the archive too
+    E = entry_source(db, log_date, log_date)
     entries = (
-        db.query(ConsumptionEntry)
-        .filter(
-            ConsumptionEntry.profile_id == profile_id,
-            ConsumptionEntry.log_date == log_date,
-        )
+        db.query(E)
+        .filter(E.profile_id == profile_id, E.log_date == log_date)
         .all()
     )
 
@@ -181,5 +214,3 @@ def _rebuild_daily_summary(profile_id: int, log_date: date, db: Session) -> None
     existing.total_caffeine_mg    = _sum("caffeine_mg")
     existing.entry_count          = len(entries)
     existing.updated_at           = datetime.utcnow()
-
-    db.commit()
@@ -0,0 +1,197 @@
+"""
+Profile photo pipeline — streamed uploads, content-hashed files, thumbnails.
+
+Uploads are copied to disk PHOTO_CHUNK_SIZE bytes at a time and abandoned as
+soon as they pass PHOTO_MAX_BYTES (the route also counts the request body as
+it arrives and stops past the limit, declared Content-Length or not). Each
+stored original is named after its content hash ({profile_id}-{hash}{ext}),
+so its URL changes whenever the photo does and can be cached forever.
+Photos stored before that are plain {profile_id}{ext}.
+
+A background thread fed by a queue (same shape as the semantic indexer)
+then writes the variants next to the original:
+
+  {stem}.thumb.webp / {stem}.thumb.jpg   PHOTO_THUMB_SIZE square, for cards and avatars
+  {stem}.display.webp                    PHOTO_DISPLAY_SIZE max edge, for the edit modal
+
+Pillow is imported lazily; without it no variants are made and clients keep
+using the original.
+"""
+import hashlib
+import importlib.util
+import logging
+import os
+import queue
+import tempfile
+import threading
+from pathlib import Path
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PHOTO_DIR          = Path("src/static/uploads/profiles")
+PHOTO_URL_PREFIX   = "/static/uploads/profiles/"
+PHOTO_MAX_BYTES    = int(os.getenv("PHOTO_MAX_BYTES", str(5 * 1024 * 1024)))
+PHOTO_CHUNK_SIZE   = int(os.getenv("PHOTO_CHUNK_SIZE", str(64 * 1024)))
+PHOTO_THUMB_SIZE   = int(os.getenv("PHOTO_THUMB_SIZE", "144"))   # 2× the 72px card avatar
+PHOTO_DISPLAY_SIZE = int(os.getenv("PHOTO_DISPLAY_SIZE", "512"))
+PHOTO_QUALITY      = int(os.getenv("PHOTO_QUALITY", "80"))
+
+ALLOWED_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+
+
+class PhotoTooLarge(ValueError):
+    pass
+
+
+class UnsupportedPhoto(ValueError):
+    pass
+
+
+def _thumb_paths(original: Path) -> dict[str, Path]:
+    stem = original.with_suffix("")
+    return {
+        "thumb_webp": stem.with_name(stem.name + ".thumb.webp"),
+        "thumb_jpg":  stem.with_name(stem.name + ".thumb.jpg"),
+        "webp":       stem.with_name(stem.name + ".display.webp"),
+    }
+
+
+async def save_upload(profile_id: int, file: UploadFile, max_bytes: int | None = None) -> Path:
+    """
+    Stream `file` into PHOTO_DIR under a content-hashed name. Raises
+    PhotoTooLarge past max_bytes and UnsupportedPhoto for non-image suffixes.
+    """
+    max_bytes = PHOTO_MAX_BYTES if max_bytes is None else max_bytes
+    suffix = Path(file.filename or "").suffix.lower() or ".jpg"
+    if suffix not in ALLOWED_SUFFIXES:
+        raise UnsupportedPhoto(f"Unsupported photo type {suffix!r}")
+
+    PHOTO_DIR.mkdir(parents=True, exist_ok=True)
+    # A unique temp name: two uploads for one profile may be in flight at once
+    out = await run_in_threadpool(
+        tempfile.NamedTemporaryFile, dir=PHOTO_DIR, prefix=f".{profile_id}-", suffix=".upload", delete=False,
+    )
+    partial = Path(out.name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(PHOTO_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise PhotoTooLarge(f"Photo exceeds {max_bytes // 1024} KB")
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        out.close()
+        partial.unlink(missing_ok=True)
+        raise
+    out.close()
+
+    dest = PHOTO_DIR / f"{profile_id}-{digest.hexdigest()[:12]}{suffix}"
+    partial.replace(dest)
+    return dest
+
+
+def delete_photos(profile_id: int, keep: Path | None = None) -> None:
+    """Remove a profile's stored originals and variants (except `keep` and its variants)."""
+    kept = {keep, *_thumb_paths(keep).values()} if keep else set()
+    # {id}-{hash}.* since content-hashed names, {id}.* before them
+    for path in [*PHOTO_DIR.glob(f"{profile_id}-*"), *PHOTO_DIR.glob(f"{profile_id}.*")]:
+        if path not in kept:
+            path.unlink(missing_ok=True)
+
+
+def delete_replaced(photo_path: str | None, keep: Path) -> None:
+    """
+    Remove the photo a profile's photo_path pointed at before it became `keep`,
+    with its variants. Only that file goes: a concurrent upload for the same
+    profile may have stored a newer one already.
+    """
+    original = _stored_original(photo_path)
+    if original is None or original == keep:
+        return
+    for path in (original, *_thumb_paths(original).values()):
+        path.unlink(missing_ok=True)
+
+
+def _stored_original(photo_path: str | None) -> Path | None:
+    if not photo_path or not photo_path.startswith(PHOTO_URL_PREFIX):
+        return None
+    return PHOTO_DIR / Path(photo_path[len(PHOTO_URL_PREFIX):]).name
+
+
+def photo_url(path: Path) -> str:
+    return PHOTO_URL_PREFIX + path.name
+
+
+def photo_variants(photo_path: str | None) -> dict[str, str]:
+    """URLs of the variants that exist for a stored photo_path (empty until the worker has run)."""
+    original = _stored_original(photo_path)
+    if original is None:
+        return {}
+    return {name: photo_url(path) for name, path in _thumb_paths(original).items() if path.exists()}
+
+
+class PhotoProcessor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: threading.Thread | None = None
+
+    @property
+    def available(self) -> bool:
+        return importlib.util.find_spec("PIL") is not None
+
+    def enqueue(self, original: Path) -> None:
+        if not self.available:
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="photo-variants", daemon=True)
+                self._worker.start()
+        self._queue.put(original)
+
+    def wait_idle(self) -> None:
+        """Block until every queued photo has been processed."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            original = self._queue.get()
+            try:
+                if original.exists():
+                    made = self.make_variants(original)
+                    if not original.exists():   # replaced by a newer upload meanwhile
+                        for path in made.values():
+                            path.unlink(missing_ok=True)
+            except Exception:
+                logger.exception("Could not make photo variants for %s", original)
+            finally:
+                self._queue.task_done()
+
+    def make_variants(self, original: Path) -> dict[str, Path]:
+        from PIL import Image, ImageOps
+
+        targets = _thumb_paths(original)
+        with Image.open(original) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            thumb = ImageOps.fit(img, (PHOTO_THUMB_SIZE, PHOTO_THUMB_SIZE), Image.LANCZOS)
+            display = img.copy()
+            display.thumbnail((PHOTO_DISPLAY_SIZE, PHOTO_DISPLAY_SIZE), Image.LANCZOS)
+
+        # Write to a temp name and rename, so a half-written file is never served
+        for key, image, fmt in (
+            ("thumb_webp", thumb, "WEBP"),
+            ("thumb_jpg", thumb, "JPEG"),
+            ("webp", display, "WEBP"),
+        ):
+            tmp = targets[key].with_name("." + targets[key].name)
+            image.save(tmp, fmt, quality=PHOTO_QUALITY, optimize=True)
+            tmp.replace(targets[key])
+        return targets
+
+
+PROCESSOR = PhotoProcessor()
@@ -1,7 +1,8 @@
 from datetime import datetime, date as date_type
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Column, Computed, Integer, String, Float, DateTime, Date, ForeignKey, Text, UniqueConstraint, Index, DDL, event
 from sqlalchemy.orm import relationship
 from src.db.database import Base
+from src.db import fts
 
 
 class Profile(Base):
@@ -20,8 +21,34 @@ class Profile(Base):
     goals   = relationship("ProfileGoals", back_populates="profile", uselist=False, cascade="all, delete-orphan")
 
 
+class Food(Base):
+    __tablename__ = "foods"
+
+    id            = Column(Integer, primary_key=True, index=True)
+    name          = Column(String, nullable=False, unique=True)  # canonical lowercase
+    first_seen_at = Column(DateTime, nullable=False)
+    usage_count   = Column(Integer, nullable=False, default=0)
+
+
+# Stored generated columns on consumption_entries, computed by SQLite from logged_at.
+# SQLite 3.40 has no %V, so the ISO week is taken from the Thursday of the entry's week.
+_ISO_THURSDAY = "logged_at, '-3 days', 'weekday 4'"
+HOUR_SQL     = "CAST(strftime('%H', logged_at) AS INTEGER)"
+WEEKDAY_SQL  = "(CAST(strftime('%w', logged_at) AS INTEGER) + 6) % 7"
+ISO_WEEK_SQL = (
+    f"CAST(strftime('%Y', {_ISO_THURSDAY}) AS INTEGER) * 100"
+    f" + (CAST(strftime('%j', {_ISO_THURSDAY}) AS INTEGER) - 1) / 7 + 1"
+)
+
+
 class ConsumptionEntry(Base):
     __tablename__ = "consumption_entries"
+    __table_args__ = (
+        Index("ix_entries_profile_date", "profile_id", "log_date"),
+        Index("ix_entries_profile_week", "profile_id", "iso_week"),
+        # Ids are never reused: archived entries keep theirs (src/db/archive.py)
+        {"sqlite_autoincrement": True},
+    )
 
     id           = Column(Integer, primary_key=True, index=True)
     profile_id   = Column(Integer, ForeignKey("profiles.id"), nullable=False)
@@ -29,8 +56,12 @@ class ConsumptionEntry(Base):
     logged_at    = Column(DateTime, nullable=False)
     log_date     = Column(Date, nullable=False)
     meal_context = Column(String)
+    hour         = Column(Integer, Computed(HOUR_SQL, persisted=True))       # 0–23
+    weekday      = Column(Integer, Computed(WEEKDAY_SQL, persisted=True))    # 0 = Monday … 6 = Sunday
+    iso_week     = Column(Integer, Computed(ISO_WEEK_SQL, persisted=True))   # ISO year × 100 + week, e.g. 202606
 
     item_name    = Column(String, nullable=False)
+    food_id      = Column(Integer, ForeignKey("foods.id"), index=True)
     brand        = Column(String)
     category     = Column(String)
 
@@ -55,11 +86,23 @@ class ConsumptionEntry(Base):
     notes     = Column(Text)
 
     profile = relationship("Profile", back_populates="entries")
+    food    = relationship("Food")
+
+
+# Full-text index is created/dropped with the entries table (see src/db/fts.py)
+for _statement in fts.CREATE_STATEMENTS:
+    event.listen(ConsumptionEntry.__table__, "after_create", DDL(_statement))
+for _statement in fts.DROP_STATEMENTS:
+    event.listen(ConsumptionEntry.__table__, "before_drop", DDL(_statement))
 
 
 class DailySummary(Base):
     __tablename__ = "daily_summaries"
-    __table_args__ = (UniqueConstraint("profile_id", "log_date", name="uq_profile_date"),)
+    __table_args__ = (
+        UniqueConstraint("profile_id", "log_date", name="uq_profile_date"),
+        # Covers the calendar month read without touching the table
+        Index("ix_summaries_calendar", "profile_id", "log_date", "entry_count", "total_calories"),
+    )
 
     id         = Column(Integer, primary_key=True, index=True)
     profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False)
@@ -97,3 +140,34 @@ class ProfileGoals(Base):
     updated_at  = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     profile = relationship("Profile", back_populates="goals")
+
+
+class FoodStats(Base):
+    """Per-profile, per-food monthly totals — kept up to date by src/analytics/food_stats.py."""
+    __tablename__ = "food_stats"
+    __table_args__ = (UniqueConstraint("profile_id", "month", "food_id", name="uq_food_stats_month"),)
+
+    id           = Column(Integer, primary_key=True)
+    profile_id   = Column(Integer, ForeignKey("profiles.id"), nullable=False)
+    food_id      = Column(Integer, ForeignKey("foods.id"), nullable=False)
+    month        = Column(Date, nullable=False)      # first day of the month
+    entry_count  = Column(Integer, nullable=False, default=0)
+    calories_sum = Column(Float, nullable=False, default=0)
+    calories_n   = Column(Integer, nullable=False, default=0)   # entries with calories (AVG skips NULLs)
+    protein_sum  = Column(Float, nullable=False, default=0)
+    protein_n    = Column(Integer, nullable=False, default=0)
+
+
+class DailyAdherence(Base):
+    """Per-day, per-metric progress against ProfileGoals — rebuilt by src/analytics/adherence.py."""
+    __tablename__ = "daily_adherence"
+    __table_args__ = (UniqueConstraint("profile_id", "metric", "log_date", name="uq_adherence_metric_date"),)
+
+    id         = Column(Integer, primary_key=True)
+    profile_id = Column(Integer, ForeignKey("profiles.id"), nullable=False)
+    metric     = Column(String, nullable=False)
+    log_date   = Column(Date, nullable=False)
+    goal       = Column(Float, nullable=False)
+    value      = Column(Float, nullable=False)
+    pct        = Column(Float, nullable=False)   # value / goal × 100
+    status     = Column(String, nullable=False)  # "miss" | "hit" | "over"
@@ -0,0 +1,264 @@
+"""
+Semantic index over meal names and notes — persistent local ChromaDB.
+
+Entries are embedded on CPU with Chroma's default ONNX MiniLM embedding
+function and stored under CHROMA_PATH, keyed by entry id. Indexing runs on a
+background thread fed by a queue: ingestion enqueues (profile, dates) jobs,
+the worker coalesces whatever is queued, loads those entries and upserts them
+in SEMANTIC_BATCH_SIZE batches. Each vector carries a hash of its source text,
+so re-ingesting or re-indexing skips rows whose text hasn't changed.
+
+Like keyword search, the index covers the main database only: when entries
+are archived (src/db/archive.py) a forget job drops every vector logged
+before the cutoff, and a profile's vectors go with the profile.
+
+chromadb is imported lazily on first use; if it isn't installed (or
+SEMANTIC_SEARCH=false) the index reports itself unavailable and jobs are dropped.
+"""
+import hashlib
+import importlib.util
+import logging
+import os
+import queue
+import threading
+from datetime import date
+
+from src.db.database import SessionLocal
+from src.models.consumption import ConsumptionEntry
+
+logger = logging.getLogger(__name__)
+
+CHROMA_PATH         = os.getenv("CHROMA_PATH", "./data/chroma")
+SEMANTIC_ENABLED    = os.getenv("SEMANTIC_SEARCH", "true").lower() == "true"
+SEMANTIC_BATCH_SIZE = int(os.getenv("SEMANTIC_BATCH_SIZE", "128"))
+COLLECTION_NAME     = "consumption_entries"
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+_DATE_CHUNK = 500
+
+
+class SemanticUnavailable(RuntimeError):
+    pass
+
+
+def _document(item_name: str, notes: str | None) -> str:
+    return f"{item_name}. {notes}" if notes else item_name
+
+
+def _day_number(d: date) -> int:
+    """Chroma range filters only work on numbers: 2026-02-05 → 20260205."""
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+class SemanticIndex:
+    def __init__(
+        self,
+        path: str,
+        enabled: bool = True,
+        batch_size: int = 128,
+        session_factory=SessionLocal,
+        collection=None,
+    ):
+        """`collection`: an already open collection to use instead of a PersistentClient's."""
+        self.path = path
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self._collection = collection
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: threading.Thread | None = None
+
+    # ── Collection ──────────────────────────────────────────────────────────
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and (self._collection is not None or importlib.util.find_spec("chromadb") is not None)
+
+    def collection(self):
+        if not self.available:
+            raise SemanticUnavailable("Semantic search needs chromadb installed and SEMANTIC_SEARCH=true")
+        with self._lock:
+            if self._collection is None:
+                import chromadb
+                from chromadb.utils import embedding_functions
+
+                client = chromadb.PersistentClient(path=self.path)
+                self._collection = client.get_or_create_collection(
+                    COLLECTION_NAME,
+                    embedding_function=embedding_functions.DefaultEmbeddingFunction(),
+                    metadata={"hnsw:space": "cosine"},
+                )
+            return self._collection
+
+    # ── Writes ──────────────────────────────────────────────────────────────
+
+    def upsert(self, rows) -> int:
+        """
+        Upsert entry rows (id, profile_id, log_date, meal_context, item_name, notes).
+        Returns how many were (re-)embedded; rows whose text hash is unchanged are skipped.
+        """
+        collection = self.collection()
+        embedded = 0
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            ids = [str(r.id) for r in batch]
+            documents = [_document(r.item_name, r.notes) for r in batch]
+            hashes = [hashlib.sha1(doc.encode("utf-8")).hexdigest() for doc in documents]
+
+            stored = collection.get(ids=ids, include=["metadatas"])
+            known = {id_: (meta or {}).get("hash") for id_, meta in zip(stored["ids"], stored["metadatas"])}
+            changed = [j for j, id_ in enumerate(ids) if known.get(id_) != hashes[j]]
+            if not changed:
+                continue
+
+            collection.upsert(
+                ids=[ids[j] for j in changed],
+                documents=[documents[j] for j in changed],
+                metadatas=[
+                    {
+                        "profile_id": batch[j].profile_id,
+                        "log_date": str(batch[j].log_date),
+                        "log_day": _day_number(batch[j].log_date),
+                        "meal_context": batch[j].meal_context or "",
+                        "item_name": batch[j].item_name,
+                        "hash": hashes[j],
+                    }
+                    for j in changed
+                ],
+            )
+            embedded += len(changed)
+        return embedded
+
+    def delete_profile(self, profile_id: int) -> None:
+        self.collection().delete(where={"profile_id": profile_id})
+
+    def forget_before(self, cutoff: date) -> None:
+        """Drop the vectors of entries logged before `cutoff` — they were archived."""
+        self.collection().delete(where={"log_day": {"$lt": _day_number(cutoff)}})
+
+    # ── Background queue ────────────────────────────────────────────────────
+
+    def enqueue(self, profile_id: int, dates: list[str] | None = None) -> None:
+        """Index a profile's entries on `dates` (ISO strings), or all of them when dates is None."""
+        self._submit(("index", profile_id, dates))
+
+    def enqueue_delete(self, profile_id: int) -> None:
+        self._submit(("delete", profile_id, None))
+
+    def enqueue_archived(self, cutoff: date) -> None:
+        self._submit(("forget", None, cutoff))
+
+    def wait_idle(self) -> None:
+        """Block until every queued job has been processed."""
+        self._queue.join()
+
+    def _submit(self, job: tuple) -> None:
+        if not self.available:
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="semantic-index", daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+
+    def _run(self) -> None:
+        while True:
+            jobs = [self._queue.get()]
+            # Coalesce everything already queued — several weekly imports become one pass
+            while True:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._process(jobs)
+            except Exception:
+                logger.exception("Semantic indexing failed for %d job(s)", len(jobs))
+            finally:
+                for _ in jobs:
+                    self._queue.task_done()
+
+    def _process(self, jobs: list[tuple]) -> None:
+        deleted = {profile_id for kind, profile_id, _ in jobs if kind == "delete"}
+        pending: dict[int, set[str] | None] = {}
+        for kind, profile_id, dates in jobs:
+            if kind != "index" or profile_id in deleted:
+                continue
+            if dates is None or pending.get(profile_id, set()) is None:
+                pending[profile_id] = None
+            else:
+                pending.setdefault(profile_id, set()).update(dates)
+
+        for profile_id in deleted:
+            self.delete_profile(profile_id)
+        # Before indexing: rows still in the main table are re-read from it below
+        cutoffs = [cutoff for kind, _, cutoff in jobs if kind == "forget"]
+        if cutoffs:
+            self.forget_before(max(cutoffs))
+
+        db = self.session_factory()
+        try:
+            for profile_id, dates in pending.items():
+                columns = (
+                    ConsumptionEntry.id, ConsumptionEntry.profile_id, ConsumptionEntry.log_date,
+                    ConsumptionEntry.meal_context, ConsumptionEntry.item_name, ConsumptionEntry.notes,
+                )
+                if dates is None:
+                    rows = db.query(*columns).filter(ConsumptionEntry.profile_id == profile_id).all()
+                else:
+                    day_list = sorted(date.fromisoformat(d) for d in dates)
+                    rows = []
+                    for i in range(0, len(day_list), _DATE_CHUNK):
+                        rows += (
+                            db.query(*columns)
+                            .filter(
+                                ConsumptionEntry.profile_id == profile_id,
+                                ConsumptionEntry.log_date.in_(day_list[i:i + _DATE_CHUNK]),
+                            )
+                            .all()
+                        )
+                embedded = self.upsert(rows)
+                logger.info("Semantic index: profile %s, %d rows checked, %d embedded", profile_id, len(rows), embedded)
+        finally:
+            db.close()
+
+    # ── Reads ───────────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        profile_id: int,
+        query: str,
+        limit: int = 10,
+        start: date | None = None,
+        end: date | None = None,
+    ) -> list[dict]:
+        conditions: list[dict] = [{"profile_id": profile_id}]
+        if start:
+            conditions.append({"log_day": {"$gte": _day_number(start)}})
+        if end:
+            conditions.append({"log_day": {"$lte": _day_number(end)}})
+        where = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+        result = self.collection().query(
+            query_texts=[query],
+            n_results=limit,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            {
+                "entry_id": int(id_),
+                "log_date": meta["log_date"],
+                "meal_context": meta["meal_context"] or None,
+                "item_name": meta["item_name"],
+                "text": doc,
+                "similarity": round(1 - distance, 4),
+            }
+            for id_, doc, meta, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+
+INDEX = SemanticIndex(CHROMA_PATH, enabled=SEMANTIC_ENABLED, batch_size=SEMANTIC_BATCH_SIZE)
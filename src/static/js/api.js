@@ -69,6 +69,13 @@ async function getOverview(profileId, date) {
   return apiFetch(`/consumption/profiles/${profileId}/overview${q}`);
 }
 
+async function getOverviewBatch(profileIds, date) {
+  const params = new URLSearchParams();
+  if (profileIds?.length) params.set('ids', profileIds.join(','));
+  if (date) params.set('today', date);
+  return apiFetch(`/consumption/profiles/overview?${params}`);
+}
+
 async function getTrends(profileId, start, end, metrics) {
   const params = new URLSearchParams();
   if (start)   params.set('start', start);
@@ -77,6 +84,21 @@ async function getTrends(profileId, start, end, metrics) {
   return apiFetch(`/consumption/profiles/${profileId}/trends?${params}`);
 }
 
+// Trends page in one request: { trends, averages, favorites, meal_patterns }
+async function getTrendsBundle(profileId, start, end, metrics, favoritesLimit = 10) {
+  const params = new URLSearchParams();
+  if (start)   params.set('start', start);
+  if (end)     params.set('end', end);
+  if (metrics) params.set('metrics', metrics);
+  params.set('favorites_limit', favoritesLimit);
+  return apiFetch(`/consumption/profiles/${profileId}/trends-bundle?${params}`);
+}
+
+async function getCalendarMonth(profileId, month, metrics) {
+  const q = metrics ? `?metrics=${encodeURIComponent(metrics)}` : '';
+  return apiFetch(`/consumption/profiles/${profileId}/calendar/${month}${q}`);
+}
+
 async function getRollingAverages(profileId, start, end, metrics) {
   const params = new URLSearchParams();
   if (start)   params.set('start', start);
@@ -100,6 +122,22 @@ async function getMealPatterns(profileId, start, end) {
   return apiFetch(`/consumption/profiles/${profileId}/meal-patterns?${params}`);
 }
 
+async function getAdherence(profileId, start, end, metrics) {
+  const params = new URLSearchParams();
+  if (start)   params.set('start', start);
+  if (end)     params.set('end', end);
+  if (metrics) params.set('metrics', metrics);
+  return apiFetch(`/consumption/profiles/${profileId}/adherence?${params}`);
+}
+
+async function getCorrelations(profileId, start, end, opts = {}) {
+  const params = new URLSearchParams();
+  if (start) params.set('start', start);
+  if (end)   params.set('end', end);
+  for (const [k, v] of Object.entries(opts)) params.set(k, v);
+  return apiFetch(`/consumption/profiles/${profileId}/correlations?${params}`);
+}
+
 async function getRecentEntries(profileId, limit = 20) {
   return apiFetch(`/consumption/profiles/${profileId}/recent?limit=${limit}`);
 }
@@ -118,6 +156,16 @@ async function uploadCSV(profileId, file) {
   });
 }
 
+/* ---- Events (server-sent) ---- */
+// handlers: { version, progress, changed } — each gets the parsed event data
+function subscribeEvents(profileId, handlers = {}) {
+  const source = new EventSource(`${BASE}/consumption/profiles/${profileId}/events`);
+  for (const [name, fn] of Object.entries(handlers)) {
+    source.addEventListener(name, e => fn(JSON.parse(e.data)));
+  }
+  return source;
+}
+
 /* ---- Entries ---- */
 async function getEntries(profileId, date) {
   return apiFetch(`/consumption/profiles/${profileId}/entries/${date}`);
@@ -155,7 +203,8 @@ function dateNYearsAgo(n) {
 window.API = {
   getProfiles, getProfile, createProfile, updateProfile, deleteProfile, uploadProfilePhoto,
   getGoals, saveGoals,
-  getOverview, getTrends, getRollingAverages, getFavorites, getMealPatterns,
-  getRecentEntries, getDailySummary, getEntries, uploadCSV,
+  getOverview, getOverviewBatch, getTrends, getTrendsBundle, getCalendarMonth, getRollingAverages, getFavorites, getMealPatterns,
+  getAdherence, getCorrelations, getRecentEntries, getDailySummary, getEntries, uploadCSV,
+  subscribeEvents,
   formatDate, today, dateNDaysAgo, dateNMonthsAgo, dateNYearsAgo,
 };
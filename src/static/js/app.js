@@ -15,11 +15,17 @@ function initials(name = '') {
   return name.trim().split(/\s+/).map(w => w[0]).join('').toUpperCase().slice(0, 2);
 }
 
+// Small square variant once the server has generated it, else the original upload
+function photoThumb(profile) {
+  const v = profile.photo_variants || {};
+  return v.thumb_webp || v.thumb_jpg || profile.photo_path;
+}
+
 function renderAvatar(profile, size = 40, extraClass = '') {
   const color = avatarColor(profile.name);
   const init  = initials(profile.name);
   if (profile.photo_path) {
-    return `<img class="avatar ${extraClass}" src="${profile.photo_path}" style="width:${size}px;height:${size}px;" alt="${profile.name}" onerror="this.replaceWith(textAvatar('${init}','${color}',${size},'${extraClass}'))">`;
+    return `<img class="avatar ${extraClass}" src="${photoThumb(profile)}" loading="lazy" decoding="async" style="width:${size}px;height:${size}px;" alt="${profile.name}" onerror="this.replaceWith(textAvatar('${init}','${color}',${size},'${extraClass}'))">`;
   }
   return `<div class="avatar ${extraClass}" style="width:${size}px;height:${size}px;background:${color};font-size:${Math.round(size*0.35)}px;color:#0F1117;">${init}</div>`;
 }
@@ -66,6 +72,7 @@ function setActiveProfile(id) {
   _activeProfileId = id;
   localStorage.setItem('activeProfileId', id);
   renderProfileSelector();
+  watchActiveProfile();
   // Re-render current page so it reacts to new profile
   navigateTo(currentPage());
 }
@@ -74,6 +81,31 @@ function currentPage() {
   return window.location.hash.replace('#', '') || 'trends';
 }
 
+/* ---- Live refresh ----
+   One event stream for the active profile. The current page's refresh_<page>
+   hook refetches its data only when the server's data version moves — on a
+   committed import or goals change, or after a reconnect that missed one. */
+let _events = null;
+let _dataVersion = null;
+
+function watchActiveProfile() {
+  if (_events) _events.close();
+  _events = null;
+  _dataVersion = null;
+  if (!_activeProfileId) return;
+
+  const refreshIfChanged = ({ version }) => {
+    const changed = _dataVersion !== null && version !== _dataVersion;
+    _dataVersion = version;
+    const refreshFn = window[`refresh_${currentPage()}`];
+    if (changed && typeof refreshFn === 'function') refreshFn();
+  };
+  _events = API.subscribeEvents(_activeProfileId, {
+    version: refreshIfChanged,
+    changed: refreshIfChanged,
+  });
+}
+
 /* ---- Sidebar: profile selector ---- */
 function renderProfileSelector() {
   const btn = document.getElementById('profile-selector-btn');
@@ -124,13 +156,13 @@ async function navigateTo(page) {
   content.innerHTML = `<div class="page-loading"><div class="loading-spinner"></div> Loading...</div>`;
 
   try {
-    const res = await fetch(`/static/pages/${page}.html`);
+    const res = await fetch(assetUrl(`/static/pages/${page}.html`));
     if (!res.ok) throw new Error('Page not found');
     const html = await res.text();
     content.innerHTML = html;
 
     // Dynamically load page JS if not already loaded
-    const jsPath = `/static/js/${page}.js`;
+    const jsPath = assetUrl(`/static/js/${page}.js`);
     if (!pageModules[page]) {
       await loadScript(jsPath);
       pageModules[page] = true;
@@ -145,6 +177,12 @@ async function navigateTo(page) {
   }
 }
 
+// Content-hashed URL (served immutable) when the server published a version for it
+function assetUrl(path) {
+  const v = (window.ASSET_VERSIONS || {})[path];
+  return v ? `${path}?v=${v}` : path;
+}
+
 function loadScript(src) {
   return new Promise((resolve, reject) => {
     // Re-run scripts that already exist by removing and re-adding
@@ -234,6 +272,7 @@ async function boot() {
   }
 
   renderProfileSelector();
+  watchActiveProfile();
 
   // Wire up nav links
   document.querySelectorAll('.nav-link').forEach(el => {
@@ -17,17 +17,15 @@ async function loadMonthData() {
   const profile = getActiveProfile();
   if (!profile) return;
 
-  // Build start/end for the entire month
-  const start = `${currentYear}-${String(currentMonth + 1).padStart(2, '0')}-01`;
-  const end   = new Date(currentYear, currentMonth + 1, 0);
-  const endStr = API.formatDate(end);
+  const month = `${currentYear}-${String(currentMonth + 1).padStart(2, '0')}`;
 
   try {
-    const data = await API.getTrends(profile.id, start, endStr, 'calories');
+    const data = await API.getCalendarMonth(profile.id, month, 'calories');
     monthSummaries = {};
-    data.dates.forEach((d, i) => {
-      const v = data.series.calories?.[i];
-      if (v != null) monthSummaries[d] = { total_calories: v };
+    data.series.calories.forEach((v, i) => {
+      if (v == null) return;
+      const dateStr = `${month}-${String(i + 1).padStart(2, '0')}`;
+      monthSummaries[dateStr] = { total_calories: v, entry_count: data.entry_count[i] };
     });
   } catch(e) {
     monthSummaries = {};
@@ -172,6 +170,8 @@ function renderDayDetail(dateStr, entries) {
   panel.innerHTML = html;
 }
 
+window.refresh_history = loadMonthData;
+
 window.init_history = function() {
   const profile = getActiveProfile();
   const noProfile = document.getElementById('history-no-profile');
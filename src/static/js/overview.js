@@ -23,7 +23,7 @@ function progressFillClass(consumed, goal) {
   if (!goal) return '';
   const r = consumed / goal;
   if (r > 1.05) return 'danger';
-  if (r > 0.9)  return 'warning';
+  if (r >= 0.9) return 'warning';
   return '';
 }
 
@@ -41,9 +41,12 @@ async function loadOverview() {
   if (content)   content.style.display = 'block';
 
   try {
-    const data = await API.getOverview(profile.id);
+    const [data, adherence] = await Promise.all([
+      API.getOverview(profile.id),
+      API.getAdherence(profile.id),
+    ]);
     renderKPIs(data);
-    renderProgressBars(data);
+    renderProgressBars(data, adherence);
     renderComparisons(data);
     renderHighlights(data);
     renderRecentEntries(data);
@@ -79,11 +82,12 @@ function renderKPIs(data) {
   }
 }
 
-function renderProgressBars(data) {
+function renderProgressBars(data, adherence) {
   const container = document.getElementById('ov-progress-bars');
   if (!container) return;
 
   const goals = data.goals || {};
+  const daily = (adherence && adherence.metrics) || {};
   const metrics = [
     { key: 'calories',   label: 'Calories', icon: 'ph-flame',      unit: 'kcal', avg: data.avg_calories },
     { key: 'protein_g',  label: 'Protein',  icon: 'ph-egg',        unit: 'g',    avg: data.avg_protein_g },
@@ -97,6 +101,7 @@ function renderProgressBars(data) {
     const goal = goals[m.key];
     const pctVal = goal && val != null ? Math.min((val / goal) * 100, 110) : 0;
     const fillCls = progressFillClass(val || 0, goal);
+    const adh = daily[m.key];
 
     return `
       <div class="progress-group">
@@ -113,6 +118,7 @@ function renderProgressBars(data) {
         <div class="progress-track">
           ${goal ? `<div class="progress-fill ${fillCls}" style="width:${pctVal}%"></div>` : ''}
         </div>
+        ${adh ? `<div class="text-muted font-xs">On target ${adh.hit} of ${adh.days} days (${adh.hit_rate}%)${adh.current_streak ? ` · ${adh.current_streak}-day streak` : ''}</div>` : ''}
       </div>
     `;
   }).join('');
@@ -190,6 +196,8 @@ function renderRecentEntries(data) {
   `).join('');
 }
 
+window.refresh_overview = loadOverview;
+
 window.init_overview = function() {
   loadOverview();
 };
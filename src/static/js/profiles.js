@@ -89,7 +89,7 @@ function renderProfileCard(p, activeId) {
 
   let avatarHtml;
   if (p.photo_path) {
-    avatarHtml = `<img src="${p.photo_path}" style="width:72px;height:72px;border-radius:50%;object-fit:cover;display:block;margin:0 auto 12px;" alt="${p.name}" onerror="this.style.display='none'">`;
+    avatarHtml = `<img src="${photoThumb(p)}" loading="lazy" decoding="async" style="width:72px;height:72px;border-radius:50%;object-fit:cover;display:block;margin:0 auto 12px;" alt="${p.name}" onerror="this.style.display='none'">`;
   } else {
     avatarHtml = `<div style="width:72px;height:72px;border-radius:50%;background:${color};display:flex;align-items:center;justify-content:center;font-size:24px;font-weight:700;color:#0F1117;margin:0 auto 12px;">${init}</div>`;
   }
@@ -146,7 +146,7 @@ window.openEditModal = async function(profileId) {
         document.getElementById('f-feet').value   = Math.floor(p.height_inches / 12);
         document.getElementById('f-inches').value = p.height_inches % 12;
       }
-      updateAvatarPreview(p.name, p.photo_path);
+      updateAvatarPreview(p.name, (p.photo_variants || {}).webp || p.photo_path);
     } catch(e) {
       showToast('Could not load profile: ' + e.message, 'error');
     }
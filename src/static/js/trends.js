@@ -75,16 +75,11 @@ async function loadAll() {
   const metrics = Array.from(activeMetrics).join(',');
 
   try {
-    const [trendsData, avgData, favData, mealData] = await Promise.all([
-      API.getTrends(profile.id, start, end, metrics),
-      API.getRollingAverages(profile.id, start, end, metrics),
-      API.getFavorites(profile.id, start, end, 10),
-      API.getMealPatterns(profile.id, start, end),
-    ]);
-    renderTrendsChart(trendsData);
-    renderAvgCards(avgData);
-    renderFavorites(favData, start, end);
-    renderMealPatterns(mealData);
+    const bundle = await API.getTrendsBundle(profile.id, start, end, metrics, 10);
+    renderTrendsChart(bundle.trends);
+    renderAvgCards(bundle.averages);
+    renderFavorites(bundle.favorites, start, end);
+    renderMealPatterns(bundle.meal_patterns);
   } catch(e) {
     showToast('Error loading trends: ' + e.message, 'error');
   }
@@ -313,6 +308,8 @@ function wireEvents() {
   });
 }
 
+window.refresh_trends = loadAll;
+
 window.init_trends = function() {
   wireEvents();
   loadAll();
@@ -81,6 +81,15 @@ async function doUpload() {
   const result = document.getElementById('upload-result');
   if (result) result.style.display = 'none';
 
+  // Live progress from the server while the import runs
+  const stages = { parsed: 'Parsing', inserted: 'Saving', rolled_up: 'Summarising' };
+  const events = API.subscribeEvents(profileId, {
+    progress: ({ stage, done, total }) => {
+      const count = total ? `${done}/${total}` : `${done}`;
+      btn.innerHTML = `<div class="loading-spinner" style="width:14px;height:14px;border-width:2px"></div> ${stages[stage] || stage}... ${count}`;
+    },
+  });
+
   try {
     const data = await API.uploadCSV(profileId, selectedFile);
     renderResult(data);
@@ -88,6 +97,7 @@ async function doUpload() {
   } catch(e) {
     showToast('Upload failed: ' + e.message, 'error');
   } finally {
+    events.close();
     btn.disabled = false;
     btn.innerHTML = `<i class="ph ph-upload-simple"></i> Upload and Ingest`;
     updateUploadBtn();
@@ -0,0 +1,12 @@
+"""
+Shared test setup. API tests run against a throwaway SQLite file (plus archive
+and backup directories) so they never touch ./data — the paths must be set
+before src.db is imported.
+"""
+import os
+import tempfile
+
+_DATA = tempfile.mkdtemp(prefix="digest-test-")
+os.environ["SQLITE_DB_PATH"] = os.path.join(_DATA, "digest.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(_DATA, "archive")
+os.environ["BACKUP_DIR"] = os.path.join(_DATA, "backups")
@@ -0,0 +1,220 @@
+"""
+Analytics query tests — in-memory SQLite, data loaded through ingest_csv.
+"""
+import io
+import pathlib
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.models.consumption import Profile, Food, ProfileGoals, DailySummary
+from src.ingestion.snapcalorie import ingest_csv
+from src.analytics.queries import get_favorite_foods, get_heatmap, get_meal_pattern_breakdown
+from src.analytics.adherence import get_adherence, recompute_adherence
+from src.analytics import correlations
+
+FIXTURE = pathlib.Path(__file__).parent / "fixtures" / "sample_snapcalorie.csv"
+HEADER = FIXTURE.read_text(encoding="utf-8").splitlines()[0]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def profile(db):
+    p = Profile(name="Test User")
+    db.add(p)
+    db.commit()
+    db.refresh(p)
+    return p
+
+
+def _ingest(db, profile_id, rows: list[str]) -> dict:
+    return ingest_csv(io.StringIO("\n".join([HEADER, *rows]) + "\n"), profile_id, db)
+
+
+def test_food_dictionary_is_shared_and_case_insensitive(db, profile):
+    _ingest(db, profile.id, [
+        "2026-02-05,07:30,Coffee,1,cup,5,,,,,,,,,",
+        "2026-02-05,12:00,COFFEE,1,cup,5,,,,,,,,,",
+        "2026-02-06,08:00,coffee ,1,cup,5,,,,,,,,,",
+    ])
+    other = Profile(name="Other")
+    db.add(other)
+    db.commit()
+    _ingest(db, other.id, ["2026-02-07,09:00,Coffee,1,cup,5,,,,,,,,,"])
+
+    foods = db.query(Food).all()
+    assert [(f.name, f.usage_count) for f in foods] == [("coffee", 4)]
+    assert str(foods[0].first_seen_at) == "2026-02-05 07:30:00"
+
+
+def test_favorites_group_by_food(db, profile):
+    _ingest(db, profile.id, [
+        "2026-02-05,07:30,Oatmeal,1,cup,150,5,,,,,,,,",
+        "2026-02-06,07:30,oatmeal,1,cup,170,7,,,,,,,,",
+        "2026-02-06,12:30,Salad,1,bowl,300,10,,,,,,,,",
+    ])
+    favorites = get_favorite_foods(db, profile.id, date(2026, 2, 1), date(2026, 2, 28))
+    assert favorites[0] == {"food": "oatmeal", "count": 2, "avg_calories": 160.0, "avg_protein_g": 6.0}
+    assert favorites[1]["food"] == "salad"
+    assert get_favorite_foods(db, profile.id, date(2026, 2, 1), date(2026, 2, 28), limit=1) == favorites[:1]
+
+
+def test_favorites_from_monthly_buckets_match_entries(db, profile):
+    from sqlalchemy import func
+    from src.models.consumption import ConsumptionEntry, FoodStats
+
+    rows, day = [], date(2025, 11, 20)
+    for i in range(120):
+        food = ("Oatmeal", "Salad", "Eggs", "Rice")[i % 4 if i % 3 else 0]
+        calories = "" if i % 7 == 0 else str(100 + i)
+        rows.append(f"{day + timedelta(days=i)},08:00,{food},1,cup,{calories},{i % 9},,,,,,,,")
+    _ingest(db, profile.id, rows[:60])
+    _ingest(db, profile.id, rows[60:])   # second import adds to existing buckets
+    assert db.query(func.sum(FoodStats.entry_count)).scalar() == 120
+
+    def from_entries(start, end):
+        E = ConsumptionEntry
+        result = (
+            db.query(Food.name, func.count(E.id), func.avg(E.calories), func.avg(E.protein_g))
+            .join(Food, Food.id == E.food_id)
+            .filter(E.log_date >= start, E.log_date <= end)
+            .group_by(Food.name)
+            .order_by(func.count(E.id).desc(), Food.name)
+            .all()
+        )
+        return [(name, n, round(cal, 1) if cal else None, round(p, 1) if p else None) for name, n, cal, p in result]
+
+    for start, end in [
+        (date(2025, 11, 25), date(2026, 3, 5)),    # edges on both sides
+        (date(2025, 12, 1), date(2026, 1, 31)),    # whole months only
+        (date(2026, 1, 3), date(2026, 1, 20)),     # inside one month
+        (date(2020, 1, 1), date(2030, 12, 31)),    # "All"
+    ]:
+        favorites = get_favorite_foods(db, profile.id, start, end)
+        assert [tuple(f.values()) for f in favorites] == from_entries(start, end), (start, end)
+
+
+def test_trends_bundle_matches_separate_queries(db, profile):
+    from src.analytics import queries
+
+    ingest_csv(io.StringIO(FIXTURE.read_text(encoding="utf-8")), profile.id, db)
+    _ingest(db, profile.id, [
+        "2026-02-05,19:00,Steak,1,oz,,30,,,,,,,,",
+        "2026-02-06,23:30,Popcorn,1,bowl,150,,,,,,,,,",
+        "2026-02-07,08:00,Oatmeal,1,cup,150,5,,,,,,,,",
+    ])
+    start, end, metrics = date(2026, 2, 1), date(2026, 2, 28), ["calories", "protein_g", "fiber_g"]
+    bundle = queries.get_trends_bundle(db, profile.id, start, end, metrics, favorites_limit=3)
+    assert bundle == {
+        "trends": queries.get_trend_data(db, profile.id, start, end, metrics),
+        "averages": queries.get_rolling_averages(db, profile.id, start, end, metrics),
+        "favorites": get_favorite_foods(db, profile.id, start, end, 3),
+        "meal_patterns": get_meal_pattern_breakdown(db, profile.id, start, end),
+    }
+
+
+def test_heatmap_weekday_by_hour(db, profile):
+    _ingest(db, profile.id, [
+        "2026-02-02,08:10,Oatmeal,1,cup,150,5,,,,,,,,",    # Monday
+        "2026-02-09,08:45,Oatmeal,1,cup,170,,,,,,,,,",     # Monday
+        "2026-02-08,23:30,Popcorn,1,bowl,,,,,,,,,,",       # Sunday
+        "2026-03-02,08:00,Oatmeal,1,cup,999,,,,,,,,,",     # outside the range
+    ])
+    heatmap = get_heatmap(db, profile.id, date(2026, 2, 1), date(2026, 2, 28))
+    assert heatmap["weekdays"][0] == "Mon"
+    assert heatmap["count"][0][8] == 2 and heatmap["sum"][0][8] == 320
+    assert heatmap["count"][6][23] == 1 and heatmap["sum"][6][23] is None
+    assert sum(map(sum, heatmap["count"])) == 3
+    assert get_heatmap(db, profile.id, date(2026, 2, 1), date(2026, 2, 28), "protein_g")["sum"][0][8] == 5
+
+
+def test_meal_patterns_top_foods(db, profile):
+    ingest_csv(io.StringIO(FIXTURE.read_text(encoding="utf-8")), profile.id, db)
+    patterns = {p["meal"]: p for p in get_meal_pattern_breakdown(db, profile.id, date(2026, 2, 1), date(2026, 2, 28))}
+    assert patterns["breakfast"]["entry_count"] == 2
+    assert patterns["breakfast"]["top_foods"] == ["scrambled eggs", "steak"]
+    assert patterns["dinner"]["top_foods"] == ["brown rice"]
+
+
+def test_adherence_rates_and_streaks(db, profile):
+    db.add(ProfileGoals(profile_id=profile.id, calories=2000))
+    db.commit()
+    _ingest(db, profile.id, [
+        "2026-02-01,12:00,Pasta,1,bowl,1000,,,,,,,,,",   # miss (50%)
+        "2026-02-02,12:00,Pasta,1,bowl,1900,,,,,,,,,",   # hit
+        "2026-02-03,12:00,Pasta,1,bowl,2000,,,,,,,,,",   # hit
+        "2026-02-04,12:00,Pasta,1,bowl,2600,,,,,,,,,",   # over
+        "2026-02-05,12:00,Pasta,1,bowl,2050,,,,,,,,,",   # hit
+        "2026-02-07,12:00,Pasta,1,bowl,1950,,,,,,,,,",   # hit, after a gap
+    ])
+    result = get_adherence(db, profile.id, date(2026, 2, 1), date(2026, 2, 7))["metrics"]
+    assert list(result) == ["calories"]
+    cal = result["calories"]
+    assert (cal["days"], cal["hit"], cal["miss"], cal["over"]) == (6, 4, 1, 1)
+    assert cal["hit_rate"] == 66.7
+    assert (cal["current_streak"], cal["longest_streak"]) == (1, 2)
+
+    # Changing the goal reclassifies history
+    db.query(ProfileGoals).filter_by(profile_id=profile.id).update({"calories": 2600})
+    recompute_adherence(db, profile.id)
+    db.commit()
+    cal = get_adherence(db, profile.id, date(2026, 2, 1), date(2026, 2, 7))["metrics"]["calories"]
+    assert (cal["hit"], cal["miss"], cal["over"]) == (1, 5, 0)
+
+
+def test_correlations_find_lagged_threshold_effect(db, profile):
+    # High caffeine every third day; calories drop the day after
+    start = date(2025, 1, 1)
+    for i in range(90):
+        caffeine = 450 if i % 3 == 0 else 100
+        calories = 1500 if i % 3 == 1 else 2200 + (i % 5) * 10
+        db.add(DailySummary(
+            profile_id=profile.id, log_date=start + timedelta(days=i), entry_count=3,
+            total_caffeine_mg=caffeine, total_calories=calories, total_protein_g=calories / 20,
+        ))
+    db.commit()
+    correlations.CACHE.clear()
+
+    result = correlations.get_correlations(
+        db, profile.id, start, start + timedelta(days=89),
+        metrics=["calories", "protein_g", "caffeine_mg"], max_lag=2,
+        thresholds={"caffeine_mg": 400}, threshold_lag=1,
+    )
+    cal, prot, caf = 0, 1, 2
+    assert result["days_logged"] == 90
+    assert result["pearson"][cal][prot] == 1.0
+    assert result["spearman"][cal][prot] == 1.0
+    assert result["lagged"][0]["pearson"][caf][cal] < -0.9
+    assert result["threshold"]["mean_above"][caf][cal] == 1500.0
+    assert result["threshold"]["mean_below"][caf][cal] > 2200
+    assert result["threshold"]["n_above"][caf][cal] == 30
+    assert {"a": "caffeine_mg", "b": "calories", "lag": 1} in [
+        {k: s[k] for k in ("a", "b", "lag")} for s in result["strongest"]
+    ]
+
+    # Served from cache until the data version changes
+    again = correlations.get_correlations(
+        db, profile.id, start, start + timedelta(days=89),
+        metrics=["calories", "protein_g", "caffeine_mg"], max_lag=2,
+        thresholds={"caffeine_mg": 400}, threshold_lag=1,
+    )
+    assert again is result
+    db.add(DailySummary(profile_id=profile.id, log_date=start + timedelta(days=90), entry_count=1))
+    db.commit()
+    assert correlations.get_correlations(
+        db, profile.id, start, start + timedelta(days=89),
+        metrics=["calories", "protein_g", "caffeine_mg"], max_lag=2,
+        thresholds={"caffeine_mg": 400}, threshold_lag=1,
+    ) is not result
@@ -0,0 +1,341 @@
+"""
+API tests — FastAPI TestClient against a temporary SQLite file (see conftest.py).
+"""
+import io
+import pathlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+
+FIXTURE = pathlib.Path(__file__).parent / "fixtures" / "sample_snapcalorie.csv"
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def profile_id(client):
+    r = client.post("/consumption/profiles", json={"name": "API User"})
+    pid = r.json()["id"]
+    with FIXTURE.open("rb") as f:
+        client.post(f"/consumption/profiles/{pid}/ingest/snapcalorie", files={"file": ("s.csv", f, "text/csv")})
+    yield pid
+    client.delete(f"/consumption/profiles/{pid}")
+
+
+def test_server_timing_header(client, profile_id):
+    r = client.get(f"/consumption/profiles/{profile_id}/summaries")
+    assert r.status_code == 200
+    timing = r.headers["server-timing"]
+    assert "app;dur=" in timing
+    assert "db;dur=" in timing
+    # profile lookup + summaries query
+    assert 'desc="2 queries"' in timing
+
+
+def test_metrics_exposition(client, profile_id):
+    client.get(f"/consumption/profiles/{profile_id}/trends?start=2026-02-01&end=2026-02-10")
+    body = client.get("/metrics").text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'route="/consumption/profiles/{profile_id}/trends"' in body
+    assert "db_statements_per_request_bucket" in body
+    assert "db_statement_duration_seconds_count" in body
+    assert 'db_pool_size{pool="write"} 1' in body
+    assert "db_write_batches_total" in body
+
+
+def test_concurrent_writes_and_reads(client, profile_id):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def write(i):
+        return client.post(f"/consumption/profiles/{profile_id}/goals", json={"calories": 1800 + i}).status_code
+
+    def read(_):
+        return client.get(f"/consumption/profiles/{profile_id}/summaries").status_code
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        writes = pool.map(write, range(20))
+        reads = pool.map(read, range(40))
+        assert set(writes) == {200} and set(reads) == {200}
+    assert client.get(f"/consumption/profiles/{profile_id}/goals").json()["calories"] >= 1800
+
+
+def test_slow_query_log_captures_plan(client, profile_id, monkeypatch):
+    from src.db.slow_queries import SLOW_QUERY_LOG
+    monkeypatch.setattr(SLOW_QUERY_LOG, "threshold_ms", 0)
+    client.delete("/admin/slow-queries")
+    client.get(f"/consumption/profiles/{profile_id}/favorites?start=2026-02-01&end=2026-02-10")
+    monkeypatch.setattr(SLOW_QUERY_LOG, "threshold_ms", -1)
+
+    entries = client.get("/admin/slow-queries").json()["entries"]
+    favorites = [e for e in entries if e["route"] == "/consumption/profiles/{profile_id}/favorites"]
+    assert favorites
+    query = next(e for e in favorites if "GROUP BY" in e["sql"])
+    assert query["plan"]
+    assert query["params"] and all(isinstance(t, str) for t in query["params"])
+    assert "'" not in query["sql"]
+
+
+def test_profiling_opt_in(client, profile_id, monkeypatch, tmp_path):
+    from src.api import profiling
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", False)
+    r = client.get(f"/consumption/profiles/{profile_id}/overview?today=2026-02-06&_profile=1")
+    assert "x-profile-id" not in r.headers
+
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    r = client.get(f"/consumption/profiles/{profile_id}/overview?today=2026-02-06",
+                   headers={"X-Profile": "1"})
+    assert r.status_code == 200
+    profile_name = r.headers["x-profile-id"]
+    assert "overview" in profile_name
+
+    listing = client.get("/admin/profiler").json()["profiles"]
+    assert [p["id"] for p in listing] == [profile_name]
+
+    collapsed = client.get(f"/admin/profiler/{profile_name}?format=collapsed").text
+    assert "get_overview_data (queries.py:" in collapsed
+    assert client.get(f"/admin/profiler/{profile_name}").content
+    assert client.get("/admin/profiler/digest.db").status_code == 404
+
+    # Overlapping a running profile, the request is served unprofiled
+    with profiling._running:
+        r = client.get(f"/consumption/profiles/{profile_id}/overview?today=2026-02-06",
+                       headers={"X-Profile": "1"})
+    assert r.status_code == 200 and "x-profile-id" not in r.headers
+
+
+def test_batch_overview_constant_queries(client, profile_id):
+    single = client.get(f"/consumption/profiles/{profile_id}/overview?today=2026-02-06").json()
+    other = client.post("/consumption/profiles", json={"name": "Empty"}).json()["id"]
+
+    r = client.get(f"/consumption/profiles/overview?ids={profile_id},{other}&today=2026-02-06")
+    assert r.status_code == 200
+    body = r.json()
+    assert [o["profile_id"] for o in body] == [profile_id, other]
+    assert {k: v for k, v in body[0].items() if k != "profile_id"} == single
+    assert body[0]["streak"] == 2
+    assert body[1]["days_logged"] == 0 and body[1]["most_logged_food"] is None
+
+    one = client.get(f"/consumption/profiles/overview?ids={profile_id}&today=2026-02-06")
+    assert one.headers["server-timing"].split('desc="')[1] == r.headers["server-timing"].split('desc="')[1]
+    client.delete(f"/consumption/profiles/{other}")
+
+
+def test_adherence_follows_goal_changes(client, profile_id):
+    url = f"/consumption/profiles/{profile_id}/adherence?start=2026-02-05&end=2026-02-06"
+    assert client.get(url).json()["metrics"] == {}
+
+    client.post(f"/consumption/profiles/{profile_id}/goals", json={"protein_g": 75})
+    protein = client.get(url).json()["metrics"]["protein_g"]
+    assert protein["days"] == 2 and protein["hit"] == 2
+
+
+def test_correlations_endpoint(client, profile_id):
+    r = client.get(f"/consumption/profiles/{profile_id}/correlations?start=2026-02-01&end=2026-02-10&max_lag=2")
+    assert r.status_code == 200
+    body = r.json()
+    assert len(body["pearson"]) == len(body["metrics"])
+    assert [entry["lag"] for entry in body["lagged"]] == [1, 2]
+    bad = client.get(f"/consumption/profiles/{profile_id}/correlations?thresholds=caffeine_mg")
+    assert bad.status_code == 422
+
+
+def test_trends_bundle_is_one_request_two_queries(client, profile_id):
+    query = "start=2026-02-01&end=2026-02-28&metrics=calories,protein_g"
+    r = client.get(f"/consumption/profiles/{profile_id}/trends-bundle?{query}&favorites_limit=5")
+    assert r.status_code == 200
+    assert r.headers["server-timing"].endswith('desc="2 queries"')
+    bundle = r.json()
+    base = f"/consumption/profiles/{profile_id}"
+    assert bundle["trends"] == client.get(f"{base}/trends?{query}").json()
+    assert bundle["averages"] == client.get(f"{base}/averages?{query}").json()
+    assert bundle["favorites"] == client.get(f"{base}/favorites?{query}&limit=5").json()
+    assert bundle["meal_patterns"] == client.get(f"{base}/meal-patterns?{query}").json()
+
+
+def test_calendar_month(client, profile_id):
+    r = client.get(f"/consumption/profiles/{profile_id}/calendar/2026-02")
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == "private, no-cache"
+    body = r.json()
+    assert body["days"] == 28 and len(body["series"]["calories"]) == 28
+    assert body["series"]["calories"][3] is None and body["entry_count"][3] == 0
+    assert body["series"]["calories"][4] == 670 and body["entry_count"][4] == 3
+
+    # Unchanged → 304; an import into the (already ended) month changes the validator
+    url, etag = f"/consumption/profiles/{profile_id}/calendar/2026-02", r.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    client.post(
+        f"/consumption/profiles/{profile_id}/ingest/snapcalorie",
+        files={"file": ("late.csv", f"{FIXTURE.read_text().splitlines()[0]}\n2026-02-20,08:00,Toast,1,slice,80,,,,,,,,,\n", "text/csv")},
+    )
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    assert r.json()["series"]["calories"][19] == 80
+    assert client.get(f"/consumption/profiles/{profile_id}/calendar/2026-13").status_code == 422
+
+
+def test_heatmap(client, profile_id):
+    r = client.get(f"/consumption/profiles/{profile_id}/heatmap?start=2026-02-01&end=2026-02-28")
+    assert r.status_code == 200
+    body = r.json()
+    assert len(body["count"]) == 7 and len(body["count"][0]) == 24
+    assert body["count"][3][7] == 1 and body["sum"][3][7] == 180   # Thu 2026-02-05 07:30
+    assert client.get(f"/consumption/profiles/{profile_id}/heatmap?metric=bogus").status_code == 422
+
+
+def test_entries_rows_serialize_like_before(client, profile_id):
+    entries = client.get(f"/consumption/profiles/{profile_id}/entries?log_date=2026-02-05").json()
+    assert entries[0]["logged_at"] == "2026-02-05T07:30:00"
+    assert entries[0]["log_date"] == "2026-02-05"
+    assert entries[0]["item_name"] == "Scrambled Eggs"
+    summary = client.get(f"/consumption/profiles/{profile_id}/summaries?start=2026-02-05&end=2026-02-05").json()
+    assert summary == [client.get(f"/consumption/profiles/{profile_id}/summary/2026-02-05").json()]
+
+
+def test_json_compression_above_threshold(client, profile_id):
+    big = client.get(f"/consumption/profiles/{profile_id}/entries", headers={"Accept-Encoding": "gzip"})
+    assert big.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in big.headers["vary"].lower()
+    assert big.json()[0]["item_name"] == "Scrambled Eggs"
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    plain = client.get(f"/consumption/profiles/{profile_id}/entries", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+def test_static_assets_hashed_and_precompressed(client):
+    from src.api.assets import ASSETS, IMMUTABLE
+
+    ASSETS.wait_idle()
+    index = client.get("/trends")
+    version = ASSETS.assets["/static/vendor/chart.umd.min.js"].version
+    assert f'/static/vendor/chart.umd.min.js?v={version}' in index.text
+    assert "window.ASSET_VERSIONS" in index.text
+    assert client.get("/trends", headers={"If-None-Match": index.headers["etag"]}).status_code == 304
+
+    hashed = client.get(f"/static/vendor/chart.umd.min.js?v={version}", headers={"Accept-Encoding": "gzip"})
+    assert hashed.headers["cache-control"] == IMMUTABLE
+    assert hashed.headers["content-encoding"] == "gzip"
+    assert int(hashed.headers["content-length"]) < len(hashed.content)
+
+    unversioned = client.get("/static/vendor/chart.umd.min.js")
+    assert unversioned.headers["cache-control"] == "no-cache"
+    revalidated = client.get("/static/vendor/chart.umd.min.js", headers={"If-None-Match": unversioned.headers["etag"]})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+
+
+def test_photo_upload_limits_and_variants(client, profile_id, monkeypatch):
+    from src.media import photos
+    Image = pytest.importorskip("PIL.Image")
+
+    buf = io.BytesIO()
+    Image.new("RGB", (600, 400), "orange").save(buf, "PNG")
+    r = client.post(f"/consumption/profiles/{profile_id}/photo", files={"file": ("me.png", buf.getvalue(), "image/png")})
+    assert r.status_code == 200
+    photo_path = r.json()["photo_path"]
+    assert photo_path.startswith(f"/static/uploads/profiles/{profile_id}-")
+
+    photos.PROCESSOR.wait_idle()
+    variants = client.get(f"/consumption/profiles/{profile_id}").json()["photo_variants"]
+    assert set(variants) == {"thumb_webp", "thumb_jpg", "webp"}
+    thumb = client.get(variants["thumb_webp"])
+    assert thumb.headers["cache-control"].endswith("immutable")
+    assert Image.open(io.BytesIO(thumb.content)).size == (photos.PHOTO_THUMB_SIZE, photos.PHOTO_THUMB_SIZE)
+
+    # A new photo removes the one it replaced and its variants, and nothing else:
+    # an overlapping upload's file (committed after this one) must survive
+    first = photos.PHOTO_DIR / photo_path.rsplit("/", 1)[1]
+    overlapping = photos.PHOTO_DIR / f"{profile_id}-000000000000.png"
+    overlapping.write_bytes(b"newer")
+    buf = io.BytesIO()
+    Image.new("RGB", (600, 400), "teal").save(buf, "PNG")
+    r = client.post(f"/consumption/profiles/{profile_id}/photo", files={"file": ("me.png", buf.getvalue(), "image/png")})
+    photo_path = r.json()["photo_path"]
+    photos.PROCESSOR.wait_idle()
+    assert not list(photos.PHOTO_DIR.glob(first.stem + "*"))
+    assert overlapping.exists() and (photos.PHOTO_DIR / photo_path.rsplit("/", 1)[1]).exists()
+
+    monkeypatch.setattr(photos, "PHOTO_MAX_BYTES", 1024)
+    r = client.post(f"/consumption/profiles/{profile_id}/photo", files={"file": ("big.png", b"x" * 4096, "image/png")})
+    assert r.status_code == 413
+    r = client.post(f"/consumption/profiles/{profile_id}/photo", files={"file": ("notes.txt", b"hi", "text/plain")})
+    assert r.status_code == 415
+
+    assert not list(photos.PHOTO_DIR.glob(f".{profile_id}-*"))
+    # The rejected uploads left the stored photo alone
+    assert client.get(f"/consumption/profiles/{profile_id}").json()["photo_path"] == photo_path
+
+    # A photo stored under the old {id}.jpg name goes with the profile too
+    legacy = photos.PHOTO_DIR / f"{profile_id}.jpg"
+    legacy.write_bytes(b"old")
+    client.delete(f"/consumption/profiles/{profile_id}")
+    assert not list(photos.PHOTO_DIR.glob(f"{profile_id}-*")) and not legacy.exists()
+
+
+def test_photo_body_is_cut_off_while_arriving():
+    import anyio
+    from starlette.requests import Request
+    from src.api.routes.consumption import _body_limited
+    from src.media import photos
+
+    # Chunked, no Content-Length: the parser stops pulling once the limit is passed
+    pulled = 0
+    head = b'--b\r\nContent-Disposition: form-data; name="file"; filename="big.png"\r\n\r\n'
+
+    async def receive():
+        nonlocal pulled
+        pulled += 1
+        return {"type": "http.request", "body": head if pulled == 1 else b"x" * 1024, "more_body": True}
+
+    scope = {"type": "http", "method": "POST", "headers": [(b"content-type", b"multipart/form-data; boundary=b")]}
+    with pytest.raises(photos.PhotoTooLarge):
+        anyio.run(lambda: _body_limited(Request(scope, receive), 8 * 1024).form())
+    assert pulled < 12
+
+
+def test_maintenance_runs_are_timed(client, profile_id):
+    for task in ("backup", "analyze", "vacuum"):
+        record = client.post(f"/admin/maintenance/{task}").json()
+        assert record["status"] == "ok", record
+        assert record["duration_ms"] >= 0
+    assert client.post("/admin/maintenance/defrag").status_code == 404
+
+    status = client.get("/admin/maintenance").json()
+    assert [r["task"] for r in status["history"][:3]] == ["vacuum", "analyze", "backup"]
+    assert len(status["backups"]) == 1
+    assert status["history"][1]["result"]["stat_rows"] > 0
+    assert status["tasks"]["vacuum"]["idle_only"] is True
+
+
+def test_event_stream_reports_progress_then_change(client, profile_id):
+    import asyncio
+    from src.api import events
+
+    assert client.get("/consumption/profiles/999999/events").status_code == 404
+
+    async def listen() -> list[str]:
+        stream = events.stream(profile_id)
+        messages = [await stream.__anext__()]
+        upload = asyncio.create_task(asyncio.to_thread(
+            client.post, f"/consumption/profiles/{profile_id}/ingest/snapcalorie",
+            files={"file": ("s.csv", FIXTURE.read_bytes(), "text/csv")},
+        ))
+        while "event: changed" not in messages[-1]:
+            messages.append(await asyncio.wait_for(stream.__anext__(), 5))
+        assert (await upload).status_code == 200
+        await stream.aclose()
+        return messages
+
+    messages = asyncio.run(listen())
+    assert messages[0].startswith("event: version\n")
+    stages = [m for m in messages if m.startswith("event: progress")]
+    assert '"stage":"inserted"' in stages[-2] and '"stage":"rolled_up"' in stages[-1]
+    assert '"reason":"ingest"' in messages[-1]
+    assert events.EVENTS.subscriber_count() == 0
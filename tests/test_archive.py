@@ -0,0 +1,168 @@
+"""
+Archive tests — move old entries into per-year files and read them back
+through the query layer.
+"""
+import io
+import pathlib
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from src.db import archive
+from src.db.database import Base
+from src.models.consumption import ConsumptionEntry, DailySummary, Food, Profile
+from src.ingestion.foods import release_food_usage
+from src.ingestion.snapcalorie import ingest_csv
+from src.analytics.queries import get_favorite_foods, get_heatmap, get_meal_pattern_breakdown, get_recent_entries
+
+HEADER = (pathlib.Path(__file__).parent / "fixtures" / "sample_snapcalorie.csv").read_text().splitlines()[0]
+ROWS = [
+    "2023-06-01,08:00,Oatmeal,1,cup,150,5,,,,,,,,",
+    "2023-06-01,12:30,Salad,1,bowl,300,10,,,,,,,,",
+    "2024-03-02,08:00,oatmeal,1,cup,170,7,,,,,,,,",
+    "2026-02-05,08:00,Oatmeal,1,cup,160,6,,,,,,,,",
+]
+EVERYTHING = (date(2020, 1, 1), date(2030, 1, 1))
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path / "archive")
+    engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}", connect_args={"uri": True})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add(Profile(id=1, name="Archivist"))
+    session.commit()
+    ingest_csv(io.StringIO("\n".join([HEADER, *ROWS]) + "\n"), 1, session)
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_archive_moves_old_years(engine, db):
+    before = get_favorite_foods(db, 1, *EVERYTHING)
+    patterns = get_meal_pattern_breakdown(db, 1, *EVERYTHING)
+
+    result = archive.archive_entries(engine, date(2025, 1, 1))
+    assert result["archived"] == {2023: 2, 2024: 1}
+    assert archive.archive_years() == [2023, 2024]
+    assert db.query(ConsumptionEntry).count() == 1
+
+    assert get_favorite_foods(db, 1, *EVERYTHING) == before
+    assert get_meal_pattern_breakdown(db, 1, *EVERYTHING) == patterns
+    assert [f["count"] for f in get_favorite_foods(db, 1, date(2026, 1, 1), date(2026, 12, 31))] == [1]
+    assert len(get_recent_entries(db, 1)) == 4
+
+    # Re-running is a no-op, and archives are never written through the read path
+    assert archive.archive_entries(engine, date(2025, 1, 1))["archived"] == {}
+    with pytest.raises(Exception, match="readonly"):
+        db.connection().exec_driver_sql("DELETE FROM archive_2023.consumption_entries")
+    db.rollback()
+
+
+def test_backfill_after_archiving_never_reuses_archived_ids(engine, db):
+    def backfill(*rows):
+        ingest_csv(io.StringIO("\n".join([HEADER, *rows]) + "\n"), 1, db)
+        db.commit()
+
+    # The highest ids are archived, so max(id) + 1 would hand them out again
+    backfill("2022-05-01,12:00,Salad,1,bowl,300,,,,,,,,,", "2022-05-01,19:00,Soup,1,bowl,200,,,,,,,,,")
+    archive.archive_entries(engine, date(2025, 1, 1))
+    backfill("2022-05-02,08:00,Bread,1,slice,80,,,,,,,,,", "2022-05-02,09:00,Egg,1,large,70,,,,,,,,,")
+
+    E = archive.entry_source(db)
+    ids = [i for (i,) in db.query(E.id)]
+    assert len(ids) == len(set(ids)) == 8
+    db.rollback()
+    assert archive.archive_entries(engine, date(2025, 1, 1))["archived"] == {2022: 2}
+    names = db.query(E.item_name).filter(E.log_date < date(2023, 1, 1)).order_by(E.item_name).all()
+    assert [n for (n,) in names] == ["Bread", "Egg", "Salad", "Soup"]
+
+
+def test_food_stats_backfill_reads_archives(engine, db):
+    from src.analytics import food_stats
+    from src.models.consumption import FoodStats
+
+    archive.archive_entries(engine, date(2024, 3, 1))
+    expected = get_favorite_foods(db, 1, *EVERYTHING)
+    db.close()
+    with engine.begin() as conn:
+        conn.execute(FoodStats.__table__.delete())
+        food_stats.backfill(conn)
+    assert get_favorite_foods(db, 1, *EVERYTHING) == expected
+    assert db.query(func.sum(FoodStats.entry_count)).scalar() == 4
+
+
+def test_only_overlapping_archives_are_attached(engine, db):
+    archive.archive_entries(engine, date(2025, 1, 1))
+    assert archive.entry_source(db, date(2026, 1, 1), date(2026, 2, 28)) is ConsumptionEntry
+    archive.entry_source(db, date(2024, 1, 1), date(2024, 12, 31))
+    assert db.connection().connection.info["archives"] == {2024}
+
+
+def test_archived_entries_compute_time_columns(engine, db):
+    before = get_heatmap(db, 1, *EVERYTHING)
+    archive.archive_entries(engine, date(2025, 1, 1))
+    assert get_heatmap(db, 1, *EVERYTHING) == before
+    assert before["count"][3][8] == 2   # Thursday 08:00, 2023-06-01 and 2026-02-05
+
+
+def test_more_archive_years_than_can_be_attached(engine, db):
+    from src.db.writer import WriteQueue
+
+    toast = [f"{year}-03-01,08:00,Toast,1,slice,80,,,,,,,,," for year in range(2008, 2023)]
+    ingest_csv(io.StringIO("\n".join([HEADER, *toast]) + "\n"), 1, db)
+    db.commit()
+    archive.archive_entries(engine, date(2025, 1, 1))
+    assert len(archive.archive_years()) == 17 > archive.MAX_ATTACHED
+
+    E = archive.entry_source(db)
+    assert db.query(E).filter(E.profile_id == 1).count() == 19
+    assert len(get_recent_entries(db, 1, limit=50)) == 19
+    assert sum(map(sum, get_heatmap(db, 1, date(2000, 1, 1), date(2030, 1, 1))["count"])) == 19
+
+    # The writer reads every year inside its transaction; a changed archive is copied again
+    writer = WriteQueue(sessionmaker(bind=engine))
+    assert writer.run(lambda w: w.query(archive.entry_source(w)).count()) == 19
+    db.close()
+    writer.run_exclusive(archive.purge_profile, engine, 1, lambda w: w.delete(w.get(Profile, 1)))
+    assert writer.run(lambda w: w.query(archive.entry_source(w)).count()) == 0
+    assert db.query(archive.entry_source(db)).count() == 0
+
+
+def test_import_into_archived_day_keeps_its_summary(engine, db):
+    archive.archive_entries(engine, date(2025, 1, 1))
+    ingest_csv(io.StringIO(f"{HEADER}\n2023-06-01,19:00,Soup,1,bowl,200,,,,,,,,,\n"), 1, db)
+    summary = db.query(DailySummary).filter_by(profile_id=1, log_date=date(2023, 6, 1)).one()
+    assert (summary.entry_count, summary.total_calories) == (3, 650)
+
+
+def test_profile_delete_releases_and_purges_archived_entries(engine, db):
+    archive.archive_entries(engine, date(2025, 1, 1))
+    db.close()
+
+    def delete(main, fail=False):
+        release_food_usage(main, 1)
+        main.delete(main.get(Profile, 1))
+        main.flush()
+        if fail:
+            raise RuntimeError("boom")
+
+    # A failure leaves the main database and every archive as they were
+    with pytest.raises(RuntimeError):
+        archive.purge_profile(engine, 1, lambda main: delete(main, fail=True))
+    E = archive.entry_source(db)
+    assert db.query(E).count() == 4 and db.get(Profile, 1) is not None
+    db.close()
+
+    archive.purge_profile(engine, 1, delete)
+    assert db.query(func.sum(Food.usage_count)).scalar() == 0
+    E = archive.entry_source(db)
+    assert db.query(E).count() == 0
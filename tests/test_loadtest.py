@@ -0,0 +1,60 @@
+"""
+Load test report tests — the mix parser and the numbers the saturation curve
+is built from. The load run itself needs a server and is not part of pytest.
+"""
+import argparse
+import os
+from unittest import mock
+
+import pytest
+
+# The module points SQLITE_DB_PATH and friends at scratch paths on import
+with mock.patch.dict(os.environ):
+    from benchmarks.loadtest import Sample, _percentiles, level_report, parse_mix, summarize
+
+
+def _sample(route="GET /recent", seconds=0.01, status=200, error=None):
+    return Sample(route=route, started=0.0, seconds=seconds, status=status, error=error)
+
+
+def test_parse_mix():
+    assert parse_mix("dashboard=60,entries=25, goals=10,upload") == {
+        "dashboard": 60.0, "entries": 25.0, "goals": 10.0, "upload": 1.0,
+    }
+    with pytest.raises(argparse.ArgumentTypeError, match="unknown operation"):
+        parse_mix("dashboard=1,delete=1")
+    with pytest.raises(argparse.ArgumentTypeError, match="positive weight"):
+        parse_mix("dashboard=0,entries=0")
+
+
+def test_percentiles():
+    assert _percentiles([]) == {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    assert _percentiles([0.02]) == {"p50_ms": 20.0, "p95_ms": 20.0, "p99_ms": 20.0, "max_ms": 20.0}
+    p = _percentiles([i / 1000 for i in range(1, 101)])   # 1 … 100 ms
+    assert p == pytest.approx({"p50_ms": 50.5, "p95_ms": 95.05, "p99_ms": 99.01, "max_ms": 100.0}, abs=0.1)
+
+
+def test_summarize_counts_errors_by_kind():
+    samples = [
+        _sample(), _sample(),
+        _sample(status=500, error="http"),
+        _sample(status=404, error="http"),
+        _sample(status=None, error="timeout"),
+    ]
+    s = summarize(samples, elapsed=2.0)
+    assert s["requests"] == 5 and s["rps"] == 2.5
+    assert s["errors"] == 3 and s["error_rate"] == 0.6
+    assert s["timeouts"] == 1 and s["status_5xx"] == 1
+    assert summarize([], elapsed=0)["rps"] == 0.0 and summarize([], elapsed=1)["error_rate"] == 0.0
+
+
+def test_level_report_groups_routes_and_adds_server_failures():
+    samples = [_sample("GET /recent")] * 3 + [_sample("POST /goals", seconds=0.2, status=500, error="http")]
+    level = level_report(samples, 2.0, concurrency=4, failures={"lock_timeouts": 1, "pool_timeouts": 0})
+    assert level["concurrency"] == 4 and level["seconds"] == 2.0
+    assert list(level["routes"]) == ["GET /recent", "POST /goals"]
+    assert level["routes"]["GET /recent"]["requests"] == 3
+    assert level["routes"]["POST /goals"]["errors"] == 1
+    assert level["summary"]["lock_timeouts"] == 1 and level["summary"]["lock_timeout_rate"] == 0.25
+    # Against --url there is no server log to count failures from
+    assert "lock_timeouts" not in level_report(samples, 2.0, 4, None)["summary"]
@@ -0,0 +1,75 @@
+"""
+Maintenance tests — online backups, auto_vacuum conversion, incremental vacuum.
+"""
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db import maintenance
+from src.db.writer import WriteQueue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "m.db"
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO t (payload) VALUES (?)", [("x" * 200,)] * 5000)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_backup_is_a_consistent_snapshot_during_writes(db_path, tmp_path):
+    stop = threading.Event()
+
+    def write():
+        conn = sqlite3.connect(db_path)
+        while not stop.is_set():
+            conn.execute("INSERT INTO t (payload) VALUES ('y')")
+            conn.commit()
+        conn.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        result = maintenance.backup(str(db_path), tmp_path / "backups", keep=2, pages_per_step=8)
+    finally:
+        stop.set()
+        writer.join()
+    assert result["steps"] > 1
+
+    snapshot = sqlite3.connect(tmp_path / "backups" / result["file"])
+    assert snapshot.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert snapshot.execute("SELECT count(*) FROM t WHERE payload != 'y'").fetchone() == (5000,)
+    snapshot.close()
+
+    for _ in range(2):
+        maintenance.backup(str(db_path), tmp_path / "backups", keep=2)
+    names = sorted(p.name for p in (tmp_path / "backups").iterdir())
+    assert len(names) == 2 and result["file"] not in names
+
+
+def test_vacuum_converts_then_releases_free_pages(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", pool_size=1, max_overflow=0)
+    writer = WriteQueue(sessionmaker(bind=engine))
+
+    first = maintenance.vacuum(bind=engine, writer=writer)
+    assert first["converted"] is True
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == maintenance.AUTO_VACUUM_INCREMENTAL
+        conn.exec_driver_sql("DELETE FROM t WHERE id % 2 = 0")
+        free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    assert free > 0
+
+    second = maintenance.vacuum(bind=engine, writer=writer)
+    assert second == {"converted": False, "pages_freed": free, "steps": second["steps"]}
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA freelist_count").scalar() == 0
+
+    # Never starts stepping while the app is busy
+    assert maintenance.vacuum(lambda: False, bind=engine, writer=writer)["steps"] == 0
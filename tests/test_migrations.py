@@ -0,0 +1,169 @@
+"""
+Migration tests — build a database with the pre-migration schema, run
+migrate(), and check the backfills.
+"""
+from datetime import datetime, date
+
+import pytest
+from sqlalchemy import MetaData, Table, create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.db.migrations import SCHEMA_VERSION, get_version, migrate
+from src.models.consumption import ConsumptionEntry, Food
+
+# Columns that only exist once a migration has run
+MIGRATED_COLUMNS = {"consumption_entries": {"food_id", "hour", "weekday", "iso_week"}}
+MIGRATED_TABLES = {"foods", "daily_adherence", "food_stats"}
+
+
+def _create_v0_schema(engine) -> None:
+    legacy = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name in MIGRATED_TABLES:
+            continue
+        skip = MIGRATED_COLUMNS.get(table.name, set())
+        Table(table.name, legacy, *(c._copy() for c in table.columns if c.name not in skip))
+    legacy.create_all(bind=engine)
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    _create_v0_schema(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO profiles (id, name) VALUES (1, 'Old User')")
+        for i, (name, logged_at) in enumerate([
+            ("Steak", "2025-01-02 08:00:00"),
+            ("steak", "2025-01-01 19:00:00"),
+            ("Brown  Rice", "2025-01-03 12:00:00"),
+        ]):
+            conn.exec_driver_sql(
+                "INSERT INTO consumption_entries (profile_id, logged_at, log_date, item_name) VALUES (1, ?, ?, ?)",
+                (logged_at, logged_at[:10], name),
+            )
+    return engine
+
+
+def test_fresh_database_is_stamped_current(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    migrate(engine, Base.metadata)
+    with engine.connect() as conn:
+        assert get_version(conn) == SCHEMA_VERSION
+
+
+def test_food_dictionary_backfill(legacy_engine):
+    assert "food_id" not in {c["name"] for c in inspect(legacy_engine).get_columns("consumption_entries")}
+    migrate(legacy_engine, Base.metadata)
+
+    db = sessionmaker(bind=legacy_engine)()
+    foods = {f.name: f for f in db.query(Food).all()}
+    assert set(foods) == {"steak", "brown rice"}
+    assert foods["steak"].usage_count == 2
+    assert foods["steak"].first_seen_at == datetime(2025, 1, 1, 19, 0)
+
+    entries = db.query(ConsumptionEntry).all()
+    assert all(e.food_id is not None for e in entries)
+    assert {e.food.name for e in entries if e.item_name.lower() == "steak"} == {"steak"}
+    with legacy_engine.connect() as conn:
+        assert get_version(conn) == SCHEMA_VERSION
+    db.close()
+
+
+def test_migrate_is_idempotent(legacy_engine):
+    migrate(legacy_engine, Base.metadata)
+    migrate(legacy_engine, Base.metadata)
+    db = sessionmaker(bind=legacy_engine)()
+    assert db.query(Food).filter_by(name="steak").one().usage_count == 2
+    db.close()
+
+
+def test_search_index_backfill(legacy_engine):
+    from src.analytics.search import search_entries
+    migrate(legacy_engine, Base.metadata)
+    db = sessionmaker(bind=legacy_engine)()
+    result = search_entries(db, 1, "steak", fuzzy=False)
+    assert len(result["results"]) == 2
+    db.close()
+
+
+def test_adherence_backfill(legacy_engine):
+    from src.models.consumption import DailyAdherence
+    with legacy_engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO profile_goals (profile_id, calories) VALUES (1, 2000)")
+        conn.exec_driver_sql(
+            "INSERT INTO daily_summaries (profile_id, log_date, total_calories, entry_count) "
+            "VALUES (1, '2025-01-01', 1900, 1), (1, '2025-01-02', 2500, 1)"
+        )
+    migrate(legacy_engine, Base.metadata)
+    db = sessionmaker(bind=legacy_engine)()
+    statuses = {str(a.log_date): a.status for a in db.query(DailyAdherence).filter_by(metric="calories")}
+    assert statuses == {"2025-01-01": "hit", "2025-01-02": "over"}
+    db.close()
+
+
+def test_food_stats_backfill(legacy_engine):
+    from src.models.consumption import FoodStats
+    migrate(legacy_engine, Base.metadata)
+    db = sessionmaker(bind=legacy_engine)()
+    steak = db.query(Food).filter_by(name="steak").one()
+    buckets = {(s.food_id, s.month): s.entry_count for s in db.query(FoodStats)}
+    assert buckets[(steak.id, date(2025, 1, 1))] == 2
+    assert sum(buckets.values()) == 3
+    db.close()
+
+
+def test_entry_time_columns_rebuild(legacy_engine):
+    from src.analytics.search import search_entries
+    migrate(legacy_engine, Base.metadata)
+    db = sessionmaker(bind=legacy_engine)()
+    entries = {e.logged_at: e for e in db.query(ConsumptionEntry)}
+    first = entries[datetime(2025, 1, 1, 19, 0)]
+    assert (first.hour, first.weekday, first.iso_week) == (19, 2, 202501)   # a Wednesday
+    assert entries[datetime(2025, 1, 3, 12, 0)].food.name == "brown rice"
+
+    indexes = {i["name"] for i in inspect(legacy_engine).get_indexes("consumption_entries")}
+    assert {"ix_entries_profile_date", "ix_entries_profile_week", "ix_consumption_entries_food_id"} <= indexes
+    assert not inspect(legacy_engine).has_table("consumption_entries_old")
+    # Search index and its triggers survive the rebuild
+    assert len(search_entries(db, 1, "steak", fuzzy=False)["results"]) == 2
+    db.add(ConsumptionEntry(profile_id=1, logged_at=datetime(2025, 1, 4, 9, 0), log_date=date(2025, 1, 4), item_name="Steak"))
+    db.commit()
+    assert len(search_entries(db, 1, "steak", fuzzy=False)["results"]) == 3
+    db.close()
+
+
+def test_entry_time_columns_skip_current_table(tmp_path, monkeypatch):
+    from src.db import migrations
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    Base.metadata.create_all(bind=engine)
+    rebuilds = []
+    monkeypatch.setattr(migrations, "_rebuild_entries", rebuilds.append)
+    with engine.begin() as conn:
+        migrations._add_entry_time_columns(conn)
+    assert rebuilds == []
+
+
+def test_entry_ids_autoincrement_past_archives(legacy_engine, tmp_path, monkeypatch):
+    from src.db import archive
+
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path / "archive")
+    archive.ARCHIVE_DIR.mkdir()
+    archived = create_engine(f"sqlite:///{archive.archive_path(2020)}")
+    with archived.begin() as conn:
+        table = archive.archive_table("main")
+        table.create(conn)
+        conn.execute(table.insert().values(
+            id=40, profile_id=1, logged_at=datetime(2020, 5, 1, 8), log_date=date(2020, 5, 1), item_name="Tea",
+        ))
+    archived.dispose()
+
+    migrate(legacy_engine, Base.metadata)
+    with legacy_engine.begin() as conn:
+        sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'consumption_entries'").scalar()
+        assert "AUTOINCREMENT" in sql
+        conn.exec_driver_sql(
+            "INSERT INTO consumption_entries (profile_id, logged_at, log_date, item_name) "
+            "VALUES (1, '2025-01-04 09:00:00', '2025-01-04', 'Toast')"
+        )
+        assert conn.exec_driver_sql("SELECT max(id) FROM consumption_entries").scalar() == 41
@@ -0,0 +1,115 @@
+"""
+Full-text search tests — in-memory SQLite with the FTS5 index created by create_all.
+"""
+import base64
+import io
+import json
+import pathlib
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.models.consumption import Profile, ConsumptionEntry
+from src.ingestion.snapcalorie import ingest_csv
+from src.analytics.search import FUZZY_CUTOFF, InvalidCursor, _length_window, search_entries
+
+FIXTURE = pathlib.Path(__file__).parent / "fixtures" / "sample_snapcalorie.csv"
+HEADER = FIXTURE.read_text(encoding="utf-8").splitlines()[0]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def profile(db):
+    p = Profile(name="Test User")
+    db.add(p)
+    db.commit()
+    ingest_csv(io.StringIO("\n".join([
+        HEADER,
+        "2026-01-03,12:00,Beef Pho,1,bowl,450,30,,,,,,,,",
+        "2026-01-10,19:00,Chicken Pho,1,bowl,420,28,,,,,,,,",
+        "2026-01-20,12:30,Photo Booth Popcorn,1,bag,300,3,,,,,,,,",
+        "2026-01-21,08:00,Oatmeal,1,cup,150,5,,,,,,,,",
+    ]) + "\n"), p.id, db)
+    return p
+
+
+def _names(result) -> list[str]:
+    return [r["item_name"] for r in result["results"]]
+
+
+def test_prefix_match_and_ranking(db, profile):
+    result = search_entries(db, profile.id, "pho")
+    assert set(_names(result)) == {"Beef Pho", "Chicken Pho", "Photo Booth Popcorn"}
+    assert not result["fuzzy"]
+    assert _names(search_entries(db, profile.id, "chicken pho")) == ["Chicken Pho"]
+
+
+def test_recent_order_and_date_filter(db, profile):
+    assert _names(search_entries(db, profile.id, "pho", order="recent")) == [
+        "Photo Booth Popcorn", "Chicken Pho", "Beef Pho",
+    ]
+    result = search_entries(db, profile.id, "pho", start=date(2026, 1, 5), end=date(2026, 1, 15))
+    assert _names(result) == ["Chicken Pho"]
+
+
+def test_keyset_pagination(db, profile):
+    seen = []
+    cursor = None
+    while True:
+        page = search_entries(db, profile.id, "pho", order="recent", limit=1, cursor=cursor)
+        seen += _names(page)
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == ["Photo Booth Popcorn", "Chicken Pho", "Beef Pho"]
+    with pytest.raises(InvalidCursor):
+        search_entries(db, profile.id, "pho", cursor="not-a-cursor")
+    for key in ([{"a": 1}, "x", True], ["x", [], False], [1.5, True, False], [1.5, 2, "yes"]):
+        cursor = base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+        with pytest.raises(InvalidCursor):
+            search_entries(db, profile.id, "pho", cursor=cursor)
+
+
+def test_fuzzy_fallback(db, profile):
+    result = search_entries(db, profile.id, "oatmeel")
+    assert result["fuzzy"]
+    assert _names(result) == ["Oatmeal"]
+    assert search_entries(db, profile.id, "oatmeel", fuzzy=False)["results"] == []
+
+
+def test_fuzzy_length_window_keeps_every_possible_match():
+    for length in range(1, 40):
+        shortest, longest = _length_window(length)
+        for other in range(1, 80):
+            # The best ratio two terms of these lengths can reach
+            best = 2 * min(length, other) / (length + other)
+            assert (shortest <= other <= longest) == (best >= FUZZY_CUTOFF), (length, other)
+
+
+def test_index_follows_updates_and_deletes(db, profile):
+    entry = db.query(ConsumptionEntry).filter_by(item_name="Oatmeal").one()
+    entry.notes = "with blueberries"
+    db.commit()
+    assert _names(search_entries(db, profile.id, "blueberr")) == ["Oatmeal"]
+    db.delete(entry)
+    db.commit()
+    assert search_entries(db, profile.id, "oatmeal", fuzzy=False)["results"] == []
+
+
+def test_other_profiles_are_not_searched(db, profile):
+    other = Profile(name="Other")
+    db.add(other)
+    db.commit()
+    assert search_entries(db, other.id, "pho", fuzzy=False)["results"] == []
@@ -0,0 +1,142 @@
+"""
+Semantic index tests — the queue, hashing and filters against an in-memory
+stand-in for the Chroma collection (no embeddings involved).
+"""
+import io
+import pathlib
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.ingestion.snapcalorie import ingest_csv
+from src.models.consumption import ConsumptionEntry, Profile
+from src.semantic.index import SemanticIndex
+
+HEADER = (pathlib.Path(__file__).parent / "fixtures" / "sample_snapcalorie.csv").read_text().splitlines()[0]
+
+
+def _matches(meta: dict, where: dict) -> bool:
+    if "$and" in where:
+        return all(_matches(meta, w) for w in where["$and"])
+    (key, cond), = where.items()
+    if not isinstance(cond, dict):
+        return meta[key] == cond
+    (op, value), = cond.items()
+    return {"$lt": meta[key] < value, "$gte": meta[key] >= value, "$lte": meta[key] <= value}[op]
+
+
+class FakeCollection:
+    """The slice of chromadb's Collection API the index uses."""
+
+    def __init__(self):
+        self.docs: dict[str, tuple[str, dict]] = {}
+        self.upserted: list[str] = []
+        self.last_where = None
+
+    def get(self, ids, include):
+        found = [i for i in ids if i in self.docs]
+        return {"ids": found, "metadatas": [self.docs[i][1] for i in found]}
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserted += ids
+        self.docs.update(zip(ids, zip(documents, metadatas)))
+
+    def delete(self, where):
+        self.docs = {i: d for i, d in self.docs.items() if not _matches(d[1], where)}
+
+    def query(self, query_texts, n_results, where, include):
+        self.last_where = where
+        hits = sorted(
+            (0.1 if query_texts[0] in doc.lower() else 0.9, i)
+            for i, (doc, meta) in self.docs.items() if _matches(meta, where)
+        )[:n_results]
+        return {
+            "ids": [[i for _, i in hits]],
+            "documents": [[self.docs[i][0] for _, i in hits]],
+            "metadatas": [[self.docs[i][1] for _, i in hits]],
+            "distances": [[d for d, _ in hits]],
+        }
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'semantic.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add_all([Profile(id=1, name="One"), Profile(id=2, name="Two")])
+    db.commit()
+    for pid, rows in {
+        1: ["2026-02-05,07:30,Oatmeal,1,cup,150,,,,,,,,,", "2026-02-06,19:00,Chicken curry,1,bowl,600,,,,,,,,,"],
+        2: ["2026-02-05,12:00,Salad,1,bowl,300,,,,,,,,,"],
+    }.items():
+        ingest_csv(io.StringIO("\n".join([HEADER, *rows]) + "\n"), pid, db)
+    db.commit()
+    db.close()
+    return factory
+
+
+@pytest.fixture
+def index(session_factory):
+    return SemanticIndex("unused", batch_size=1, session_factory=session_factory, collection=FakeCollection())
+
+
+def _rows(factory, profile_id):
+    db = factory()
+    try:
+        E = ConsumptionEntry
+        columns = (E.id, E.profile_id, E.log_date, E.meal_context, E.item_name, E.notes)
+        return db.query(*columns).filter(E.profile_id == profile_id).order_by(E.id).all()
+    finally:
+        db.close()
+
+
+def test_upsert_skips_unchanged_text(index, session_factory):
+    rows = _rows(session_factory, 1)
+    assert index.upsert(rows) == 2
+    assert index.upsert(rows) == 0
+    changed = [SimpleNamespace(**{**rows[0]._asdict(), "notes": "with blueberries"}), rows[1]]
+    assert index.upsert(changed) == 1
+    assert index.collection().docs[str(rows[0].id)][0] == "Oatmeal. with blueberries"
+
+
+def test_queued_jobs_coalesce_and_deletes_win(index, session_factory):
+    index._process([
+        ("index", 1, ["2026-02-05"]),
+        ("index", 1, None),              # a full re-index absorbs the dated job
+        ("index", 2, ["2026-02-05"]),
+        ("delete", 2, None),             # deleted in the same batch: never indexed
+    ])
+    docs = index.collection().docs
+    assert sorted(meta["item_name"] for _, meta in docs.values()) == ["Chicken curry", "Oatmeal"]
+
+    # Through the worker thread
+    index.enqueue(2, ["2026-02-05"])
+    index.wait_idle()
+    assert len(index.collection().docs) == 3
+    index.enqueue_delete(1)
+    index.wait_idle()
+    assert [meta["profile_id"] for _, meta in index.collection().docs.values()] == [2]
+
+
+def test_archived_entries_are_forgotten(index):
+    index._process([("index", 1, None)])
+    index._process([("forget", None, date(2026, 2, 6))])
+    assert [meta["item_name"] for _, meta in index.collection().docs.values()] == ["Chicken curry"]
+
+
+def test_search_filters_by_profile_and_days(index):
+    index._process([("index", 1, None), ("index", 2, None)])
+    results = index.search(1, "curry", limit=5, start=date(2026, 2, 1), end=date(2026, 2, 28))
+    assert index.collection().last_where == {"$and": [
+        {"profile_id": 1}, {"log_day": {"$gte": 20260201}}, {"log_day": {"$lte": 20260228}},
+    ]}
+    assert [r["item_name"] for r in results] == ["Chicken curry", "Oatmeal"]
+    assert results[0]["similarity"] == 0.9 and results[0]["meal_context"] == "dinner"
+
+    index.search(2, "salad")
+    assert index.collection().last_where == {"profile_id": 2}
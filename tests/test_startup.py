@@ -0,0 +1,68 @@
+"""
+Startup budget — import cost, optional heavy modules staying unloaded, and
+the no-op migrate() on an up-to-date database.
+"""
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+
+from src.db.database import Base
+from src.db.migrations import migrate
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Generous against the ~0.9s measured locally — catches a heavy import sneaking in, not jitter
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "2500"))
+# Only imported on first use (correlations, photo variants, semantic search, brotli)
+LAZY_MODULES = ["numpy", "pandas", "PIL", "chromadb", "brotli"]
+# Startup migrates (one PRAGMA when current, above) and hands asset hashing and
+# maintenance to background threads; far above a normal run, so only a
+# blocking step creeping back in trips it, not a slow CI machine
+HEALTH_BUDGET_MS = float(os.getenv("STARTUP_HEALTH_BUDGET_MS", "5000"))
+
+
+def _import_times(module: str) -> tuple[dict[str, int], set[str]]:
+    """Cumulative import time (µs) per module from `python -X importtime`, and what got loaded."""
+    probe = f"import sys, {module}; print(' '.join(sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times, set(proc.stdout.split())
+
+
+def test_app_import_within_budget():
+    times, loaded = _import_times("src.api.main")
+    assert times["src.api.main"] / 1000 < IMPORT_BUDGET_MS
+    assert not loaded & set(LAZY_MODULES)
+
+
+def test_migrate_is_one_pragma_when_current(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    migrate(engine, Base.metadata)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *a: statements.append(sql))
+    migrate(engine, Base.metadata)
+    assert statements == ["PRAGMA user_version"]
+
+
+def test_health_soon_after_startup():
+    from src.api.main import app
+
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        assert client.get("/health").json() == {"status": "ok"}
+    assert (time.perf_counter() - started) * 1000 < HEALTH_BUDGET_MS
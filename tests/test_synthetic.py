@@ -0,0 +1,40 @@
+"""
+Synthetic dataset generator tests — the benchmark suite depends on it being
+deterministic and ingestible.
+"""
+import io
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.synthetic import generate_csv, weekly_export
+from src.db.database import Base
+from src.ingestion.snapcalorie import ingest_csv
+from src.models.consumption import Profile, DailySummary
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_generator_is_deterministic():
+    assert generate_csv(0, years=1, per_day=4) == generate_csv(0, years=1, per_day=4)
+    assert generate_csv(0, years=1, per_day=4) != generate_csv(1, years=1, per_day=4)
+
+
+def test_weekly_export_ingests_cleanly(db):
+    p = Profile(name="Synthetic")
+    db.add(p)
+    db.commit()
+    result = ingest_csv(io.StringIO(weekly_export(0, date(2026, 1, 31), per_day=5)), p.id, db)
+    assert result["skipped"] == 0
+    assert result["inserted"] == 35
+    assert result["dates"][0] == "2026-01-25"
+    assert db.query(DailySummary).filter_by(profile_id=p.id).count() == 7
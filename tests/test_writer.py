@@ -0,0 +1,88 @@
+"""
+Writer queue tests — group commits, per-job savepoints, read-only readers.
+"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.db.writer import WriteQueue
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'w.db'}", pool_size=1, max_overflow=0)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    return engine
+
+
+def _insert(name):
+    def job(db):
+        db.execute(text("INSERT INTO t (name) VALUES (:name)"), {"name": name})
+        return name
+    return job
+
+
+def test_queued_jobs_share_one_commit_and_fail_alone(engine):
+    writer = WriteQueue(sessionmaker(bind=engine))
+    started, gate = threading.Event(), threading.Event()
+    first = writer.submit(lambda db: (started.set(), gate.wait()))
+    started.wait(timeout=5)
+    futures = [writer.submit(_insert(n)) for n in ("a", "b")]
+    failing = writer.submit(_insert(None))   # NOT NULL violation
+    futures.append(writer.submit(_insert("c")))
+    gate.set()
+
+    assert [f.result(timeout=5) for f in futures] == ["a", "b", "c"]
+    first.result(timeout=5)
+    with pytest.raises(Exception, match="NOT NULL"):
+        failing.result(timeout=5)
+    writer.wait_idle()
+
+    assert writer.stats["batches"] == 2     # the gate job, then everything queued behind it
+    assert writer.stats["failed"] == 1
+    with engine.connect() as conn:
+        assert [r[0] for r in conn.exec_driver_sql("SELECT name FROM t ORDER BY id")] == ["a", "b", "c"]
+
+
+def test_exclusive_jobs_run_alone_between_batches(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'x.db'}", pool_size=1, max_overflow=0, pool_timeout=1)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    writer = WriteQueue(sessionmaker(bind=engine))
+    started, gate = threading.Event(), threading.Event()
+    writer.submit(lambda db: (started.set(), gate.wait()))
+    started.wait(timeout=5)
+
+    def own_connection():
+        # Checks out the pool of one itself — free, since no batch is open
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO t (name) VALUES ('x')")
+        return "x"
+
+    before = writer.submit(_insert("a"))
+    exclusive = writer.submit(own_connection, exclusive=True)
+    after = writer.submit(_insert("b"))
+    gate.set()
+    assert [f.result(timeout=5) for f in (before, exclusive, after)] == ["a", "x", "b"]
+    writer.wait_idle()
+    assert writer.stats["batches"] == 3   # the gate, then a and b on either side of the exclusive job
+    with pytest.raises(ZeroDivisionError):
+        writer.run_exclusive(lambda: 1 / 0)
+    with engine.connect() as conn:
+        assert [r[0] for r in conn.exec_driver_sql("SELECT name FROM t ORDER BY id")] == ["a", "x", "b"]
+
+
+def test_read_sessions_are_read_only():
+    from src.db.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        with pytest.raises(OperationalError, match="readonly"):
+            db.execute(text("INSERT INTO foods (name, first_seen_at, usage_count) VALUES ('x', '2026-01-01', 0)"))
+    finally:
+        db.close()